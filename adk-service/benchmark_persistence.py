@@ -0,0 +1,90 @@
+"""
+Compares the deterministic BackendPersistenceAgent with the LLM-driven BackendProcessingAgent on
+wall-clock time and model tokens, against a stubbed Django API so no data is written.
+
+    uv run python benchmark_persistence.py --runs 3 --backend-latency 0.05
+
+The LLM agent needs GOOGLE_API_KEY (or Vertex AI credentials); without them only the
+deterministic agent is measured.
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import statistics
+import time
+
+import httpx
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+
+agent_module = importlib.import_module("generate-content.agent")
+persistence_module = importlib.import_module("generate-content.persistence")
+tools_module = importlib.import_module("generate-content.tools")
+
+SAMPLE_STATE = {
+    "account_id": 1,
+    "phone_number": "+14155550100",
+    "final_json_output": {
+        "preferences": "python for beginners",
+        "subject_name": "Programming",
+        "subject_description": "Learning to write software.",
+        "topic_name": "Python Basics",
+        "topic_description": "Variables, types and your first program.",
+        "topic_content": "Python is a friendly language 🐍\n[BITE_BREAK]\nVariables hold values.\n[BITE_BREAK]\nprint() shows output.",
+    },
+    "quiz_questions": {"questions": {"What does print() do?": ["SHOWS OUTPUT", "reads input", "adds numbers", "nothing"]}},
+}
+
+
+def stub_backend(latency):
+    """Routes the tools' HTTP client to canned Django responses, sleeping `latency` seconds per call."""
+    course = {"subject_id": 100, "topic_id": 200, "bite_ids": [201, 202, 203], "quiz_id": 300,
+              "question_ids": [301], "enrollment_id": 400, "pending": []}
+
+    def handler(request):
+        time.sleep(latency)
+        if request.url.path.endswith("/publish-course/"):
+            return httpx.Response(201, json=course)
+        return httpx.Response(200, json={"status": "ok"})
+
+    tools_module.client = httpx.Client(base_url="http://backend.test/api/v1", transport=httpx.MockTransport(handler))
+
+
+async def run_once(agent):
+    runner = InMemoryRunner(agent=agent, app_name="benchmark")
+    session = await runner.session_service.create_session(app_name="benchmark", user_id="benchmark", state=SAMPLE_STATE)
+    message = types.Content(role="user", parts=[types.Part(text="Save the generated course.")])
+    tokens = 0
+    started = time.perf_counter()
+    async for event in runner.run_async(user_id="benchmark", session_id=session.id, new_message=message):
+        if event.usage_metadata and event.usage_metadata.total_token_count:
+            tokens += event.usage_metadata.total_token_count
+    return time.perf_counter() - started, tokens
+
+
+async def measure(label, agent, runs):
+    results = [await run_once(agent) for _ in range(runs)]
+    seconds = [elapsed for elapsed, _ in results]
+    tokens = [used for _, used in results]
+    print(f"{label:>28}: mean={statistics.fmean(seconds):.2f}s max={max(seconds):.2f}s "
+          f"tokens/run={statistics.fmean(tokens):.0f} over {runs} runs")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--backend-latency", type=float, default=0.05, help="Seconds per stubbed backend call.")
+    args = parser.parse_args()
+
+    stub_backend(args.backend_latency)
+    await measure("BackendPersistenceAgent", persistence_module.BackendPersistenceAgent(name="BackendPersistenceAgent"), args.runs)
+    if os.environ.get("GOOGLE_API_KEY") or os.environ.get("GOOGLE_GENAI_USE_VERTEXAI"):
+        await measure("BackendProcessingAgent (LLM)", agent_module.backend_processing_agent, args.runs)
+    else:
+        print("GOOGLE_API_KEY is not set; skipping BackendProcessingAgent.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,7 +1,20 @@
+from decouple import config
 from google.adk.agents.llm_agent import LlmAgent
-from google.adk.agents import SequentialAgent
-from .schemas import PreferencesSchema
-from .tools import create_subject, create_topic, create_quiz, enroll_user, notify_user, update_user_state
+from google.adk.agents import ParallelAgent, SequentialAgent
+from .schemas import PreferencesSchema, QuizSchema
+from .persistence import BackendPersistenceAgent
+from .timing import record_stage_start, record_stage_end, record_pipeline_end
+from .progress import report_stage_start, report_pipeline_end
+from .tools import publish_course, notify_user, update_user_state
+
+
+# "parallel" runs independent stages concurrently; "sequential" is the original one-stage-at-a-time
+# pipeline, kept to measure against. Stage timings are logged and stored in session state either way.
+PIPELINE_MODE = config("PIPELINE_MODE", default="parallel")
+# "deterministic" saves the course with a fixed sequence of tool calls in code; "llm" lets
+# BackendProcessingAgent orchestrate the same tools with gemini-2.5-pro.
+PERSISTENCE_MODE = config("PERSISTENCE_MODE", default="deterministic")
+stage_timing = dict(before_agent_callback=[record_stage_start, report_stage_start], after_agent_callback=record_stage_end)
 
 # --- 1. Define Sub-Agents for Each Pipeline Stage ---
 
@@ -22,7 +35,8 @@ Your output MUST be a single, valid JSON object containing:
 Do not include any text or markdown before or after the JSON object.
 """,
     description="Plans the curriculum by defining the subject and topic.",
-    output_key="curriculum_plan"
+    output_key="curriculum_plan",
+    **stage_timing,
 )
 
 # Agent 2: Content Drafter
@@ -41,7 +55,8 @@ Write engaging and easy-to-understand lesson content, structured into 3-5 logica
 Output *only* the raw text of the lesson content.
 """,
     description="Drafts the initial lesson content.",
-    output_key="drafted_content"
+    output_key="drafted_content",
+    **stage_timing,
 )
 
 # Agent 3: Content Reviewer
@@ -64,7 +79,8 @@ Provide feedback as a concise, bulleted list. If no changes are needed, state: "
 Output *only* the review comments.
 """,
     description="Reviews the drafted content and provides feedback.",
-    output_key="review_feedback"
+    output_key="review_feedback",
+    **stage_timing,
 )
 
 # Agent 4: Content Refiner
@@ -87,7 +103,8 @@ Ensure the final content is polished and ready for a student.
 Output *only* the final, refined lesson content.
 """,
     description="Refines the lesson content based on review feedback.",
-    output_key="refined_content"
+    output_key="refined_content",
+    **stage_timing,
 )
 
 # Agent 5: JSON Assembler
@@ -111,10 +128,46 @@ Your output MUST be the final, complete JSON object and nothing else.
 """,
     description="Assembles the final JSON output from all previous steps.",
     output_schema=PreferencesSchema,  # Enforce the output structure
-    output_key="final_json_output"
+    output_key="final_json_output",
+    **stage_timing,
 )
 
 
+# Agent 5b: Quiz Writer
+# Writes the quiz from the refined content. It only needs `refined_content`, so in parallel mode it
+# runs alongside the JSON assembler and the backend stores its questions instead of generating them.
+quiz_writer_agent = LlmAgent(
+    name="QuizWriterAgent",
+    model='gemini-2.5-flash',
+    instruction="""You are an expert assessment writer.
+Write a multiple-choice quiz about the lesson content below.
+
+**Lesson Content:**
+{refined_content}
+
+**Task:**
+Write 5 questions, each with 4 options. Exactly one option per question is correct and is written in UPPERCASE; the other options are written in lowercase.
+Your output MUST be a single JSON object that strictly follows the provided schema and nothing else.
+""",
+    description="Writes the topic's quiz questions from the refined content.",
+    output_schema=QuizSchema,
+    output_key="quiz_questions",
+    **stage_timing,
+)
+
+# Agents 5 and 5b both depend only on the refined content, so they run concurrently. An agent can
+# only have one parent, so the stage is only assembled in parallel mode.
+if PIPELINE_MODE == "parallel":
+    finalize_stage = ParallelAgent(
+        name="FinalizeStage",
+        sub_agents=[json_assembler_agent, quiz_writer_agent],
+        description="Assembles the final JSON and writes the quiz concurrently.",
+        **stage_timing,
+    )
+else:
+    finalize_stage = json_assembler_agent
+
+
 # Agent 6: Backend Processing Agent
 # Takes the final JSON and uses tools to save everything to the backend.
 # Note: This agent assumes `account_id` and `phone_number` are passed in the initial session state. It will use these to enroll the user and notify them.
@@ -128,16 +181,22 @@ You have access to the final lesson content in the `{final_json_output}` variabl
 You have access to the user's details in the `{account_id}` and `{phone_number}` variables.
 
 Follow these steps in order and do not proceed if a step fails:
-1.  Call `create_subject` using `subject_name` and `subject_description` from the lesson content. Extract the `id` from the returned subject data.
-2.  Call `create_topic` using the `subject_id` from step 1, and the `topic_name`, `topic_description`, and `topic_content` from the lesson content. Extract the `id` from the returned topic data.
-3.  Call `create_quiz` using the `subject_id` and `topic_id` from the previous steps.
-4.  Call `enroll_user` using the `{account_id}` and the `subject_id`.
-5.  Call `notify_user` using the `{phone_number}`. The message should be: "Your new lesson on '{topic_name}' is ready!"
-6.  Finally, call `update_user_state` using the `{account_id}` and set the state to 'idle'.
-7.  After all steps are complete, respond with a simple confirmation message like "Process complete. All data saved and user notified."
+1.  Call `publish_course` using the `{account_id}` and the `subject_name`, `subject_description`, `topic_name`, `topic_description` and `topic_content` from the lesson content. If quiz questions were written ({quiz_questions?}), pass their `questions` mapping unchanged as `questions`; otherwise omit it and the backend will generate them. If a job ID was given ({job_id?}), pass it as `job_id`.
+2.  Call `notify_user` using the `{phone_number}`. The message should be: "Your new lesson on '{topic_name}' is ready!"
+3.  Finally, call `update_user_state` using the `{account_id}` and set the state to 'idle'.
+4.  After all steps are complete, respond with a simple confirmation message like "Process complete. All data saved and user notified."
 """,
     description="Saves the generated content to the backend and notifies the user.",
-    tools=[create_subject, create_topic, create_quiz, enroll_user, notify_user, update_user_state]
+    tools=[publish_course, notify_user, update_user_state],
+    **stage_timing,
+)
+
+
+# Agent 6 (deterministic): the same steps, run in order by code with no model turns.
+backend_persistence_agent = BackendPersistenceAgent(
+    name="BackendPersistenceAgent",
+    description="Saves the generated content to the backend and notifies the user.",
+    **stage_timing,
 )
 
 
@@ -149,10 +208,12 @@ content_pipeline_agent = SequentialAgent(
         content_drafter_agent,
         content_reviewer_agent,
         content_refiner_agent,
-        json_assembler_agent,
-        backend_processing_agent
+        finalize_stage,
+        backend_persistence_agent if PERSISTENCE_MODE == "deterministic" else backend_processing_agent
     ],
     description="Executes a full sequence of planning, drafting, reviewing, refining, and formatting to generate lesson content.",
+    before_agent_callback=record_stage_start,
+    after_agent_callback=[record_pipeline_end, report_pipeline_end],
 )
 
 root_agent = content_pipeline_agent
\ No newline at end of file
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import logging
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from .schemas import PreferencesSchema
+from .tools import publish_course, notify_user, update_user_state
+
+
+logger = logging.getLogger(__name__)
+
+# Session-state key prefix under which each completed step's result is recorded.
+STEP_KEY_PREFIX = "persisted:"
+# Steps run after the course is saved; their failure is logged and does not fail the stage.
+BEST_EFFORT_STEPS = ("notification", "state")
+
+
+def _as_dict(value):
+    if value is None or isinstance(value, dict):
+        return value
+    return json.loads(value)
+
+
+class BackendPersistenceAgent(BaseAgent):
+    """
+    Saves the generated course and notifies the learner with a fixed sequence of backend calls,
+    instead of a model turn per tool call.
+
+    The subject, topic, bites, quiz and enrollment are written by one `publish_course` call, which
+    the backend runs in a single transaction keyed by the session ID, so a failed save leaves
+    nothing behind and a retried one returns the course saved the first time. Each step's result
+    is recorded in session state (`persisted:<step>`), so running the stage again in the same
+    session resumes after the last completed step.
+    """
+
+    def _event(self, ctx: InvocationContext, text=None, state_delta=None):
+        return Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=text)]) if text else None,
+            actions=EventActions(state_delta=state_delta or {}),
+        )
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        course = PreferencesSchema.model_validate(_as_dict(state["final_json_output"]))
+        quiz = _as_dict(state.get("quiz_questions")) or {}
+        account_id, phone_number = state["account_id"], state["phone_number"]
+        done = {
+            key[len(STEP_KEY_PREFIX):]: value
+            for key, value in state.to_dict().items()
+            if key.startswith(STEP_KEY_PREFIX) and value is not None
+        }
+
+        steps = [
+            ("course", lambda: publish_course(
+                account_id, course.subject_name, course.subject_description, course.topic_name,
+                course.topic_description, course.topic_content,
+                questions=quiz.get("questions"), idempotency_key=ctx.session.id, job_id=state.get("job_id"),
+            )),
+            ("notification", lambda: notify_user(phone_number, f"Your new lesson on '{course.topic_name}' is ready!")),
+            ("state", lambda: update_user_state(account_id, "idle")),
+        ]
+        for name, call in steps:
+            if name in done:
+                continue
+            result = await asyncio.to_thread(call)
+            if result.get("status") == "success":
+                done[name] = result
+                yield self._event(ctx, state_delta={f"{STEP_KEY_PREFIX}{name}": result})
+                continue
+
+            message = result.get("message", "unknown error")
+            if name in BEST_EFFORT_STEPS:
+                logger.warning(f"Course saved but step '{name}' failed: {message}")
+                continue
+
+            logger.error(f"Saving the course failed at step '{name}': {message}")
+            yield self._event(ctx, text=f"Process failed at step '{name}': {message}")
+            return
+
+        yield self._event(ctx, text="Process complete. All data saved and user notified.")
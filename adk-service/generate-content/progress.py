@@ -0,0 +1,42 @@
+import asyncio
+import logging
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+from .tools import update_generation_job
+
+
+logger = logging.getLogger(__name__)
+
+# Session-state key holding the backend generation job, passed in by the backend with the request.
+JOB_KEY = "job_id"
+COURSE_SAVED_KEY = "persisted:course"
+
+
+async def _report(callback_context: CallbackContext, status, **fields):
+    job_id = callback_context.state.get(JOB_KEY)
+    if not job_id:
+        return
+    # The backend call is blocking, so it runs on a worker thread to keep the event loop free.
+    result = await asyncio.to_thread(update_generation_job, job_id, status, **fields)
+    if result["status"] != "success":
+        logger.warning(f"Could not report '{status}' for generation job {job_id}: {result['message']}")
+
+
+async def report_stage_start(callback_context: CallbackContext) -> Optional[types.Content]:
+    """before_agent_callback: tells the backend job which pipeline stage is running."""
+    await _report(callback_context, "running", stage=callback_context.agent_name)
+    return None
+
+
+async def report_pipeline_end(callback_context: CallbackContext) -> Optional[types.Content]:
+    """
+    after_agent_callback of the root pipeline: fails the job unless BackendPersistenceAgent recorded
+    the saved course. Saving the course marks the job done on the backend, which rejects a later
+    'failed', so with PERSISTENCE_MODE=llm (where nothing is recorded) the report is harmless.
+    """
+    if callback_context.state.get(COURSE_SAVED_KEY) is None:
+        await _report(callback_context, "failed", error="The content pipeline finished without saving the course.")
+    return None
@@ -9,4 +9,8 @@ class PreferencesSchema(BaseModel):
     topic_name: str = Field(description="Generated topic name based on user preferences")
     topic_description: str = Field(description="Generated topic description based on user preferences")
     subject_name: str = Field(description="Generated subject name based on user preferences")
-    subject_description: str = Field(description="Generated subject description based on user preferences")
\ No newline at end of file
+    subject_description: str = Field(description="Generated subject description based on user preferences")
+
+class QuizSchema(BaseModel):
+    questions: Dict[str, List[str]] = Field(description="Each question mapped to its list of options. The correct option is "
+                                                        "in UPPERCASE and the others are in lowercase.")
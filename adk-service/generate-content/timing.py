@@ -0,0 +1,50 @@
+import logging
+import time
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.genai import types
+
+
+logger = logging.getLogger(__name__)
+
+STAGE_KEY_PREFIX = "stage_seconds:"
+# Start times live in session state next to the timings rather than in a module-level dict, so a
+# stage that raises before its after-callback leaves nothing behind in the process; its key is
+# simply overwritten the next time the stage starts in that session.
+STARTED_KEY_PREFIX = "stage_started:"
+
+
+def record_stage_start(callback_context: CallbackContext) -> Optional[types.Content]:
+    """before_agent_callback: remembers when an agent (pipeline stage) started."""
+    callback_context.state[f"{STARTED_KEY_PREFIX}{callback_context.agent_name}"] = time.time()
+    return None
+
+
+def record_stage_end(callback_context: CallbackContext) -> Optional[types.Content]:
+    """
+    after_agent_callback: stores the agent's wall-clock seconds in session state under
+    `stage_seconds:<agent name>`. One key per stage, so parallel branches never overwrite
+    each other's timings.
+    """
+    started_key = f"{STARTED_KEY_PREFIX}{callback_context.agent_name}"
+    started = callback_context.state.get(started_key)
+    if started is None:
+        return None
+    callback_context.state[started_key] = None
+    elapsed = round(time.time() - started, 3)
+    callback_context.state[f"{STAGE_KEY_PREFIX}{callback_context.agent_name}"] = elapsed
+    logger.info(f"Stage {callback_context.agent_name} took {elapsed}s")
+    return None
+
+
+def record_pipeline_end(callback_context: CallbackContext) -> Optional[types.Content]:
+    """after_agent_callback of the root pipeline: records its total and logs every stage's timing."""
+    record_stage_end(callback_context)
+    timings = {
+        key[len(STAGE_KEY_PREFIX):]: value
+        for key, value in callback_context.state.to_dict().items()
+        if key.startswith(STAGE_KEY_PREFIX)
+    }
+    logger.info(f"Pipeline stage timings (seconds): {timings}")
+    return None
@@ -1,4 +1,4 @@
-from typing import Dict, Any, Literal
+from typing import Dict, Any, List, Literal, Optional
 
 import httpx
 from decouple import config
@@ -6,138 +6,63 @@ from decouple import config
 
 DJANGO_API_URL = config("DJANGO_API_URL", default="http://127.0.0.1:8000/api/v1")
 ADK_WORKER_SECRET = config("ADK_WORKER_SECRET", default="")
+# Progress reports run inside stage callbacks, so they give up quickly rather than stall the pipeline.
+PROGRESS_TIMEOUT = config("PROGRESS_TIMEOUT", default=2.0, cast=float)
 
 
-auth_headers = {"X-ADK-SECRET": ADK_WORKER_SECRET}
+auth_headers = {"X-ADK-Worker-Secret": ADK_WORKER_SECRET}
 client = httpx.Client(base_url=DJANGO_API_URL, headers=auth_headers)
 
 
 # --- Tool Definitions ---
 
-def create_subject(subject_name: str, subject_description: str) -> Dict[str, Any]:
+def publish_course(account_id: int, subject_name: str, subject_description: str, topic_name: str,
+                   topic_description: str, topic_content: str,
+                   questions: Optional[Dict[str, List[str]]] = None,
+                   idempotency_key: Optional[str] = None,
+                   job_id: Optional[str] = None) -> Dict[str, Any]:
     """
-    Creates a new subject category in the backend system.
+    Saves a whole generated course in one call: the subject, its topic and bites, the quiz and the
+    user's enrollment. The backend writes them in a single transaction, so either all of them are
+    saved or none are.
 
-    Use this tool to establish a new high-level subject before adding specific topics to it.
-    This is the first step in creating new educational content.
+    Calling it again with the same idempotency_key returns the course saved by the first call.
 
     Args:
+        account_id: The integer ID of the user's account to enroll.
         subject_name: The concise name of the subject (e.g., "Astrophysics").
         subject_description: A brief, one-sentence description of the subject.
-
-    Returns:
-        A dictionary indicating the outcome.
-        On success: {'status': 'success', 'subject': {'id': 1, 'name': 'Astrophysics', ...}}
-        On failure: {'status': 'error', 'message': 'Failed to create subject: ...'}
-    """
-    try:
-        response = client.post(
-            "/subjects/",
-            json={"name": subject_name, "description": subject_description},
-        )
-        response.raise_for_status()
-        return {"status": "success", "subject": response.json()}
-    except httpx.HTTPStatusError as e:
-        return {"status": "error", "message": f"Failed to create subject: {e.response.text}"}
-    except Exception as e:
-        return {"status": "error", "message": f"An unexpected error occurred: {str(e)}"}
-
-
-def create_topic(subject_id: int, topic_name: str, topic_description: str, topic_content: str) -> Dict[str, Any]:
-    """
-    Creates a new topic within an existing subject and populates it with content.
-
-    Use this tool after a subject has been created. This function saves the main content
-    and triggers the backend to automatically split it into smaller, bite-sized lessons.
-
-    Args:
-        subject_id: The integer ID of the parent subject this topic belongs to.
         topic_name: The concise name of the topic (e.g., "The Mystery of Black Holes").
         topic_description: A brief, one-sentence description of the topic.
         topic_content: The full, multi-paragraph text content for the topic.
+        questions: Optional pre-written questions, each mapped to its options with the correct one in UPPERCASE.
+        idempotency_key: Optional key identifying this save, such as the session ID.
+        job_id: Optional ID of the backend generation job, which is marked done with the new subject.
 
     Returns:
         A dictionary indicating the outcome.
-        On success: {'status': 'success', 'topic': {'id': 1, 'name': 'The Mystery of Black Holes', ...}}
-        On failure: {'status': 'error', 'message': 'Failed to create topic: ...'}
-    """
-    try:
-        response = client.post(
-            "/topics/",
-            json={
-                "subject": subject_id,
-                "name": topic_name,
-                "description": topic_description,
-                "content": topic_content
-            },
-        )
-        response.raise_for_status()
-        return {"status": "success", "topic": response.json()}
-    except httpx.HTTPStatusError as e:
-        return {"status": "error", "message": f"Failed to create topic: {e.response.text}"}
-    except Exception as e:
-        return {"status": "error", "message": f"An unexpected error occurred: {str(e)}"}
-
-
-def create_quiz(subject_id: int, topic_id: int, num_questions: int = 5) -> Dict[str, Any]:
-    """
-    Generates a quiz for a specific topic.
-
-    Use this tool after a topic and its content have been successfully created.
-    This triggers the backend to generate a set of multiple-choice questions based on the topic content.
-
-    Args:
-        subject_id: The integer ID of the subject.
-        topic_id: The integer ID of the topic for which to create a quiz.
-        num_questions: The number of questions to generate for the quiz.
-
-    Returns:
-        A dictionary indicating the outcome.
-        On success: {'status': 'success', 'quiz': {'id': 1, 'topic': 1, ...}}
-        On failure: {'status': 'error', 'message': 'Failed to create quiz: ...'}
+        On success: {'status': 'success', 'course': {'subject_id': 1, 'topic_id': 1, 'quiz_id': 1, 'enrollment_id': 1, ...}}
+        On failure: {'status': 'error', 'message': 'Failed to publish course: ...'}
     """
     try:
         response = client.post(
-            "/quizzes/",
+            "/internal/publish-course/",
             json={
-                "subject": subject_id,
-                "topic": topic_id,
-                "number_of_questions": num_questions,
-                "number_of_options": 4
+                "account_id": account_id,
+                "subject_name": subject_name,
+                "subject_description": subject_description,
+                "topic_name": topic_name,
+                "topic_description": topic_description,
+                "topic_content": topic_content,
+                **({"questions": questions} if questions else {}),
+                **({"idempotency_key": idempotency_key} if idempotency_key else {}),
+                **({"job_id": job_id} if job_id else {}),
             },
         )
         response.raise_for_status()
-        return {"status": "success", "quiz": response.json()}
+        return {"status": "success", "course": response.json()}
     except httpx.HTTPStatusError as e:
-        return {"status": "error", "message": f"Failed to create quiz: {e.response.text}"}
-    except Exception as e:
-        return {"status": "error", "message": f"An unexpected error occurred: {str(e)}"}
-
-
-def enroll_user(account_id: int, subject_id: int) -> Dict[str, Any]:
-    """
-    Enrolls a user into a specific subject, giving them access to its content.
-
-    Use this tool after a new subject has been created to grant a user access.
-
-    Args:
-        account_id: The integer ID of the user's account.
-        subject_id: The integer ID of the subject to enroll the user in.
-
-    Returns:
-        A dictionary indicating the outcome.
-        On success: {'status': 'success', 'enrollment': {'id': 1, 'account': 1, 'subject': 1}}
-        On failure: {'status': 'error', 'message': 'Failed to enroll user: ...'}
-    """
-    try:
-        response = client.post(
-            "/internal/enroll-user/",
-            json={"account_id": account_id, "subject_id": subject_id},
-        )
-        response.raise_for_status()
-        return {"status": "success", "enrollment": response.json()}
-    except httpx.HTTPStatusError as e:
-        return {"status": "error", "message": f"Failed to enroll user: {e.response.text}"}
+        return {"status": "error", "message": f"Failed to publish course: {e.response.text}"}
     except Exception as e:
         return {"status": "error", "message": f"An unexpected error occurred: {str(e)}"}
 
@@ -160,7 +85,7 @@ def notify_user(phone_number: str, message: str) -> Dict[str, Any]:
     """
     try:
         response = client.post(
-            "/internal/notify-user/",
+            "/internals/notify-user/",
             json={"phone_number": phone_number, "message": message},
         )
         response.raise_for_status()
@@ -189,7 +114,7 @@ def update_user_state(account_id: int, state: Literal['idle', 'in_lesson']) -> D
     """
     try:
         response = client.post(
-            "/internal/update-user-state/",
+            "/internals/update-user-state/",
             json={"account_id": account_id, "state": state, "context": {}},
         )
         response.raise_for_status()
@@ -197,4 +122,34 @@ def update_user_state(account_id: int, state: Literal['idle', 'in_lesson']) -> D
     except httpx.HTTPStatusError as e:
         return {"status": "error", "message": f"Failed to update state: {e.response.text}"}
     except Exception as e:
-        return {"status": "error", "message": f"An unexpected error occurred: {str(e)}"}
\ No newline at end of file
+        return {"status": "error", "message": f"An unexpected error occurred: {str(e)}"}
+
+
+def update_generation_job(job_id: str, status: Literal['running', 'done', 'failed'],
+                          stage: str = "", error: str = "") -> Dict[str, Any]:
+    """
+    Reports a pipeline stage or outcome to the backend generation job the learner polls with /status.
+
+    Args:
+        job_id: The ID of the backend generation job.
+        status: 'running' while stages start, then 'done' or 'failed'.
+        stage: The name of the stage that started.
+        error: Why the pipeline failed.
+
+    Returns:
+        A dictionary indicating the outcome.
+        On success: {'status': 'success', 'job': {'id': '...', 'status': 'running', 'stage': '...', ...}}
+        On failure: {'status': 'error', 'message': 'Failed to update generation job: ...'}
+    """
+    try:
+        response = client.post(
+            f"/internals/generation-jobs/{job_id}/",
+            json={"status": status, "stage": stage, "error": error},
+            timeout=PROGRESS_TIMEOUT,
+        )
+        response.raise_for_status()
+        return {"status": "success", "job": response.json()}
+    except httpx.HTTPStatusError as e:
+        return {"status": "error", "message": f"Failed to update generation job: {e.response.text}"}
+    except Exception as e:
+        return {"status": "error", "message": f"An unexpected error occurred: {str(e)}"}
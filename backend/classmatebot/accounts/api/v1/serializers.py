@@ -72,4 +72,15 @@ class TokenCreateSerializer(serializers.Serializer):
         if account and account.is_active:
             attrs['user'] = account
             return attrs
-        self.fail("invalid_credentials")
\ No newline at end of file
+        self.fail("invalid_credentials")
+
+class LeaderboardQuerySerializer(serializers.Serializer):
+    board = serializers.ChoiceField(choices=['global', 'weekly', 'subject'], default='global')
+    subject_id = serializers.IntegerField(required=False, min_value=1)
+    limit = serializers.IntegerField(default=10, min_value=1, max_value=100)
+    offset = serializers.IntegerField(default=0, min_value=0)
+
+    def validate(self, attrs):
+        if attrs['board'] == 'subject' and not attrs.get('subject_id'):
+            raise serializers.ValidationError({"subject_id": "subject_id is required for the subject board."})
+        return attrs
@@ -11,4 +11,5 @@ urlpatterns = [
     path('auth/users/', views.AccountListCreateView.as_view()),
     path('auth/token/login/', views.TokenCreateAPIView.as_view()),
     path('auth/token/logout/', views.TokenDestroyView.as_view()),
+    path('leaderboard/', views.LeaderboardAPIView.as_view()),
 ]
\ No newline at end of file
@@ -3,7 +3,8 @@ from rest_framework.response import Response
 from rest_framework import views
 
 from classmatebot.accounts.models import Account
-from classmatebot.accounts.api.v1.serializers import AccountSerializer, AccountCreateSerializer, TokenCreateSerializer
+from classmatebot.accounts.leaderboard import leaderboard, resolve_board, display_names
+from classmatebot.accounts.api.v1.serializers import AccountSerializer, AccountCreateSerializer, TokenCreateSerializer, LeaderboardQuerySerializer
 from classmatebot.accounts.utils import login_user, logout_user
 
 
@@ -48,3 +49,28 @@ class TokenDestroyView(views.APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class LeaderboardAPIView(generics.GenericAPIView):
+    """
+    Top learners on the global, weekly or a subject leaderboard, plus the requesting account's rank.
+    """
+    serializer_class = LeaderboardQuerySerializer
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        board = resolve_board(data['board'], data.get('subject_id'))
+        entries = leaderboard.top(board, limit=data['limit'], offset=data['offset'])
+        names = display_names([account_id for _, account_id, _ in entries])
+        rank, score = leaderboard.rank(board, request.user.id)
+        return Response({
+            "board": board,
+            "size": leaderboard.size(board),
+            "results": [
+                {"rank": position, "account_id": account_id, "name": names.get(account_id, ""), "points": points}
+                for position, account_id, points in entries
+            ],
+            "me": {"rank": rank, "points": score or 0},
+        }, status=status.HTTP_200_OK)
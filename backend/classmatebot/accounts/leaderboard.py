@@ -0,0 +1,385 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+import redis
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_BOARD = "global"
+WEEKLY_BOARD_TTL = 15 * 24 * 60 * 60
+
+
+def subject_board(subject_id):
+    return f"subject:{subject_id}"
+
+
+def weekly_board(when=None):
+    year, week, _ = timezone.localtime(when or timezone.now()).isocalendar()
+    return f"weekly:{year}-{week:02d}"
+
+
+def week_bounds(board):
+    """The [start, end) datetimes of a weekly board, in the current time zone."""
+    year, week = board.removeprefix("weekly:").split("-")
+    start = timezone.make_aware(datetime.fromisocalendar(int(year), int(week), 1))
+    return start, start + timedelta(weeks=1)
+
+
+class _SkipNode:
+    __slots__ = ("key", "forward", "span")
+
+    def __init__(self, key, level):
+        self.key = key
+        self.forward = [None] * level
+        self.span = [0] * level
+
+
+class SkipList:
+    """
+    Indexable skip list (the structure behind Redis sorted sets). Every forward pointer also
+    stores how many level-0 nodes it skips, so insert, remove, rank-of-key and key-at-rank
+    are all O(log n).
+    """
+    MAX_LEVEL = 32
+    P = 0.25
+
+    def __init__(self):
+        self.head = _SkipNode(None, self.MAX_LEVEL)
+        self.level = 1
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def _random_level(self):
+        level = 1
+        while level < self.MAX_LEVEL and random.random() < self.P:
+            level += 1
+        return level
+
+    def insert(self, key):
+        update = [None] * self.MAX_LEVEL
+        rank = [0] * self.MAX_LEVEL
+        node = self.head
+        for i in reversed(range(self.level)):
+            rank[i] = 0 if i == self.level - 1 else rank[i + 1]
+            while node.forward[i] is not None and node.forward[i].key < key:
+                rank[i] += node.span[i]
+                node = node.forward[i]
+            update[i] = node
+
+        level = self._random_level()
+        if level > self.level:
+            for i in range(self.level, level):
+                rank[i] = 0
+                update[i] = self.head
+                self.head.span[i] = self.length
+            self.level = level
+
+        new = _SkipNode(key, level)
+        for i in range(level):
+            new.forward[i] = update[i].forward[i]
+            update[i].forward[i] = new
+            new.span[i] = update[i].span[i] - (rank[0] - rank[i])
+            update[i].span[i] = (rank[0] - rank[i]) + 1
+        for i in range(level, self.level):
+            update[i].span[i] += 1
+        self.length += 1
+
+    def remove(self, key):
+        update = [None] * self.MAX_LEVEL
+        node = self.head
+        for i in reversed(range(self.level)):
+            while node.forward[i] is not None and node.forward[i].key < key:
+                node = node.forward[i]
+            update[i] = node
+
+        target = node.forward[0]
+        if target is None or target.key != key:
+            return False
+        for i in range(self.level):
+            if update[i].forward[i] is target:
+                update[i].span[i] += target.span[i] - 1
+                update[i].forward[i] = target.forward[i]
+            else:
+                update[i].span[i] -= 1
+        while self.level > 1 and self.head.forward[self.level - 1] is None:
+            self.level -= 1
+        self.length -= 1
+        return True
+
+    def rank(self, key):
+        """1-based position of `key`, or None if it is not in the list."""
+        node, traversed = self.head, 0
+        for i in reversed(range(self.level)):
+            while node.forward[i] is not None and node.forward[i].key <= key:
+                traversed += node.span[i]
+                node = node.forward[i]
+            if node.key == key:
+                return traversed
+        return None
+
+    def _node_at(self, rank):
+        node, traversed = self.head, 0
+        for i in reversed(range(self.level)):
+            while node.forward[i] is not None and traversed + node.span[i] <= rank:
+                traversed += node.span[i]
+                node = node.forward[i]
+            if traversed == rank:
+                return node
+        return None
+
+    def range(self, start, count):
+        """Up to `count` keys starting at 0-based position `start`."""
+        node = self._node_at(start + 1) if 0 <= start < self.length else None
+        keys = []
+        while node is not None and len(keys) < count:
+            keys.append(node.key)
+            node = node.forward[0]
+        return keys
+
+
+class LocalLeaderboardBackend:
+    """
+    In-process boards: one SkipList of (-score, -member) keys and a score map per board, so
+    ties go to the higher account id as they do in Redis and the database.
+    """
+
+    def __init__(self):
+        self._boards = {}
+        self._expires = {}
+        self._lock = threading.Lock()
+
+    def _board(self, name):
+        if name in self._expires and self._expires[name] <= time.monotonic():
+            self._boards.pop(name, None)
+            self._expires.pop(name, None)
+        if name not in self._boards:
+            self._boards[name] = (SkipList(), {})
+        return self._boards[name]
+
+    def incr(self, name, member, amount):
+        with self._lock:
+            skiplist, scores = self._board(name)
+            score = scores.get(member)
+            if score is not None:
+                skiplist.remove((-score, -member))
+            score = (score or 0) + amount
+            scores[member] = score
+            skiplist.insert((-score, -member))
+            return score
+
+    def top(self, name, start, count):
+        with self._lock:
+            skiplist, _ = self._board(name)
+            return [(-member, -score) for score, member in skiplist.range(start, count)]
+
+    def rank(self, name, member):
+        with self._lock:
+            skiplist, scores = self._board(name)
+            score = scores.get(member)
+            if score is None:
+                return None, None
+            return skiplist.rank((-score, -member)), score
+
+    def size(self, name):
+        with self._lock:
+            return len(self._board(name)[0])
+
+    def replace(self, name, scores):
+        skiplist = SkipList()
+        for member, score in scores.items():
+            skiplist.insert((-score, -member))
+        with self._lock:
+            self._boards[name] = (skiplist, dict(scores))
+
+    def expire(self, name, seconds):
+        with self._lock:
+            self._expires[name] = time.monotonic() + seconds
+
+
+class RedisLeaderboardBackend:
+    """
+    Boards as Redis sorted sets: ZINCRBY on award, ZREVRANGE/ZREVRANK for reads. Redis orders
+    tied scores by member bytes, so account ids are stored zero-padded to a fixed width and ties
+    go to the higher id, matching the local backend and the database.
+    """
+    prefix = "leaderboard:"
+
+    def __init__(self, client=None):
+        self.client = client or redis.Redis(
+            host=settings.REDIS_HOST,
+            port=int(settings.REDIS_PORT),
+            username=settings.REDIS_USERNAME or None,
+            password=settings.REDIS_PASSWORD or None,
+        )
+
+    @staticmethod
+    def _member(account_id):
+        return f"{account_id:020d}"
+
+    def incr(self, name, member, amount):
+        return int(self.client.zincrby(self.prefix + name, amount, self._member(member)))
+
+    def top(self, name, start, count):
+        entries = self.client.zrevrange(self.prefix + name, start, start + count - 1, withscores=True)
+        return [(int(member), int(score)) for member, score in entries]
+
+    def rank(self, name, member):
+        key = self.prefix + name
+        with self.client.pipeline(transaction=False) as pipe:
+            rank, score = pipe.zrevrank(key, self._member(member)).zscore(key, self._member(member)).execute()
+        if rank is None:
+            return None, None
+        return rank + 1, int(score)
+
+    def size(self, name):
+        return self.client.zcard(self.prefix + name)
+
+    def replace(self, name, scores):
+        key = self.prefix + name
+        staging = f"{key}:rebuild"
+        with self.client.pipeline() as pipe:
+            pipe.delete(staging)
+            if scores:
+                pipe.zadd(staging, {self._member(member): score for member, score in scores.items()})
+                pipe.rename(staging, key)
+            else:
+                pipe.delete(key)
+            pipe.execute()
+
+    def expire(self, name, seconds):
+        self.client.expire(self.prefix + name, seconds)
+
+
+class Leaderboard:
+    """
+    Global, per-subject and weekly rankings kept incrementally from point awards.
+    Reads are top-N and "my rank" lookups against the backend's sorted structure.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def boards_for(subject_id=None, when=None):
+        boards = [GLOBAL_BOARD, weekly_board(when)]
+        if subject_id:
+            boards.append(subject_board(subject_id))
+        return boards
+
+    def record_award(self, account_id, points, subject_id=None, when=None):
+        if not points:
+            return
+        try:
+            for board in self.boards_for(subject_id, when):
+                self.backend.incr(board, account_id, points)
+            self.backend.expire(weekly_board(when), WEEKLY_BOARD_TTL)
+        except redis.RedisError as e:
+            logger.warning(f"Leaderboard update failed for account {account_id}: {e}")
+
+    def top(self, board, limit=10, offset=0):
+        """
+        Returns [(rank, account_id, score)] for `limit` entries starting after `offset`. When the
+        backend is unreachable the board is read from the database (see db_scores).
+        """
+        try:
+            entries = self.backend.top(board, offset, limit)
+        except redis.RedisError as e:
+            logger.warning(f"Leaderboard read of {board} failed, falling back to the database: {e}")
+            entries = db_top(board, offset, limit)
+        return [(offset + i + 1, account_id, score) for i, (account_id, score) in enumerate(entries)]
+
+    def rank(self, board, account_id):
+        """Returns (rank, score) for an account, or (None, None) if it has no points on the board."""
+        try:
+            return self.backend.rank(board, account_id)
+        except redis.RedisError as e:
+            logger.warning(f"Leaderboard rank on {board} failed, falling back to the database: {e}")
+            return db_rank(board, account_id)
+
+    def size(self, board):
+        try:
+            return self.backend.size(board)
+        except redis.RedisError as e:
+            logger.warning(f"Leaderboard size of {board} failed, falling back to the database: {e}")
+            return db_size(board)
+
+    def rebuild(self, board, scores):
+        """Atomically replaces a board with {account_id: score}."""
+        self.backend.replace(board, scores)
+        if board.startswith("weekly:"):
+            self.backend.expire(board, WEEKLY_BOARD_TTL)
+
+
+def db_scores(board):
+    """
+    A board's positive scores as rows of account_id and total, read from PointBalance for the
+    global board and summed from the Point ledger for weekly and subject boards.
+    """
+    from classmatebot.accounts.models import Point, PointBalance
+
+    if board == GLOBAL_BOARD:
+        return PointBalance.objects.filter(total__gt=0).values('account_id', 'total')
+    if board.startswith("weekly:"):
+        start, end = week_bounds(board)
+        points = Point.objects.filter(created_at__gte=start, created_at__lt=end)
+    else:
+        points = Point.objects.filter(subject_id=int(board.removeprefix("subject:")))
+    return points.values('account_id').annotate(total=models.Sum('point')).filter(total__gt=0)
+
+
+def db_top(board, start, count):
+    """A board read from the database, ordered like the backends: score desc, then account id desc."""
+    return list(db_scores(board).order_by('-total', '-account_id').values_list('account_id', 'total')[start:start + count])
+
+
+def db_rank(board, account_id):
+    scores = db_scores(board)
+    totals = list(scores.filter(account_id=account_id).values_list('total', flat=True))
+    if not totals:
+        return None, None
+    total = totals[0]
+    ahead = scores.filter(models.Q(total__gt=total) | models.Q(total=total, account_id__gt=account_id)).count()
+    return ahead + 1, total
+
+
+def db_size(board):
+    return db_scores(board).count()
+
+
+def get_leaderboard_backend():
+    if settings.LEADERBOARD_BACKEND == "local":
+        return LocalLeaderboardBackend()
+    return RedisLeaderboardBackend()
+
+
+leaderboard = Leaderboard(get_leaderboard_backend())
+
+
+def resolve_board(board="global", subject_id=None):
+    """Maps user-facing board names ("global", "weekly", "subject") to backend board keys."""
+    if board == "weekly":
+        return weekly_board()
+    if board == "subject":
+        return subject_board(subject_id)
+    return GLOBAL_BOARD
+
+
+def display_names(account_ids):
+    """Returns {account_id: name} with the phone number masked for accounts without a name."""
+    from classmatebot.accounts.models import Account
+
+    names = {}
+    for account_id, first_name, last_name, phone_number in Account.objects.filter(id__in=account_ids).values_list(
+            'id', 'first_name', 'last_name', 'phone_number'):
+        phone_number = str(phone_number)
+        names[account_id] = f"{first_name} {last_name}".strip() or f"{phone_number[:4]}•••{phone_number[-4:]}"
+    return names
@@ -0,0 +1,47 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+from django.utils import timezone
+
+from classmatebot.accounts.leaderboard import leaderboard, GLOBAL_BOARD, subject_board, weekly_board
+from classmatebot.accounts.models import Point, PointBalance
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the global, per-subject and recent weekly leaderboards from PointBalance and the "
+        "Point ledger. Each board is swapped in atomically."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--weeks", type=int, default=2, help="Number of weekly boards to rebuild, counting back from this week.")
+
+    def handle(self, *args, **options):
+        scores = dict(PointBalance.objects.filter(total__gt=0).values_list('account_id', 'total'))
+        leaderboard.rebuild(GLOBAL_BOARD, scores)
+        self.stdout.write(f"{GLOBAL_BOARD}: {len(scores)} accounts")
+
+        subjects = {}
+        for subject_id, account_id, total in Point.objects.filter(subject__isnull=False).values(
+                'subject_id', 'account_id').annotate(total=Sum('point')).values_list('subject_id', 'account_id', 'total'):
+            if total > 0:
+                subjects.setdefault(subject_id, {})[account_id] = total
+        for subject_id, scores in subjects.items():
+            leaderboard.rebuild(subject_board(subject_id), scores)
+        self.stdout.write(f"subject boards: {len(subjects)}")
+
+        now = timezone.localtime()
+        this_week = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+        for weeks_back in range(options["weeks"]):
+            start = this_week - timedelta(weeks=weeks_back)
+            scores = {
+                account_id: total
+                for account_id, total in Point.objects.filter(created_at__gte=start, created_at__lt=start + timedelta(weeks=1))
+                .values('account_id').annotate(total=Sum('point')).values_list('account_id', 'total')
+                if total > 0
+            }
+            leaderboard.rebuild(weekly_board(start), scores)
+            self.stdout.write(f"{weekly_board(start)}: {len(scores)} accounts")
+
+        self.stdout.write(self.style.SUCCESS("Leaderboards rebuilt."))
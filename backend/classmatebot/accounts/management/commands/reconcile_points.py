@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from classmatebot.accounts.models import PointBalance
+
+
+class Command(BaseCommand):
+    help = "Compares every account's running PointBalance with the Point ledger and rewrites the ones that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report drifted accounts.")
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            drift = PointBalance.objects.find_drift()
+            for account_id, total in sorted(drift.items()):
+                self.stdout.write(f"account {account_id}: ledger total {total}")
+            self.stdout.write(self.style.SUCCESS(f"{len(drift)} balances drifted."))
+            return
+
+        fixed = PointBalance.objects.reconcile()
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {fixed} balances."))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='state',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
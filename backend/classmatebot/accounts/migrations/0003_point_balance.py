@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_point_balances(apps, schema_editor):
+    Point = apps.get_model('accounts', 'Point')
+    PointBalance = apps.get_model('accounts', 'PointBalance')
+    totals = Point.objects.values('account_id').annotate(total=models.Sum('point')).values_list('account_id', 'total')
+    PointBalance.objects.bulk_create(
+        [PointBalance(account_id=account_id, total=total or 0) for account_id, total in totals],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_state_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PointBalance',
+            fields=[
+                ('account', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='point_balance', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total', models.IntegerField(default=0)),
+                ('date_updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'point balance',
+                'verbose_name_plural': 'point balances',
+            },
+        ),
+        migrations.AlterField(
+            model_name='point',
+            name='event_type',
+            field=models.CharField(choices=[('quiz_completed', 'Quiz Completed'), ('bite_completed', 'Lesson Completed'), ('daily_streak_completed', 'Streak Completed'), ('milestone_achieved', 'Milestone Achieved'), ('question_answered_correctly', 'Question Answered Correctly'), ('question_answered_incorrectly', 'Question Answered Incorrectly')], max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='point',
+            index=models.Index(fields=['account', 'created_at'], name='point_account_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pointbalance',
+            index=models.Index(fields=['-total', 'account'], name='point_balance_rank_idx'),
+        ),
+        migrations.RunPython(backfill_point_balances, migrations.RunPython.noop),
+    ]
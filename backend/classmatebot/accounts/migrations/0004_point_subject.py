@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_point_balance'),
+        ('subjects', '0002_account_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='point',
+            name='subject',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='subject_points', to='subjects.subject'),
+        ),
+    ]
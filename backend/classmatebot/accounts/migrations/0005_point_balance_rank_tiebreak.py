@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_point_subject'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='pointbalance',
+            name='point_balance_rank_idx',
+        ),
+        migrations.AddIndex(
+            model_name='pointbalance',
+            index=models.Index(fields=['-total', '-account'], name='point_balance_rank_idx'),
+        ),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction, IntegrityError
 from django.contrib.auth.base_user import AbstractBaseUser
 from django.contrib.auth.models import PermissionsMixin
 from django.utils.translation import gettext_lazy as _
@@ -8,6 +9,7 @@ from phonenumber_field.modelfields import PhoneNumberField
 from classmatebot.accounts.constants import Message
 from classmatebot.accounts.fields import LowerCaseEmailField
 from classmatebot.accounts.managers import AccountManager
+from classmatebot.accounts.leaderboard import leaderboard
 
 
 # Create your models here.
@@ -61,7 +63,7 @@ class Account(AbstractBaseUser, PermissionsMixin):
     
     @property
     def total_points(self):
-        total = Point.objects.filter(account=self).aggregate(models.Sum('point'))['point__sum']
+        total = PointBalance.objects.filter(account=self).values_list('total', flat=True).first()
         return total if total else 0
 
 
@@ -75,6 +77,7 @@ class State(models.Model):
     account = models.OneToOneField(Account, on_delete=models.CASCADE, related_name='account_state')
     state = models.CharField(max_length=20, default=Mode.IDLE, choices=Mode.choices)
     context = models.JSONField(default=dict, blank=True, null=True)
+    version = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     last_updated = models.DateTimeField(auto_now=True)
 
@@ -87,35 +90,45 @@ class State(models.Model):
 
 
 class PointManager(models.Manager):
-    def award_quiz_completed(self, account):
-        points = 10  
-        point_record = self.create(account=account, event_type='quiz_completed', point=points)
+    def _award(self, account, event_type, points, subject_id=None):
+        """
+        Inserts a ledger row and moves the account's running balance in the same transaction;
+        the leaderboards follow once it commits. Zero-value events are skipped unless
+        POINTS_RECORD_ZERO_EVENTS is set; returns the Point, or None when nothing was recorded.
+        """
+        if not points and not settings.POINTS_RECORD_ZERO_EVENTS:
+            return None
+        with transaction.atomic():
+            point_record = self.create(account=account, event_type=event_type, point=points, subject_id=subject_id)
+            PointBalance.objects.add(account.id, points)
+            transaction.on_commit(
+                lambda: leaderboard.record_award(account.id, points, subject_id, point_record.created_at)
+            )
         return point_record
+
+    def award_quiz_completed(self, account, subject_id=None):
+        points = 10  
+        return self._award(account, 'quiz_completed', points, subject_id)
     
-    def award_bite_completed(self, account):
+    def award_bite_completed(self, account, subject_id=None):
         points = 5  
-        point_record = self.create(account=account, event_type='bite_completed', point=points)
-        return point_record
+        return self._award(account, 'bite_completed', points, subject_id)
     
-    def award_daily_streak_completed(self, account):
+    def award_daily_streak_completed(self, account, subject_id=None):
         points = 15  
-        point_record = self.create(account=account, event_type='daily_streak_completed', point=points)
-        return point_record
+        return self._award(account, 'daily_streak_completed', points, subject_id)
     
-    def award_milestone_achieved(self, account):
+    def award_milestone_achieved(self, account, subject_id=None):
         points = 20  
-        point_record = self.create(account=account, event_type='milestone_achieved', point=points)
-        return point_record
+        return self._award(account, 'milestone_achieved', points, subject_id)
     
-    def award_question_answered_correctly(self, account):
+    def award_question_answered_correctly(self, account, subject_id=None):
         points = 2  
-        point_record = self.create(account=account, event_type='question_answered_correctly', point=points)
-        return point_record
+        return self._award(account, 'question_answered_correctly', points, subject_id)
     
-    def award_question_answered_incorrectly(self, account):
+    def award_question_answered_incorrectly(self, account, subject_id=None):
         points = 0  
-        point_record = self.create(account=account, event_type='question_answered_incorrectly', point=points)
-        return point_record
+        return self._award(account, 'question_answered_incorrectly', points, subject_id)
 
 
 class Point(models.Model):
@@ -124,8 +137,11 @@ class Point(models.Model):
         ('bite_completed', 'Lesson Completed'),
         ('daily_streak_completed', 'Streak Completed'),
         ('milestone_achieved', 'Milestone Achieved'),
+        ('question_answered_correctly', 'Question Answered Correctly'),
+        ('question_answered_incorrectly', 'Question Answered Incorrectly'),
     )
     account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='account_points')
+    subject = models.ForeignKey('subjects.Subject', on_delete=models.SET_NULL, null=True, blank=True, related_name='subject_points')
     event_type = models.CharField(max_length=50, choices=EVENT_TYPE)
     point = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -135,8 +151,61 @@ class Point(models.Model):
     class Meta:
         verbose_name = _('point')
         verbose_name_plural = _('points')
+        indexes = [models.Index(fields=['account', 'created_at'], name='point_account_created_idx')]
 
     def __str__(self):
         return f"{self.point}"
-    
-   
\ No newline at end of file
+
+
+class PointBalanceManager(models.Manager):
+    def add(self, account_id, points):
+        """Moves an account's balance by `points` with an F() update, creating the row on first award."""
+        if self.filter(account_id=account_id).update(total=models.F('total') + points):
+            return
+        try:
+            with transaction.atomic():
+                self.create(account_id=account_id, total=points)
+        except IntegrityError:
+            self.filter(account_id=account_id).update(total=models.F('total') + points)
+
+    def find_drift(self):
+        """Returns {account_id: ledger_total} for every account whose balance differs from its ledger."""
+        ledger = dict(Point.objects.values('account_id').annotate(total=models.Sum('point')).values_list('account_id', 'total'))
+        balances = dict(self.values_list('account_id', 'total'))
+        return {
+            account_id: ledger.get(account_id, 0)
+            for account_id in ledger.keys() | balances.keys()
+            if ledger.get(account_id, 0) != balances.get(account_id)
+        }
+
+    def reconcile(self):
+        """
+        Rewrites drifted balances from the ledger. Each account's balance row is locked before
+        its ledger is summed, so awards committing meanwhile are either counted or wait.
+        """
+        fixed = 0
+        for account_id in self.find_drift():
+            with transaction.atomic():
+                balance, _ = self.select_for_update().get_or_create(account_id=account_id)
+                total = Point.objects.filter(account_id=account_id).aggregate(total=models.Sum('point'))['total'] or 0
+                if balance.total != total:
+                    balance.total = total
+                    balance.save(update_fields=['total', 'date_updated'])
+                    fixed += 1
+        return fixed
+
+
+class PointBalance(models.Model):
+    account = models.OneToOneField(Account, on_delete=models.CASCADE, primary_key=True, related_name='point_balance')
+    total = models.IntegerField(default=0)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    objects = PointBalanceManager()
+
+    class Meta:
+        verbose_name = _('point balance')
+        verbose_name_plural = _('point balances')
+        indexes = [models.Index(fields=['-total', '-account'], name='point_balance_rank_idx')]
+
+    def __str__(self):
+        return f"{self.account} - {self.total}"
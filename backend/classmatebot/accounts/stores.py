@@ -0,0 +1,112 @@
+import copy
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from config.caching import SharedCache
+from classmatebot.accounts.models import Account, State
+
+
+class StateConflictError(Exception):
+    """Raised when a State was changed by someone else since it was loaded."""
+
+
+class StateStore:
+    """
+    Read-through, write-through store for per-user conversation State.
+
+    Reads go to the shared (Redis) cache and only then to the database, so a hot session is
+    served without touching Postgres. There is no per-process tier: every worker must see a
+    write as soon as it commits. Writes are a single versioned compare-and-set UPDATE; the cache
+    is refreshed once the surrounding transaction commits, and only with a newer version than it
+    holds, so a delayed refresh never replaces a later state. A version mismatch raises
+    StateConflictError and evicts the stale entry, so the caller can reload and retry.
+    """
+    key_prefix = "state"
+
+    def __init__(self, shared_cache=None, shared_ttl=None):
+        self.shared_cache = shared_cache or SharedCache()
+        self.shared_ttl = shared_ttl or settings.STATE_CACHE_SHARED_TTL
+
+    def _key(self, phone_number):
+        return f"{self.key_prefix}:{phone_number}"
+
+    def _entry(self, state):
+        return {
+            "id": state.id,
+            "account_id": state.account_id,
+            "phone_number": str(state.account.phone_number),
+            "state": state.state,
+            "context": state.context,
+            "version": state.version,
+        }
+
+    def _build(self, entry):
+        account = Account(id=entry["account_id"], phone_number=entry["phone_number"])
+        account._state.adding = False
+        state = State(id=entry["id"], account=account, state=entry["state"],
+                      context=copy.deepcopy(entry["context"]), version=entry["version"])
+        state._state.adding = False
+        return state
+
+    def _put(self, phone_number, entry):
+        self.shared_cache.set_if_newer(self._key(phone_number), entry, entry["version"], self.shared_ttl)
+
+    def invalidate(self, phone_number):
+        self.shared_cache.delete(self._key(phone_number))
+
+    def get(self, phone_number):
+        """Returns the State for a phone number, or None if there is no such account."""
+        phone_number = str(phone_number)
+        key = self._key(phone_number)
+
+        entry = self.shared_cache.get(key)
+        if entry is not None:
+            return self._build(entry)
+
+        state = State.objects.select_related("account").filter(account__phone_number=phone_number).first()
+        if state is None:
+            account = Account.objects.filter(phone_number=phone_number).first()
+            if account is None:
+                return None
+            state, _ = State.objects.get_or_create(account=account)
+        entry = self._entry(state)
+        self._put(phone_number, entry)
+        return self._build(entry)
+
+    def get_for_account(self, account):
+        return self.get(account.phone_number)
+
+    def save(self, state):
+        """Compare-and-set write of `state`; raises StateConflictError if its version is stale."""
+        phone_number = str(state.account.phone_number)
+        updated = State.objects.filter(pk=state.pk, version=state.version).update(
+            state=state.state,
+            context=state.context,
+            version=F("version") + 1,
+            last_updated=timezone.now(),
+        )
+        if not updated:
+            self.invalidate(phone_number)
+            raise StateConflictError(f"State for {phone_number} changed since version {state.version}.")
+
+        state.version += 1
+        entry = copy.deepcopy(self._entry(state))
+        transaction.on_commit(lambda: self._put(phone_number, entry))
+        return state
+
+    def overwrite(self, account, mode, context=None):
+        """Unconditionally sets an account's state, e.g. for updates coming from the ADK worker."""
+        state, _ = State.objects.get_or_create(account=account)
+        State.objects.filter(pk=state.pk).update(
+            state=mode, context=context or {}, version=F("version") + 1, last_updated=timezone.now()
+        )
+        state = State.objects.select_related("account").get(pk=state.pk)
+        phone_number = str(account.phone_number)
+        entry = copy.deepcopy(self._entry(state))
+        transaction.on_commit(lambda: self._put(phone_number, entry))
+
+
+state_store = StateStore()
@@ -0,0 +1,15 @@
+import logging
+
+from celery import shared_task
+
+from classmatebot.accounts.models import PointBalance
+
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def reconcile_point_balances_task():
+    fixed = PointBalance.objects.reconcile()
+    if fixed:
+        logger.info(f"Reconciled {fixed} point balances against the ledger")
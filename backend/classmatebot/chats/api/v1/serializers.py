@@ -1,5 +1,7 @@
 from rest_framework import serializers
 
+from classmatebot.subjects.models import BackgroundJob
+
 
 class WhatsAppMessageSerializer(serializers.Serializer):
     """
@@ -18,4 +20,10 @@ class NotifyUserSerializer(serializers.Serializer):
 class UpdateUserStateSerializer(serializers.Serializer):
     account_id = serializers.IntegerField()
     state = serializers.CharField()
-    context = serializers.JSONField(required=False, default=dict)   
\ No newline at end of file
+    context = serializers.JSONField(required=False, default=dict)   
+
+
+class UpdateGenerationJobSerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=BackgroundJob.Status.choices)
+    stage = serializers.CharField(max_length=100, required=False, allow_blank=True, default="")
+    error = serializers.CharField(required=False, allow_blank=True, default="")
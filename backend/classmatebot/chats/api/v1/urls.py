@@ -12,4 +12,6 @@ urlpatterns = [
 
     path('internals/notify-user/', views.NotifyUserAPIView.as_view(), name='internal-notify-user'),
     path('internals/update-user-state/', views.UpdateUserStateAPIView.as_view(), name='internal-update-state'),
+    path('internals/generation-jobs/<str:job_id>/', views.UpdateGenerationJobAPIView.as_view(), name='internal-update-generation-job'),
+    path('internals/inbound-partitions/', views.InboundPartitionsAPIView.as_view(), name='internal-inbound-partitions'),
 ]
\ No newline at end of file
@@ -3,18 +3,18 @@ from rest_framework import generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.request import Request
 from rest_framework.parsers import FormParser, MultiPartParser
-from django.db import transaction
-from django.utils import timezone
+from django.conf import settings
 
 from wrappers.whatsapp import send_whatsapp_message
 
 from config.permissions import IsADKWorker
-from classmatebot.accounts.models import Account, State
-from classmatebot.chats.api.v1.serializers import WhatsAppMessageSerializer, NotifyUserSerializer, UpdateUserStateSerializer
-from classmatebot.chats.commands.registry import COMMAND_REGISTRY
-from classmatebot.chats.handlers.quiz import QuizHandler
-from classmatebot.chats.handlers.lesson import LessonHandler
-from classmatebot.chats.handlers.generation import GenerationHandler
+from classmatebot.accounts.models import Account
+from classmatebot.accounts.stores import state_store
+from classmatebot.chats.api.v1.serializers import WhatsAppMessageSerializer, NotifyUserSerializer, UpdateUserStateSerializer, UpdateGenerationJobSerializer
+from classmatebot.chats.dispatcher import dispatch_message
+from config.jobs import public_job
+from classmatebot.chats.generation import update_job
+from classmatebot.chats.partitions import enqueue_inbound_message, get_partition_depths, get_partition_queue
 
 
 class WhatsAppWebhook(generics.GenericAPIView):
@@ -22,6 +22,12 @@ class WhatsAppWebhook(generics.GenericAPIView):
     parser_classes    = [FormParser, MultiPartParser]   
     permission_classes = [permissions.AllowAny]        
 
+    status_codes = {
+        "account created": status.HTTP_201_CREATED,
+        "unknown command": status.HTTP_400_BAD_REQUEST,
+        "error": status.HTTP_400_BAD_REQUEST,
+    }
+
     def post(self, request: Request):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -29,62 +35,13 @@ class WhatsAppWebhook(generics.GenericAPIView):
         user_phone = serializer.validated_data.get("From") 
         user_phone = user_phone.split(":")[1]
 
-        try:
-            account = Account.objects.get(phone_number=user_phone)
-        except Account.DoesNotExist:
-            # account = Account.objects.create(phone_number=user_phone, state=State.INITIAL)
-            # account.save()
-            send_whatsapp_message(user_phone, "Welcome to ClassmateBot! Type /help for available commands.")
-            return Response({"status": "account created"}, status=status.HTTP_201_CREATED)
-        
-        state = State.objects.get(account=account)
-        if state.state == State.Mode.IN_QUIZ:
-            quiz_handler = QuizHandler(state, body)
-            response_message = quiz_handler.handle()
-            if response_message:
-                send_whatsapp_message(user_phone, response_message)
-            return Response({"status": "quiz response handled"}, status=status.HTTP_200_OK)
-        elif state.state == State.Mode.IN_LESSON:
-            lesson_handler = LessonHandler(state, body)
-            response_message = lesson_handler.handle()
-            if response_message:
-                send_whatsapp_message(user_phone, response_message)    
-            return Response({"status": "lesson response handled"}, status=status.HTTP_200_OK)   
-
-        elif state.state == State.Mode.IN_GENERATION:
-            generation_handler = GenerationHandler(state, body)
-            response_message = generation_handler.handle()
-            if response_message:
-                send_whatsapp_message(user_phone, response_message)
-            return Response({"status": "generation response handled"}, status=status.HTTP_200_OK)         
-        
-        command = body.lower().split(" ")[0]
+        if settings.WHATSAPP_WEBHOOK_MODE == "async":
+            # Acknowledge Twilio straight away; the user's partition worker runs the command/handler and replies.
+            partition = enqueue_inbound_message(user_phone, body)
+            return Response({"status": "queued", "partition": partition}, status=status.HTTP_200_OK)
 
-        if command not in COMMAND_REGISTRY.keys():
-            send_whatsapp_message(user_phone, "Unknown command. Please type /help for available commands.")
-            return Response({"status": "unknown command"}, status=status.HTTP_400_BAD_REQUEST)
-        
-        command_config = COMMAND_REGISTRY[command]
-        command_class = command_config["class"]
-        additional_args = command_config.get("additional_args", [])
-        error_message = command_config["error_message"]
-        
-        if additional_args:
-            body_parts = body.split(" ")
-            if len(body_parts) > len(additional_args):
-                kwargs = {arg: body_parts[i + 1] for i, arg in enumerate(additional_args)}
-                command_instance = command_class(to_number=user_phone, **kwargs)
-            else:
-                send_whatsapp_message(user_phone, error_message)
-                return Response({"status": "error"}, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            command_instance = command_class(to_number=user_phone)
-
-        response_message = command_instance.execute()
-        if response_message:
-            send_whatsapp_message(user_phone, response_message)    
-        
-        return Response({"status": "help message sent"})
+        status_label = dispatch_message(user_phone, body)
+        return Response({"status": status_label}, status=self.status_codes.get(status_label, status.HTTP_200_OK))
 
 
 class NotifyUserAPIView(generics.GenericAPIView):
@@ -120,10 +77,44 @@ class UpdateUserStateAPIView(generics.GenericAPIView):
         
         try:
             account = Account.objects.get(id=data['account_id'])
-            state, _ = State.objects.get_or_create(account=account)
-            state.state = data['state']
-            state.context = data.get('context', {})
-            state.save()
+            state_store.overwrite(account, data['state'], data.get('context', {}))
             return Response({"status": "state_updated"}, status=status.HTTP_200_OK)
         except Account.DoesNotExist:
-            return Response({"error": "account_not_found"}, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+            return Response({"error": "account_not_found"}, status=status.HTTP_404_NOT_FOUND)
+
+
+class UpdateGenerationJobAPIView(generics.GenericAPIView):
+    """
+    Internal endpoint for the ADK worker to report a generation job's progress: each pipeline
+    stage as it starts, then done or failed. Updates the state machine does not allow are
+    rejected with a 409.
+    """
+    serializer_class = UpdateGenerationJobSerializer
+    permission_classes = [IsADKWorker]
+
+    def post(self, request, job_id, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        job, moved = update_job(job_id, data['status'], stage=data['stage'], error=data['error'])
+        if job is None:
+            return Response({"error": "job_not_found"}, status=status.HTTP_404_NOT_FOUND)
+        if not moved:
+            return Response({"error": "invalid_transition", "status": job["status"]}, status=status.HTTP_409_CONFLICT)
+        return Response(public_job(job), status=status.HTTP_200_OK)
+
+
+class InboundPartitionsAPIView(generics.GenericAPIView):
+    """
+    Reports how many inbound WhatsApp messages are waiting on each partition queue.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        depths = get_partition_depths()
+        partitions = [
+            {"partition": partition, "queue": get_partition_queue(partition), "depth": depth}
+            for partition, depth in depths.items()
+        ]
+        return Response({"total_depth": sum(depths.values()), "partitions": partitions}, status=status.HTTP_200_OK)
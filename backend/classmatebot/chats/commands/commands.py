@@ -1,11 +1,13 @@
 from abc import ABC, abstractmethod
-import threading
 
-from wrappers.whatsapp import send_whatsapp_message
-from classmatebot.chats.receivers.receivers import AccountReceiver, SubjectReceiver, EnrollmentReceiver, QuizReceiver
+from django.conf import settings
+from django.db import transaction
+
+from classmatebot.chats.receivers.receivers import AccountReceiver, SubjectReceiver, EnrollmentReceiver, QuizReceiver, LeaderboardReceiver, GenerationReceiver
 from classmatebot.accounts.models import State
-from classmatebot.subjects.models import Topic, Checkpoint, Bite, Milestone
-from classmatebot.chats.commands.helpers import trigger_adk_service
+from classmatebot.accounts.stores import state_store
+from classmatebot.chats.handlers.lesson import advance_lesson
+from classmatebot.subjects.content import content_cache, SUBJECT_INDEX_SCOPE
 
 
 class Command(ABC):
@@ -21,7 +23,7 @@ class HelpCommand(Command):
         self.to_number = to_number
 
     def execute(self):
-        send_whatsapp_message(self.to_number, """
+        return """
         👋 *Welcome to ClassmateBot!*
 
         Here are the available commands to help you get started:
@@ -30,18 +32,24 @@ class HelpCommand(Command):
 
         👤 */create-account*  _Create a new account to begin your learning journey._
 
-        📚 */get-subjects*  _View all available subjects you can learn._
+        📚 */get-subjects [page | search <term>]*  _Browse available subjects page by page, or search them by name._
 
         ✅ */get-enrolled-subjects*  _See the subjects you are currently enrolled in._
 
+        🔎 */search <words>*  _Find subjects, topics and lessons about anything._
+
         ➕ */enroll-subject <subject_id>*  _Enroll in a subject using its ID (find the ID in the subjects list)._
 
         📝 */practice-subject <subject_id>*  _Start a quiz practice for a subject using its ID._
 
         🎓 */start-lesson <subject_id>*  _Begin a lesson for a subject using its ID._
                               
+        🏆 */leaderboard [weekly | subject <subject_id>]*  _See the top learners overall, this week or in a subject._
+
         🆕 */generate-course <preferences>*  _Create a new subject based on your learning preferences. Prefenrences _
         should include topics of interest, difficulty level, and learning goals._
+
+        ⏳ */status*  _Check the progress of your latest course generation._
                               
         *What are preferences?*  
         _Preferences are keywords or phrases that describe what you want to learn. For example:_
@@ -56,7 +64,7 @@ class HelpCommand(Command):
 
         Have fun learning! 🚀          
 
-        """)
+        """
 
 
 class CreateAccountCommand(Command):
@@ -72,29 +80,84 @@ class CreateAccountCommand(Command):
         
 class GetSubjectsCommand(Command):
 
-    def __init__(self, to_number):
+    def __init__(self, to_number, page=None, search_term=None):
         self.to_number = to_number
+        self.page = page
+        self.search_term = search_term
+
+    def _format_subjects(self, title, subjects, page, total_pages, next_command):
+        subject_list = "\n".join(
+            [f"|  *{subject.name}*  |  `00{subject.id}`  |" for subject in subjects]
+        )
+        footer = f"➡️ Send {next_command} {page + 1} for more.\n" if page < total_pages else ""
+        return (
+            f"{title} (page {page}/{total_pages})\n\n"
+            "| Subject Name                | Subject ID |\n"
+            "|-----------------------------|------------|\n"
+            f"{subject_list}\n\n"
+            f"{footer}"
+            "🔎 Send /get-subjects search <term> to find a subject.\n"
+            "Use the Subject ID to enroll, start lessons, or practice quizzes!"
+        )
+
+    def _render_page(self, subject_page):
+        if not subject_page.subjects:
+            return "No subjects available at the moment."
+        return self._format_subjects("📚 *Available Subjects*", subject_page.subjects, subject_page.page,
+                                     subject_page.total_pages, "/get-subjects")
+
+    def _search(self, subject_receiver):
+        if not self.search_term:
+            return "Please add a search term, e.g. /get-subjects search algebra"
+        term, page = self.search_term.strip(), 1
+        parts = term.rsplit(" ", 1)
+        if len(parts) == 2 and parts[1].isdigit():
+            term, page = parts[0], int(parts[1])
+
+        subjects = subject_receiver.search_subjects(term)
+        if not subjects:
+            return f"No subjects found matching \"{term}\". Send /get-subjects to browse all subjects."
+        page_size = settings.SUBJECT_PAGE_SIZE
+        total_pages = -(-len(subjects) // page_size)
+        page = min(max(page, 1), total_pages)
+        return self._format_subjects(f"🔎 *Subjects matching \"{term}\"*", subjects[(page - 1) * page_size:page * page_size],
+                                     page, total_pages, f"/get-subjects search {term}")
 
     def execute(self):
         subject_receiver = SubjectReceiver(to_number=self.to_number)
-        subjects = subject_receiver.get_subjects()
-        if subjects:
-            subject_list = "\n".join(
-                [f"|  *{subject.name}*  |  `00{subject.id}`  |" for subject in subjects]
-            )
-            message = (
-                "📚 *Available Subjects*\n\n"
-                "| Subject Name                | Subject ID |\n"
-                "|-----------------------------|------------|\n"
-                f"{subject_list}\n\n"
-                "Use the Subject ID to enroll, start lessons, or practice quizzes!"
+        if self.page and self.page.lower() == "search":
+            return self._search(subject_receiver)
 
-                # [subject.name for subject in subjects]
-                
-                )
-            return message
-        else:
-            return "No subjects available at the moment."
+        page = int(self.page) if self.page and self.page.isdigit() else 1
+        # Rendered pages are cached with the catalogue version, so a page is only rebuilt after subjects change.
+        key = content_cache.key(f"subject-page-message:{page}", SUBJECT_INDEX_SCOPE)
+        return content_cache.get_or_load(key, lambda: self._render_page(subject_receiver.get_subject_page(page)))
+
+
+class SearchCommand(Command):
+    def __init__(self, to_number, query=None):
+        self.to_number = to_number
+        self.query = query
+
+    def execute(self):
+        if not self.query:
+            return "Please add what you are looking for, e.g. /search photosynthesis"
+        subject_receiver = SubjectReceiver(to_number=self.to_number)
+        results = subject_receiver.search_content(self.query)
+        if not results:
+            return f"No lessons found for \"{self.query}\". Try other words or send /get-subjects to browse."
+
+        icons = {"subject": "📚", "topic": "📝", "bite": "✨"}
+        lines = []
+        for result in results:
+            location = "" if result.kind == "subject" else f" in subject `00{result.subject_id}`"
+            snippet = result.snippet if len(result.snippet) <= 120 else f"{result.snippet[:117]}..."
+            lines.append(f"{icons.get(result.kind, '•')} *{result.title}*{location}\n    _{snippet}_")
+        return (
+            f"🔎 *Results for \"{self.query}\"*\n\n"
+            + "\n\n".join(lines)
+            + "\n\nUse the Subject ID with /enroll-subject or /start-lesson."
+        )
 
 
 class EnrollSubjectCommand(Command):
@@ -139,35 +202,36 @@ class PracticeQuizSubjectCommand(Command):
         self.subject_id = subject_id
 
     def execute(self):
-        account_receiver = AccountReceiver(to_number=self.to_number)
-        account = account_receiver.get_account()
-        if not account:
+        state = state_store.get(self.to_number)
+        if not state:
             return "Account not found. You need an account to practice. Please create an account first using /create-account."
         quiz_receiver = QuizReceiver(to_number=self.to_number)  
-        items = quiz_receiver.practice_subject(subject_id=self.subject_id)
-        if not items:
+        snapshot = quiz_receiver.practice_subject(subject_id=self.subject_id)
+        if not snapshot:
             return "No questions available for this subject."
-        state, _ = State.objects.get_or_create(account=account)
-        state.state = State.Mode.IN_QUIZ
-        state.context = {"subject_id": self.subject_id, "questions": items, "current_question_index": 0}    
-        state.save()
-        question = items[0] if items else None
 
-
-        total_questions = len(items)        
+        # The session only tracks ids and a cursor; question text and options come from the shared snapshot.
+        state.state = State.Mode.IN_QUIZ
+        state.context = {
+            "quiz_id": snapshot.quiz_id,
+            "subject_id": self.subject_id,
+            "question_ids": snapshot.question_ids,
+            "cursor": 0,
+            "score": 0,
+        }
+        state_store.save(state)
+
+        question = snapshot.questions[0]
+        total_questions = len(snapshot)
         current_question_index = 0
-        question_text = question["question"]
+
+        formatted_options = "\n".join([f"  {chr(65+i)}. {opt.option.lower()}" for i, opt in enumerate(question.options)])
         
-        if question:
-            formatted_options = "\n".join([f"  {chr(65+i)}. {opt['option'].lower()}" for i, opt in enumerate(question["options"])])
-            
-            header = f"🧠 *Question {current_question_index + 1}/{total_questions}*\n\n"
-            body = f"{question_text}\n\n*Options:*\n{formatted_options}\n\n"
-            footer = "Reply with the option letter (A, B, ...) to answer. To exit, send /exit-quiz." 
-
-            return f"{header}{body}{footer}"
-        else:   
-            return "No questions available for this subject."
+        header = f"🧠 *Question {current_question_index + 1}/{total_questions}*\n\n"
+        body = f"{question.question}\n\n*Options:*\n{formatted_options}\n\n"
+        footer = "Reply with the option letter (A, B, ...) to answer. To exit, send /exit-quiz." 
+
+        return f"{header}{body}{footer}"
 
 
 class StartLessonCommand(Command):
@@ -176,107 +240,99 @@ class StartLessonCommand(Command):
         self.subject_id = subject_id
 
     def execute(self):
-        account_receiver = AccountReceiver(to_number=self.to_number)
-        account = account_receiver.get_account()
-        if not account:
+        state = state_store.get(self.to_number)
+        if not state:
             return "Account not found. You need an account to start a lesson. Please create an account first using /create-account."
         enrollment_receiver = EnrollmentReceiver(to_number=self.to_number)
-        new_topics = enrollment_receiver.get_content_by_subject(subject_id=self.subject_id)
-        
-        
-        if not new_topics:
+        index = enrollment_receiver.get_curriculum_by_subject(subject_id=self.subject_id)
+
+        if not index:
             return "You are not enrolled in this subject or no content available."
-        
-        current_topic_id = None
-        current_bite_id = None
-
-        newest_topic_id = None
-        newest_bite_id = None
-        newest_bite_text = None
-        newest_bite_name = None
-
-        for topic_id in list(new_topics.keys()):
-            try:
-                Milestone.objects.get(topic_id=topic_id, account=account)
-            except Milestone.DoesNotExist:
-                newest_topic_id = topic_id
-                break
-
-        latest_bites = new_topics[newest_topic_id]        
-        for bite in latest_bites:
-            try:
-                Checkpoint.objects.get(bite_id=bite["bite_id"], account=account, status=Checkpoint.Status.COMPLETED)
-            except Checkpoint.DoesNotExist:
-                newest_bite_id = bite["bite_id"]
-                print(newest_bite_id)
-                newest_bite_name = bite["bite_name"] if "bite_name" in bite else "Unnamed Bite"
-                newest_bite_text = bite["bite_text"] if "bite_text" in bite else "No content available."
-                break
-
-        total_bites, completed_bites = enrollment_receiver.get_progress_by_topic(topic_id=newest_topic_id)
-        if newest_topic_id is None or newest_bite_id is None:
-            return "You've completed all topics and bites in this subject. Great job! 🎉"        
-        
-        progress_percent = int((completed_bites / total_bites) * 100) if total_bites else 0
-        progress_bar_length = 10
-        filled_length = int(progress_bar_length * completed_bites // total_bites) if total_bites else 0
-        progress_bar = "★" * filled_length + "☆" * (progress_bar_length - filled_length)
-
-
-        message_parts = [f"📚 *Welcome to your lesson for Subject ID {self.subject_id}!*"]
-        message_parts.append(f"\n📝 *Topic {newest_topic_id}*")
-        message_parts.append(
-            f"\n✨ *Bite {newest_bite_id} - {newest_bite_name} *\n\n"
-            f"🔹 {newest_bite_text}\n\n\n"
-            f"📊 *Progress*: [{progress_bar}] {completed_bites}/{total_bites} bites completed ({progress_percent}%)\n\n\n"
-            f"👉 _Reply '/next' to continue or '/exit-lesson' to stop._")
-     
-        state, _ = State.objects.get_or_create(account=account)
-        state.state = State.Mode.IN_LESSON
-        state.context = {"subject_id": self.subject_id, "topics": new_topics, "current_topic_index": newest_topic_id, "current_bite_index": newest_bite_id}    
-        state.save()
-        Checkpoint.objects.create(bite_id=newest_bite_id, account=account, status=Checkpoint.Status.COMPLETED)
-        if current_bite_id == latest_bites[-1]["bite_id"]:
-            Milestone.objects.create(topic_id=newest_topic_id, account=account)
-            message_parts.append(f"\n\n\n🎉 Milestone reached!* You've completed Topic {current_topic_id}! Moving to the next topic...\n")
-
-        if current_topic_id == list(new_topics.keys())[-1] and current_bite_id == latest_bites[-1]["bite_id"]:
-            message_parts.append("\n\n\n🏆 Congratulations! You've completed all topics and bites in this subject." )
-            state.state = State.Mode.IDLE
-            state.context = {}
-            state.save()
-
-        return "\n".join(message_parts)
+
+        return advance_lesson(state, self.subject_id, index)
+
+
+class LeaderboardCommand(Command):
+    def __init__(self, to_number, board="global", subject_id=None):
+        self.to_number = to_number
+        self.board = board.lower()
+        self.subject_id = subject_id
+
+    def execute(self):
+        if self.board not in ("global", "weekly", "subject"):
+            return "Unknown leaderboard. Use /leaderboard, /leaderboard weekly or /leaderboard subject <subject_id>."
+        if self.board == "subject" and not (self.subject_id and self.subject_id.isdigit()):
+            return "Subject ID is required for a subject leaderboard. Use /leaderboard subject <subject_id>."
+
+        leaderboard_receiver = LeaderboardReceiver(to_number=self.to_number)
+        entries, my_rank, my_points = leaderboard_receiver.get_board(board=self.board, subject_id=self.subject_id)
+        titles = {"global": "All-time", "weekly": "This week's", "subject": f"Subject {self.subject_id}"}
+        if not entries:
+            return f"🏆 *{titles[self.board]} Leaderboard*\n\nNo points on this board yet. Complete a quiz to get started!"
+
+        medals = {1: "🥇", 2: "🥈", 3: "🥉"}
+        board_list = "\n".join(
+            [f"{medals.get(rank, f'{rank}.')} *{name}*  {points} pts" for rank, name, points in entries]
+        )
+        my_line = (
+            f"📍 You are *#{my_rank}* with *{my_points}* points."
+            if my_rank else "📍 You are not on this board yet."
+        )
+        return f"🏆 *{titles[self.board]} Leaderboard*\n\n{board_list}\n\n{my_line}"
 
 
 class GenerateCourseCommand(Command):
-    def __init__(self, to_number, preferences):
+    def __init__(self, to_number, preferences=None):
         self.to_number = to_number
         self.preferences = preferences
 
     def execute(self):
+        if not self.preferences:
+            return "Preferences are required to generate a course, e.g. /generate-course beginner Python for data analysis"
         account_receiver = AccountReceiver(to_number=self.to_number)
         account = account_receiver.get_account()
         if not account:
             return "Account not found. You need an account to start a lesson. Please create an account first using /create-account."
-        
-        threading.Thread(
-            target=trigger_adk_service,
-            args=(self.preferences, self.to_number, account.id)
-        ).start()
+
+        subject_receiver = SubjectReceiver(to_number=self.to_number)
+        match = subject_receiver.find_similar_course(self.preferences)
+        if match:
+            subject, _ = match
+            enrollment_receiver = EnrollmentReceiver(to_number=self.to_number)
+            newly_enrolled = enrollment_receiver.enroll_existing_course(subject)
+            status = "You have been enrolled in it" if newly_enrolled else "You are already enrolled in it"
+            return (
+                f"🎯 Good news — a course matching your request already exists:\n\n"
+                f"*{subject.name}* (`00{subject.id}`)\n_{subject.description}_\n\n"
+                f"{status}, so there is no need to wait. Send /start-lesson {subject.id} to begin!"
+            )
 
         # subject_receiver = SubjectReceiver(to_number=self.to_number)
         # preferences = subject_receiver.create_subject_by_user(preferences=self.preferences)
 
+        # The job is only queued on commit, after the learner is in generation mode.
+        with transaction.atomic():
+            generation_receiver = GenerationReceiver(to_number=self.to_number)
+            job = generation_receiver.start_generation(account, self.preferences)
 
-        state, _ = State.objects.get_or_create(account=account)
-        state.state = State.Mode.IN_GENERATION
-        state.context = {"preferences": preferences}    
-        state.save()
+            state = state_store.get_for_account(account)
+            state.state = State.Mode.IN_GENERATION
+            state.context = {"preferences": self.preferences, "job_id": job["id"]}
+            state_store.save(state)
         acknowledgement_message = (
             f"✅ Got it — building your custom course from your preferences:\n\n"
-            f"\"_{preferences}_\"\n\n"
-            "This usually takes about *2–3 minutes*. I’ll notify you as soon as it’s ready."
+            f"\"_{self.preferences}_\"\n\n"
+            "This usually takes about *2–3 minutes*. I’ll notify you as soon as it’s ready.\n\n"
+            "👉 _Reply /status to check progress._"
         )    
 
         return acknowledgement_message
+
+
+class StatusCommand(Command):
+    def __init__(self, to_number):
+        self.to_number = to_number
+
+    def execute(self):
+        generation_receiver = GenerationReceiver(to_number=self.to_number)
+        return generation_receiver.get_status()
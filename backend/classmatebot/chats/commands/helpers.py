@@ -1,26 +1,27 @@
 import httpx 
 from decouple import config
+from django.conf import settings
 
 
 ADK_SERVICE_URL = config("ADK_SERVICE_URL")
 
 
-def trigger_adk_service(preferences, phone_number, account_id):
+def trigger_adk_service(preferences, phone_number, account_id, job_id):
     """
-    Sends a non-blocking POST request to the ADK service.
-    This replaces the Celery task call.
+    Starts the ADK content pipeline for a generation job. The pipeline reports its progress to
+    the job, so the call does not wait for it: returns True once the service acknowledges the
+    request, and False on a read timeout, when it is unknown whether the pipeline started.
+    Connection errors and error responses raise httpx.HTTPError for the caller to retry.
     """
+    payload = {
+        "preferences": preferences,
+        "phone_number": phone_number,
+        "account_id": account_id,
+        "job_id": job_id,
+    }
     try:
-        payload = {
-            "preferences": preferences,
-            "phone_number": phone_number,
-            "account_id": account_id
-        }
-        # We set a short timeout because we don't want to wait
-        # for the full response. This is "fire and forget".
-        httpx.post(ADK_SERVICE_URL, json=payload, timeout=5.0)
-    except httpx.RequestError as e:
-        print(f"Failed to trigger ADK service: {e}")
-        
-    except httpx.TimeoutException:
-        print("ADK service trigger timed out (which is OK for fire-and-forget)")
\ No newline at end of file
+        response = httpx.post(ADK_SERVICE_URL, json=payload, timeout=settings.ADK_DISPATCH_TIMEOUT)
+    except httpx.ReadTimeout:
+        return False
+    response.raise_for_status()
+    return True
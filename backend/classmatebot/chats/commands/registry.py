@@ -1,4 +1,4 @@
-from classmatebot.chats.commands.commands import HelpCommand, CreateAccountCommand, EnrolledSubjectsCommand, EnrollSubjectCommand, GetSubjectsCommand, PracticeQuizSubjectCommand, StartLessonCommand, GenerateCourseCommand
+from classmatebot.chats.commands.commands import HelpCommand, CreateAccountCommand, EnrolledSubjectsCommand, EnrollSubjectCommand, GetSubjectsCommand, PracticeQuizSubjectCommand, StartLessonCommand, GenerateCourseCommand, LeaderboardCommand, SearchCommand, StatusCommand
 
 
 COMMAND_REGISTRY = {
@@ -16,10 +16,18 @@ COMMAND_REGISTRY = {
     },
     "/get-subjects": {
         "class": GetSubjectsCommand,
-        "description": "Retrieves a list of all subjects.",
+        "description": "Retrieves a page of subjects, or searches subjects by name.",
         "additional_args": [],
+        "optional_args": ["page", "search_term"],
         "error_message": "Failed to retrieve subjects. Please try again.",
     },
+    "/search": {
+        "class": SearchCommand,
+        "description": "Searches subjects, topics and bites.",
+        "additional_args": [],
+        "optional_args": ["query"],
+        "error_message": "Failed to search. Please try again.",
+    },
     "/get-enrolled-subjects": {
         "class": EnrolledSubjectsCommand,
         "description": "Retrieves a list of subjects the user is enrolled in.",
@@ -47,9 +55,23 @@ COMMAND_REGISTRY = {
     "/generate-course": {
         "class": GenerateCourseCommand,  
         "description": "Generates a course based on user preferences.",
-        "additional_args": ["preferences"],
+        "additional_args": [],
+        "optional_args": ["preferences"],
         "error_message": "Preferences are required to generate a course.",
-    }
+    },
+    "/status": {
+        "class": StatusCommand,
+        "description": "Shows the progress of your latest course generation.",
+        "additional_args": [],
+        "error_message": "Failed to check the generation status. Please try again.",
+    },
+    "/leaderboard": {
+        "class": LeaderboardCommand,
+        "description": "Shows the top learners overall, this week or in a subject.",
+        "additional_args": [],
+        "optional_args": ["board", "subject_id"],
+        "error_message": "Failed to load the leaderboard. Please try again.",
+    },
 #     # Add more commands as needed       
    
 }
\ No newline at end of file
@@ -0,0 +1,85 @@
+from django.db import transaction
+
+from wrappers.whatsapp import send_whatsapp_message
+
+from classmatebot.accounts.models import State
+from classmatebot.accounts.stores import state_store, StateConflictError
+from classmatebot.chats.commands.registry import COMMAND_REGISTRY
+from classmatebot.chats.handlers.quiz import QuizHandler
+from classmatebot.chats.handlers.lesson import LessonHandler
+from classmatebot.chats.handlers.generation import GenerationHandler
+
+
+STATE_HANDLERS = {
+    State.Mode.IN_QUIZ: (QuizHandler, "quiz response handled"),
+    State.Mode.IN_LESSON: (LessonHandler, "lesson response handled"),
+    State.Mode.IN_GENERATION: (GenerationHandler, "generation response handled"),
+}
+
+
+def dispatch_message(user_phone, body, retries=2):
+    """
+    Routes an inbound WhatsApp message to the active session handler or to a command
+    from COMMAND_REGISTRY, sends the reply and returns a short status label.
+    """
+    state = state_store.get(user_phone)
+    if state is None:
+        send_whatsapp_message(user_phone, "Welcome to ClassmateBot! Type /help for available commands.")
+        return "account created"
+
+    if state.state in STATE_HANDLERS:
+        handler_class, status_label = STATE_HANDLERS[state.state]
+        try:
+            with transaction.atomic():
+                response_message = handler_class(state, body).handle()
+        except StateConflictError:
+            # Another message for this user moved the session on; route this one again against the fresh state.
+            if not retries:
+                raise
+            return dispatch_message(user_phone, body, retries=retries - 1)
+        if response_message:
+            send_whatsapp_message(user_phone, response_message)
+        return status_label
+
+    command = body.lower().split(" ")[0]
+
+    if command not in COMMAND_REGISTRY.keys():
+        send_whatsapp_message(user_phone, "Unknown command. Please type /help for available commands.")
+        return "unknown command"
+
+    command_config = COMMAND_REGISTRY[command]
+    command_class = command_config["class"]
+    additional_args = command_config.get("additional_args", [])
+    optional_args = command_config.get("optional_args", [])
+    error_message = command_config["error_message"]
+
+    if additional_args:
+        body_parts = body.split(" ")
+        if len(body_parts) > len(additional_args):
+            kwargs = {arg: body_parts[i + 1] for i, arg in enumerate(additional_args)}
+            command_instance = command_class(to_number=user_phone, **kwargs)
+        else:
+            send_whatsapp_message(user_phone, error_message)
+            return "error"
+    elif optional_args:
+        # The last optional argument takes the rest of the message, e.g. a multi-word search term.
+        body_parts = body.split(maxsplit=len(optional_args))[1:]
+        kwargs = dict(zip(optional_args, body_parts))
+        command_instance = command_class(to_number=user_phone, **kwargs)
+    else:
+        command_instance = command_class(to_number=user_phone)
+
+    # Commands run outside a transaction so slow calls (embeddings, the LLM) hold no locks; each one
+    # wraps its own state and database writes, and the reply is only sent once they have committed.
+    try:
+        response_message = command_instance.execute()
+    except StateConflictError:
+        # The session changed while the command ran; its writes were rolled back, so route the
+        # message again against the fresh state.
+        if not retries:
+            raise
+        return dispatch_message(user_phone, body, retries=retries - 1)
+    if response_message:
+        send_whatsapp_message(user_phone, response_message)
+
+    return "help message sent"
@@ -0,0 +1,104 @@
+import re
+
+from django.conf import settings
+from django.db import transaction
+
+from wrappers.whatsapp import send_whatsapp_message
+
+from config.caching import SharedCache
+from config.jobs import job_store
+from classmatebot.accounts.models import Account, State
+from classmatebot.accounts.stores import state_store
+from classmatebot.subjects.models import BackgroundJob
+
+
+# BackgroundJob kind of a /generate-course run; its object_id is the learner's account.
+COURSE_JOB = "course"
+PROGRESS_PREFIX = "generation-progress"
+progress_cache = SharedCache()
+
+
+def progress_key(account_id):
+    return f"{PROGRESS_PREFIX}:{account_id}"
+
+
+def cache_progress(job):
+    progress_cache.set(progress_key(job["object_id"]), job, settings.GENERATION_JOB_TIMEOUT * 4)
+    return job
+
+
+def get_progress(account):
+    """The account's latest course job record, from the cache when possible; None if it never generated a course."""
+    progress = progress_cache.get(progress_key(account.id))
+    if progress is None:
+        job = job_store.latest(COURSE_JOB, account.id)
+        progress = cache_progress(job) if job else None
+    return progress
+
+
+def start_generation(account, preferences):
+    """Records a queued course job and hands it to the course-generation queue once the transaction commits."""
+    # Imported here because the tasks module imports this one.
+    from classmatebot.chats.tasks import run_generation_job_task
+
+    job = job_store.create(COURSE_JOB, account.id, params={"preferences": preferences})
+    transaction.on_commit(lambda: cache_progress(job))
+    transaction.on_commit(lambda: run_generation_job_task.apply_async(args=(job["id"],), queue=settings.GENERATION_QUEUE))
+    return job
+
+
+def update_job(job_id, status, stage="", error="", subject_id=None):
+    """
+    Moves a course job to `status` through JobStore.transition. Returns (job, moved), with job
+    None when it does not exist. A failed job returns its learner to idle with a message.
+    """
+    result = {"subject_id": subject_id} if subject_id else None
+    job, moved = job_store.transition(job_id, status, stage=stage, error=error, result=result)
+    if moved:
+        transaction.on_commit(lambda: cache_progress(job))
+        if status == BackgroundJob.Status.FAILED:
+            transaction.on_commit(lambda: notify_failure(job))
+    return job, moved
+
+
+def notify_failure(job):
+    account = Account.objects.filter(id=job["object_id"]).first()
+    if account is None:
+        return
+    if State.objects.filter(account=account, state=State.Mode.IN_GENERATION).exists():
+        state_store.overwrite(account, State.Mode.IDLE)
+    send_whatsapp_message(
+        account.phone_number,
+        "😔 Sorry, we couldn't build your course this time.\n\n"
+        f"Send /generate-course {job['params'].get('preferences', '<preferences>')} to try again.",
+    )
+
+
+def fail_stale_jobs():
+    """Fails unfinished course jobs with no update for GENERATION_JOB_TIMEOUT seconds; returns how many."""
+    failed = 0
+    for job_id in job_store.stale(COURSE_JOB, settings.GENERATION_JOB_TIMEOUT):
+        _, moved = update_job(job_id, BackgroundJob.Status.FAILED, error="No progress from the content pipeline; timed out.")
+        failed += moved
+    return failed
+
+
+def stage_label(stage):
+    """'ContentDrafterAgent' -> 'Content drafter'."""
+    words = re.sub(r"(?<!^)(?=[A-Z])", " ", stage.removesuffix("Agent")).split()
+    return " ".join(words).capitalize()
+
+
+def describe_progress(progress):
+    if progress is None:
+        return "You have no course being generated. Send /generate-course <preferences> to start one."
+
+    status = progress["status"]
+    if status == BackgroundJob.Status.QUEUED:
+        return "🕒 Your course request is queued and will start shortly."
+    if status == BackgroundJob.Status.RUNNING:
+        stage = f"*{stage_label(progress['stage'])}* (step {progress['stages_started']})" if progress["stage"] else "starting up"
+        return f"⚙️ Your course is being generated — currently {stage}."
+    if status == BackgroundJob.Status.DONE:
+        return f"✅ Your last course is ready! Send /start-lesson {progress['result']['subject_id']} to begin."
+    return "❌ Your last course could not be generated. Send /generate-course <preferences> to try again."
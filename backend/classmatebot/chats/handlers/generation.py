@@ -1,4 +1,6 @@
 from classmatebot.accounts.models import State
+from classmatebot.accounts.stores import state_store
+from classmatebot.chats.generation import get_progress, describe_progress
 
 
 class GenerationHandler:
@@ -13,14 +15,15 @@ class GenerationHandler:
         if self.user_answer == "/exit-generation":
             self.state.state = State.Mode.IDLE
             self.state.context = {}
-            self.state.save()
+            state_store.save(self.state)
             return "You have exited the generation process."
-        
-        preferences = self.context["preferences"]
+
+        if self.user_answer == "/status":
+            return describe_progress(get_progress(self.state.account))
 
         response = (
                 "⏳ Your course is still being generated. This usually takes ~2–3 minutes.\n\n"
-                "👉 _Reply '/status' to check progress or /cancel-generation to stop._"
+                "👉 _Reply /status to check progress or /exit-generation to stop waiting._"
                 
             )
         return response
\ No newline at end of file
@@ -1,5 +1,9 @@
+from django.db import transaction, IntegrityError
+
 from classmatebot.accounts.models import State, Point
-from classmatebot.quizzes.models import Answer, Option, Question
+from classmatebot.accounts.stores import state_store
+from classmatebot.quizzes.models import Answer, Option
+from classmatebot.quizzes.snapshots import get_quiz_snapshot, invalidate_quiz_snapshot
 
 
 class QuizHandler:
@@ -7,75 +11,86 @@ class QuizHandler:
         self.state = state
         self.user_answer = user_answer
         self.user_phone = state.account.phone_number
-        self.current_question_index = state.context.get("current_question_index", 0)
+        self.current_question_index = state.context.get("cursor", 0)
 
-        self.questions = state.context.get("questions", [])
+        self.question_ids = state.context.get("question_ids", [])
 
-    def _format_question(self, question_data, index, total_questions):
-        question_text = question_data["question"]
-        options = question_data["options"]
-        formatted_options = "\n".join([f"  {chr(65+i)}. {opt['option'].lower()}" for i, opt in enumerate(options)])
+    def _format_question(self, question, index, total_questions):
+        formatted_options = "\n".join([f"  {chr(65+i)}. {opt.option.lower()}" for i, opt in enumerate(question.options)])
 
         header = f"🧠 *Question {index}/{total_questions}*\n\n"
-        body = f"{question_text}\n\n*Options:*\n{formatted_options}\n\n"
-        footer = "Invalid option😡 Reply with the option letter (A, B, ...) to answer. To exit, send /exit-quiz." 
+        body = f"{question.question}\n\n*Options:*\n{formatted_options}\n\n"
+        footer = "Invalid option😡 Reply with the option letter (A, B, ...) to answer. To exit, send /exit-quiz."
 
         return f"{header}{body}{footer}"
-        
+
+    def _end_session(self):
+        self.state.state = State.Mode.IDLE
+        self.state.context = {}
+        state_store.save(self.state)
+
+    def _record_answer(self, question_id, option_id):
+        """
+        Saves the answer; False if its question or option was deleted after the snapshot was
+        cached. The option row is locked first because foreign keys are only checked at commit.
+        """
+        try:
+            with transaction.atomic():
+                if not Option.objects.select_for_update().filter(id=option_id, question_id=question_id).exists():
+                    return False
+                Answer.objects.create(account=self.state.account, question_id=question_id, selected_option_id=option_id)
+        except IntegrityError:
+            return False
+        return True
+
     def handle(self):
-        if self.user_answer == "/exit-quiz":    
-            self.state.state = State.Mode.IDLE
-            self.state.context = {}
-            self.state.save()
+        if self.user_answer == "/exit-quiz":
+            self._end_session()
             return "You have exited the quiz. ✅\nSend /practice-subject <subject_id> to try again."
 
-        
+
         if self.user_answer.startswith("/"):
             return "You are in a quiz session. Reply with the option letter (e.g. A, B) for the current question, or send /exit-quiz to quit."
 
         context = self.state.context
-        current_question_index = context["current_question_index"]
-        questions = context["questions"]
-        subject_id = context["subject_id"]
-
-        current_question = questions[current_question_index]
-        question = current_question["question"]
-        question_id = current_question["question_id"]
-
-        question_instance = Question.objects.get(id=question_id)
+        snapshot = get_quiz_snapshot(context["quiz_id"]) if "quiz_id" in context else None
+        current_question = snapshot.get_question(self.question_ids[self.current_question_index]) if snapshot else None
+        if current_question is None:
+            # The session predates compact quiz contexts or its quiz has changed underneath it.
+            self._end_session()
+            return "This quiz is no longer available. Send /practice-subject <subject_id> to start again."
 
-        options = current_question["options"] 
-        total_questions = len(questions)
+        options = current_question.options
+        total_questions = len(self.question_ids)
 
         user_choice = self.user_answer.strip().upper()
         valid_letters = [chr(65+i) for i in range(len(options))]  # ['A', 'B', 'C', ...]
-        
+
         if user_choice not in valid_letters:
-            formatted_question = self._format_question(current_question, current_question_index + 1, total_questions)
+            formatted_question = self._format_question(current_question, self.current_question_index + 1, total_questions)
             return formatted_question
 
-        selected_option_index = valid_letters.index(user_choice)
-        selected_option_data = options[selected_option_index]
-        option_instance = Option.objects.get(id=selected_option_data["option_id"])
-        answer = Answer.objects.create(account=self.state.account,
-                      question=question_instance, 
-                      selected_option=option_instance)
-        answer.save()
+        selected_option = options[valid_letters.index(user_choice)]
+        if not self._record_answer(current_question.question_id, selected_option.option_id):
+            invalidate_quiz_snapshot(snapshot.quiz_id)
+            self._end_session()
+            return f"This quiz has changed since you started it. Send /practice-subject {snapshot.subject_id} to start again."
 
-        if option_instance.is_correct:
+        if selected_option.is_correct:
             feedback = "✅ Correct! Great job."
-            point_record = Point.objects.award_question_answered_correctly(account=self.state.account)
+            context["score"] = context.get("score", 0) + 1
+            point_record = Point.objects.award_question_answered_correctly(account=self.state.account, subject_id=snapshot.subject_id)
         else:
-            correct_opt = next((opt for opt in options if opt.get("is_correct")), None)
+            correct_opt = next((opt for opt in options if opt.is_correct), None)
             if correct_opt:
                 correct_letter = chr(65 + options.index(correct_opt))
                 feedback = (
                     f"❌ Not quite.\n"
-                    f"Correct answer: {correct_letter}. {correct_opt['option']}"
+                    f"Correct answer: {correct_letter}. {correct_opt.option}"
                 )
             else:
                 feedback = "❌ Not correct."
-            point_record = Point.objects.award_question_answered_incorrectly(account=self.state.account)
+            point_record = Point.objects.award_question_answered_incorrectly(account=self.state.account, subject_id=snapshot.subject_id)
 
         point_line = ""
         if point_record:
@@ -88,40 +103,34 @@ class QuizHandler:
         ###############################################
         self.current_question_index += 1
         if self.current_question_index < total_questions:
-            context["current_question_index"] = self.current_question_index
+            context["cursor"] = self.current_question_index
             self.state.context = context
-            self.state.save()
-            next_question = questions[self.current_question_index]
-            next_question_text = next_question["question"]
-            next_options = "\n".join([f"  {chr(65+i)}. {opt['option'].lower()}" for i, opt in enumerate(next_question["options"])])
-            
+            state_store.save(self.state)
+            next_question = snapshot.get_question(self.question_ids[self.current_question_index])
+            next_options = "\n".join([f"  {chr(65+i)}. {opt.option.lower()}" for i, opt in enumerate(next_question.options)])
+
             progress_percent = int((self.current_question_index / total_questions) * 100) if total_questions else 0
             progress_bar_length = 10
             filled_length = int(progress_bar_length * self.current_question_index // total_questions) if total_questions else 0
             progress_bar = "★" * filled_length + "☆" * (progress_bar_length - filled_length)
             progress = f"🧾 *Progress*: [{progress_bar}] {self.current_question_index}/{total_questions} answered ({progress_percent}%)\n\n"
-            
+
             next_header = f"➡️ *Next Question ({self.current_question_index+1}/{total_questions})*\n\n"
-            next_body = f"{next_question_text}\n\n*Options:*\n{next_options}\n\n"
+            next_body = f"{next_question.question}\n\n*Options:*\n{next_options}\n\n"
             next_footer = "Reply with the option letter (A, B, ...). To exit, /exit-quiz."
-            
+
             return f"{feedback}\n\n{point_line}{progress}{next_header}{next_body}{next_footer}"
         else:
-            question_ids = [q["question_id"] for q in questions]
-            total = Question.objects.filter(id__in=question_ids).count()
-            correct_answers_count = Answer.objects.filter(account=self.state.account, 
-                                question__id__in=question_ids,
-                                selected_option__is_correct=True).count()
+            correct_answers_count = context.get("score", 0)
+            total = total_questions
             score_percentage = (correct_answers_count / total) * 100 if total > 0 else 0
-                    
-            completion_point = Point.objects.award_quiz_completed(account=self.state.account)
+
+            completion_point = Point.objects.award_quiz_completed(account=self.state.account, subject_id=snapshot.subject_id)
             completion_line = ""
             if completion_point:
                 completion_line = f"\n\n🏆 You earned *{completion_point.point}* points for completing the quiz! Total: *{self.state.account.total_points}* points."
 
-            self.state.state = State.Mode.IDLE
-            self.state.context = {}
-            self.state.save()
+            self._end_session()
 
             return (
                 f"{feedback}\n\n"
@@ -129,4 +138,4 @@ class QuizHandler:
                 f"Score: *{correct_answers_count}/{total}* ({score_percentage}%)\n\n"
                 f"Thanks for practicing! Send /practice-subject <subject_id> to try again or /get-subjects to explore other topics. 🎯"
                 f"{completion_line}"
-            )
\ No newline at end of file
+            )
@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand
+
+from config.benchmarks import summarize_latencies, format_summary
+from wrappers.fake_twilio import FakeTwilio
+from wrappers.outbound import AsyncWhatsAppSender, InMemoryDeadLetterStore
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the async outbound WhatsApp sender against a local fake Twilio endpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=1000)
+        parser.add_argument("--connections", type=int, default=20)
+        parser.add_argument("--rate", type=float, default=200.0, help="Token bucket rate (sends per second).")
+        parser.add_argument("--latency", type=float, default=80.0, help="Fake Twilio latency in ms.")
+        parser.add_argument("--throttle-rate", type=float, default=0.01)
+        parser.add_argument("--error-rate", type=float, default=0.01)
+        parser.add_argument("--max-retries", type=int, default=4)
+
+    def handle(self, *args, **options):
+        fake = FakeTwilio(
+            latency=options["latency"] / 1000,
+            jitter=options["latency"] / 4000,
+            throttle_rate=options["throttle_rate"],
+            error_rate=options["error_rate"],
+            seed=42,
+        )
+        dead_letters = InMemoryDeadLetterStore()
+        samples = []
+
+        async def run():
+            async with AsyncWhatsAppSender(
+                account_sid="ACbenchmark", auth_token="token", from_number="+10000000000",
+                max_connections=options["connections"], rate_per_second=options["rate"],
+                max_retries=options["max_retries"], backoff_base=0.05,
+                dead_letter_store=dead_letters, transport=fake.transport(), base_url="https://fake.twilio.local",
+            ) as sender:
+                async def timed_send(i):
+                    started = time.perf_counter()
+                    await sender.send(f"+234800000{i:04d}", f"benchmark message {i}")
+                    samples.append(time.perf_counter() - started)
+
+                await asyncio.gather(*(timed_send(i) for i in range(options["messages"])))
+
+        started = time.perf_counter()
+        asyncio.run(run())
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(format_summary("outbound", summarize_latencies(samples, elapsed)))
+        self.stdout.write(
+            f"requests={fake.requests} delivered={fake.delivered} throttled={fake.throttled} "
+            f"failed={fake.failed} dead_lettered={len(dead_letters)}"
+        )
@@ -0,0 +1,53 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+
+from config.benchmarks import summarize_latencies, format_summary, timed
+from classmatebot.chats.api.v1.views import WhatsAppWebhook
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares WhatsAppWebhook throughput in inline mode against the async "
+        "acknowledge-then-process mode. Twilio sends are replaced by a sleep of "
+        "--send-latency ms; async mode needs the Celery broker to be reachable."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=200)
+        parser.add_argument("--workers", type=int, default=4, help="Concurrent request threads (gunicorn workers).")
+        parser.add_argument("--send-latency", type=float, default=150.0, help="Simulated Twilio round trip in ms.")
+        parser.add_argument("--body", default="/help")
+        parser.add_argument("--from-number", default="+2348000000000")
+        parser.add_argument("--modes", nargs="+", default=["inline", "async"], choices=["inline", "async"])
+
+    def handle(self, *args, **options):
+        send_latency = options["send_latency"] / 1000
+
+        def fake_send(to_number, body_text):
+            time.sleep(send_latency)
+
+        factory = APIRequestFactory()
+        view = WhatsAppWebhook.as_view()
+        payload = {"Body": options["body"], "From": f"whatsapp:{options['from_number']}"}
+
+        for mode in options["modes"]:
+            samples = []
+
+            def post_once(_):
+                request = factory.post("/api/v1/chats/", payload, format="multipart")
+                with timed(samples):
+                    view(request)
+
+            with override_settings(WHATSAPP_WEBHOOK_MODE=mode), \
+                    mock.patch("classmatebot.chats.dispatcher.send_whatsapp_message", fake_send):
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+                    list(executor.map(post_once, range(options["messages"])))
+                elapsed = time.perf_counter() - started
+
+            self.stdout.write(format_summary(f"{mode:>6}", summarize_latencies(samples, elapsed)))
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:25
+
+import uuid
+
+from django.db import migrations
+
+
+def copy_generation_jobs(apps, schema_editor):
+    """Copies each GenerationJob into subjects.BackgroundJob as a "course" job for its learner."""
+    GenerationJob = apps.get_model('chats', 'GenerationJob')
+    BackgroundJob = apps.get_model('subjects', 'BackgroundJob')
+    for job in GenerationJob.objects.iterator():
+        copied = BackgroundJob.objects.create(
+            id=uuid.uuid4(), kind='course', object_id=job.account_id, params={'preferences': job.preferences},
+            status=job.status, stage=job.stage, stages_started=job.stages_started, attempts=job.attempts,
+            result={'subject_id': job.subject_id} if job.subject_id else None, error=job.error,
+        )
+        # date_created and date_updated are set on save, so the originals are written afterwards.
+        BackgroundJob.objects.filter(id=copied.id).update(
+            date_created=job.date_created, date_updated=job.date_updated, date_finished=job.date_finished)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0001_initial'),
+        ('subjects', '0007_background_job_stages'),
+    ]
+
+    operations = [
+        migrations.RunPython(copy_generation_jobs, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='GenerationJob',
+        ),
+    ]
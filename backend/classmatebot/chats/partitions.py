@@ -0,0 +1,48 @@
+import zlib
+
+from django.conf import settings
+
+from config.celery import app
+from classmatebot.chats.tasks import process_whatsapp_message_task
+
+
+def get_partition(user_phone):
+    """
+    Maps a phone number onto one of WHATSAPP_INBOUND_PARTITIONS partitions.
+    crc32 is used instead of hash() because it is stable across processes.
+    """
+    return zlib.crc32(str(user_phone).encode("utf-8")) % settings.WHATSAPP_INBOUND_PARTITIONS
+
+
+def get_partition_queue(partition):
+    return f"{settings.WHATSAPP_INBOUND_QUEUE_PREFIX}-{partition}"
+
+
+def get_partition_queues():
+    return [get_partition_queue(partition) for partition in range(settings.WHATSAPP_INBOUND_PARTITIONS)]
+
+
+def enqueue_inbound_message(user_phone, body):
+    """
+    Queues an inbound message on its user's partition. Each partition queue is consumed
+    by a single solo worker, so messages from one number are processed strictly in order
+    while different numbers are spread over the other partitions.
+    """
+    partition = get_partition(user_phone)
+    process_whatsapp_message_task.apply_async(args=(user_phone, body), queue=get_partition_queue(partition))
+    return partition
+
+
+def get_partition_depths():
+    """Returns the number of messages waiting on each partition queue."""
+    depths = {}
+    with app.connection_for_read() as connection:
+        for partition, queue in enumerate(get_partition_queues()):
+            # The broker closes a channel whose passive declare fails, so each queue gets its own.
+            with connection.channel() as channel:
+                try:
+                    depths[partition] = channel.queue_declare(queue=queue, passive=True).message_count
+                except Exception:
+                    # A queue that has never been declared has nothing waiting on it.
+                    depths[partition] = 0
+    return depths
@@ -1,9 +1,15 @@
 from django.db import transaction, IntegrityError
 
 from classmatebot.accounts.models import Account
-from classmatebot.subjects.models import Checkpoint, Subject, Enrollment, Topic
+from classmatebot.accounts.leaderboard import leaderboard, resolve_board, display_names
+from classmatebot.subjects.models import Subject, Enrollment
+from classmatebot.subjects.content import get_subject_page, search_subjects
+from classmatebot.subjects.curriculum import get_curriculum_index
+from classmatebot.subjects.search import search
+from classmatebot.subjects.similarity import find_similar_subject
 from classmatebot.quizzes.models import Quiz
 from classmatebot.chats.tasks import generate_preference_content_task
+from classmatebot.chats.generation import start_generation, get_progress, describe_progress
 
 
 class AccountReceiver:
@@ -33,10 +39,23 @@ class SubjectReceiver:
     def __init__(self, to_number):
         self.to_number = to_number
 
-    def get_subjects(self):
-        subjects = Subject.objects.all()
-        return subjects
+    def get_subject_page(self, page):
+        return get_subject_page(page)
+
+    def search_subjects(self, term):
+        return search_subjects(term)
+
+    def search_content(self, query, limit=8):
+        return search(query, limit=limit)
     
+    def find_similar_course(self, preferences):
+        """Returns (subject, similarity) of an existing course matching the preferences, or None."""
+        match = find_similar_subject(preferences)
+        if match is None:
+            return None
+        subject_id, similarity = match
+        return Subject.objects.get(id=subject_id), similarity
+
     def create_subject_by_user(self, preferences):
         generate_preference_content_task.delay(preferences, self.to_number)
         return preferences
@@ -52,30 +71,24 @@ class EnrollmentReceiver:
         enrollment = Enrollment.objects.create(account=account, subject=subject)    
         return enrollment
     
+    def enroll_existing_course(self, subject):
+        """Enrolls the account in `subject`; returns False if it was already enrolled."""
+        account = Account.objects.get(phone_number=self.to_number)
+        _, created = Enrollment.objects.get_or_create(account=account, subject=subject)
+        return created
+
     def enrolled_subjects(self):
         account = Account.objects.get(phone_number=self.to_number)
         enrollments = Enrollment.objects.get_enrolled_subjects(account=account)
         return enrollments
     
-    def get_content_by_subject(self, subject_id):
+    def get_curriculum_by_subject(self, subject_id):
+        """Returns the subject's cached CurriculumIndex, or None if the user is not enrolled or it has no bites."""
         account = Account.objects.get(phone_number=self.to_number)
-        enrollment = Enrollment.objects.filter(account=account, subject=subject_id).first()
-        if not enrollment:
+        if not Enrollment.objects.filter(account=account, subject=subject_id).exists():
             return None
-        subject = enrollment.subject
-        topics = subject.subject_topics.all()
-        new_topics = {}
-        for topic in topics:
-            bites = topic.topic_bites.all()
-            new_topics[topic.id] = [{"bite_id": bite.id, "bite_name": bite.name, "bite_text": bite.bite} for bite in bites]
-        return new_topics
-    
-    def get_progress_by_topic(self, topic_id):
-        account = Account.objects.get(phone_number=self.to_number)
-        topic = Topic.objects.get(id=topic_id)
-        total_bites = topic.get_total_number_of_bites_by_topic()
-        completed_bites = Checkpoint.objects.get_completed_bites_by_topic(account=account, topic=topic)
-        return total_bites, completed_bites
+        index = get_curriculum_index(subject_id)
+        return index if len(index) else None
     
     
 class QuizReceiver:
@@ -83,6 +96,34 @@ class QuizReceiver:
         self.to_number = to_number
 
     def practice_subject(self, subject_id):
-        items = Quiz.objects.get_questions_by_subject(subject_id=subject_id)
-        return items
-       
\ No newline at end of file
+        snapshot = Quiz.objects.get_snapshot_by_subject(subject_id=subject_id)
+        return snapshot
+
+
+class LeaderboardReceiver:
+    def __init__(self, to_number):
+        self.to_number = to_number
+
+    def get_board(self, board="global", subject_id=None, limit=10):
+        """Returns (entries, my_rank, my_points) where entries are (rank, name, points)."""
+        board_key = resolve_board(board, subject_id)
+        top = leaderboard.top(board_key, limit=limit)
+        names = display_names([account_id for _, account_id, _ in top])
+        entries = [(rank, names.get(account_id, f"Learner {account_id}"), points) for rank, account_id, points in top]
+
+        account_id = Account.objects.filter(phone_number=self.to_number).values_list('id', flat=True).first()
+        my_rank, my_points = leaderboard.rank(board_key, account_id) if account_id else (None, None)
+        return entries, my_rank, my_points
+
+
+class GenerationReceiver:
+    def __init__(self, to_number):
+        self.to_number = to_number
+
+    def start_generation(self, account, preferences):
+        return start_generation(account, preferences)
+
+    def get_status(self):
+        """The learner's latest course generation, described for WhatsApp."""
+        account = Account.objects.filter(phone_number=self.to_number).first()
+        return describe_progress(get_progress(account) if account else None)
@@ -1,11 +1,18 @@
 from time import sleep
+
+import httpx
 from celery import shared_task
 
 from wrappers.whatsapp import send_whatsapp_message
 from classmatebot.subjects.prompts import generate_preference_content
 from classmatebot.subjects.models import Subject, Topic
 from classmatebot.accounts.models import Account, State
+from classmatebot.accounts.stores import state_store
 from classmatebot.quizzes.models import Quiz
+from classmatebot.chats.commands.helpers import trigger_adk_service
+from classmatebot.subjects.models import BackgroundJob
+from config.jobs import job_store
+from classmatebot.chats.generation import update_job, fail_stale_jobs
 
 
 @shared_task
@@ -37,8 +44,51 @@ def generate_preference_content_task(preferences, to_number):
         f"*Topic Description*: {topic_description}\n\n\n"
         "You have been enrolled in this course. Start learning now!"
     )
-    state, _ = State.objects.get_or_create(account=account)
-    state.state = State.Mode.IDLE
-    state.context = {}
-    state.save()    
+    state_store.overwrite(account, State.Mode.IDLE)
+
+
+
+@shared_task(acks_late=True, reject_on_worker_lost=True, ignore_result=True)
+def process_whatsapp_message_task(user_phone, body):
+    # Imported here because the command registry imports the receivers, which import this module.
+    from classmatebot.chats.dispatcher import dispatch_message
+
+    dispatch_message(user_phone, body)
+
+
+@shared_task(bind=True, acks_late=True, ignore_result=True, max_retries=3)
+def run_generation_job_task(self, job_id):
+    """
+    Starts the ADK pipeline for a queued generation job. Runs on GENERATION_QUEUE, whose worker
+    concurrency bounds how many pipelines are started at once; the job survives worker restarts
+    in the broker and in the database.
+
+    Each delivery claims the job for its retry number first, so a message redelivered after a
+    worker loss finds the attempt taken (or the job already running) and does not start a second
+    pipeline; a job whose only attempt died before triggering is failed by the stale-job sweep.
+
+    The job is only marked running once the ADK service acknowledges the request. When the
+    acknowledgement times out the pipeline may or may not have started, so the job stays queued:
+    its first stage report moves it on, and the stale-job sweep fails it if none arrives.
+    """
+    job = job_store.claim(job_id, self.request.retries)
+    if job is None:
+        return
+    account = Account.objects.filter(id=job["object_id"]).first()
+    if account is None:
+        update_job(job_id, BackgroundJob.Status.FAILED, error="The learner's account no longer exists.")
+        return
+    try:
+        acknowledged = trigger_adk_service(job["params"]["preferences"], str(account.phone_number), account.id, job_id)
+    except httpx.HTTPError as e:
+        if self.request.retries >= self.max_retries:
+            update_job(job_id, BackgroundJob.Status.FAILED, error=f"Could not start the content pipeline: {e}")
+            return
+        raise self.retry(exc=e, countdown=2 ** self.request.retries * 15)
+    if acknowledged:
+        update_job(job_id, BackgroundJob.Status.RUNNING)
+
 
+@shared_task(ignore_result=True)
+def fail_stale_generation_jobs_task():
+    fail_stale_jobs()
@@ -1,21 +1,35 @@
 from rest_framework import serializers
 
 from classmatebot.quizzes.models import Quiz, Question, Option
-from classmatebot.subjects.api.v1.serializers import SubjectSerializer, TopicSerializer
+from classmatebot.quizzes.tasks import generate_quiz_questions_task
+from classmatebot.subjects.api.v1.serializers import SubjectSerializer, TopicSerializer, CallbackURLField, enqueue_job
 from classmatebot.subjects.models import Subject, Topic
 
 
 class QuizSerializer(serializers.ModelSerializer):
     subject = serializers.PrimaryKeyRelatedField(queryset=Subject.objects.all())
     topic = serializers.PrimaryKeyRelatedField(queryset=Topic.objects.all())
+    questions = serializers.DictField(
+        child=serializers.ListField(child=serializers.CharField(), min_length=2),
+        required=False, write_only=True,
+        help_text="Pre-written {question: [options]} with the correct option in UPPERCASE; generated in the background when omitted.",
+    )
+    callback_url = CallbackURLField()
     
     class Meta:
         model = Quiz
-        fields = ('id', 'subject', 'topic', 'number_of_questions', 'number_of_options')
+        fields = ('id', 'subject', 'topic', 'number_of_questions', 'number_of_options', 'questions', 'callback_url')
 
     def create(self, validated_data):
+        questions = validated_data.pop('questions', None)
+        callback_url = validated_data.pop('callback_url', None)
+        self.job = None
+        if questions:
+            quiz = Quiz(**validated_data)
+            Quiz.objects.bulk_ingest([(quiz, Quiz.objects.parse_generated_questions(questions))])
+            return quiz
         quiz = Quiz.objects.create(**validated_data)
-        quiz.generate_questions()
+        self.job = enqueue_job(generate_quiz_questions_task, "quiz_questions", quiz.id, callback_url)
         return quiz
 
 
@@ -2,9 +2,10 @@ from rest_framework import generics, permissions, status
 
 from classmatebot.quizzes.models import Quiz
 from classmatebot.quizzes.api.v1.serializers import QuizSerializer, QuizReadSerializer
+from classmatebot.subjects.api.v1.views import JobCreateMixin
 
 
-class QuizListCreateView(generics.ListCreateAPIView):
+class QuizListCreateView(JobCreateMixin, generics.ListCreateAPIView):
     queryset = Quiz.objects.all()
     serializer_class = QuizSerializer
     permission_classes = (permissions.IsAuthenticated,)
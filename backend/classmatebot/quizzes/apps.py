@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class QuizzesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'classmatebot.quizzes'
+
+    def ready(self):
+        from classmatebot.quizzes import signals  # noqa: F401
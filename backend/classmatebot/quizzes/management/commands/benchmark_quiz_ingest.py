@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from classmatebot.subjects.models import Subject, Topic
+from classmatebot.quizzes.models import Quiz, Question, Option
+
+
+def synthetic_questions(number_of_questions, number_of_options):
+    return [
+        (f"Question {q}?", [(f"option {o}", o == 0) for o in range(number_of_options)])
+        for q in range(number_of_questions)
+    ]
+
+
+def per_row_ingest(quiz_questions):
+    """The previous path: one create() per question and per option, outside a transaction."""
+    for quiz, questions in quiz_questions:
+        if quiz.pk is None:
+            quiz.save()
+        for question, options in questions:
+            question_obj = Question.objects.create(quiz=quiz, question=question)
+            for option, is_correct in options:
+                Option.objects.create(question=question_obj, option=option, is_correct=is_correct, explanation="", reason="")
+
+
+def bulk_ingest(quiz_questions):
+    Quiz.objects.bulk_ingest(quiz_questions)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares per-row quiz persistence with Quiz.objects.bulk_ingest on the configured database "
+        "(run it once against Postgres and once with a SQLite settings module). Everything is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--quizzes", type=int, default=20)
+        parser.add_argument("--questions", type=int, default=5)
+        parser.add_argument("--options", type=int, default=4)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{connection.vendor}: {options['quizzes']} quizzes x {options['questions']} questions x {options['options']} options"
+        )
+        with transaction.atomic():
+            subject = Subject.objects.create(name="Benchmark subject", description="Synthetic quiz benchmark")
+            topic = Topic.objects.create(subject=subject, name="Benchmark topic", description="", content="")
+
+            for label, ingest in (("per-row", per_row_ingest), ("bulk", bulk_ingest)):
+                quiz_questions = [
+                    (Quiz(subject=subject, topic=topic, number_of_questions=options["questions"], number_of_options=options["options"]),
+                     synthetic_questions(options["questions"], options["options"]))
+                    for _ in range(options["quizzes"])
+                ]
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    ingest(quiz_questions)
+                    elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{label:>8}: {elapsed * 1000:.1f} ms, {len(queries)} queries, "
+                    f"{elapsed * 1000 / options['quizzes']:.2f} ms/quiz"
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from classmatebot.subjects.models import Subject, Topic
+from classmatebot.quizzes.models import Quiz
+from classmatebot.quizzes.snapshots import get_quiz_snapshot, invalidate_quiz_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Query-count regression check for the quiz read path: loads a synthetic quiz and fails if "
+        "reading it costs more queries than budgeted, so an N+1 over questions cannot creep back. "
+        "Runs against the configured database, which must already be migrated (run `migrate` first), "
+        "inside a transaction that is rolled back; suitable for CI."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--questions", type=int, default=25)
+        parser.add_argument("--options", type=int, default=4)
+
+    def handle(self, *args, **options):
+        aggregated = connection.vendor == 'postgresql'
+        budgets = {
+            "Quiz.get_questions": 1 if aggregated else 2,
+            "QuizManager.get_questions_by_subject": 2 if aggregated else 3,
+            "get_quiz_snapshot (cold)": 2 if aggregated else 3,
+            "get_quiz_snapshot (warm)": 0,
+        }
+
+        failures = []
+        with transaction.atomic():
+            subject = Subject.objects.create(name="Query check subject", description="")
+            topic = Topic.objects.create(subject=subject, name="Query check topic", description="", content="")
+            quiz = Quiz.objects.create(subject=subject, topic=topic, number_of_questions=options["questions"],
+                                       number_of_options=options["options"])
+            Quiz.objects.bulk_ingest([(quiz, [
+                (f"Question {q}?", [(f"option {o}", o == 0) for o in range(options["options"])])
+                for q in range(options["questions"])
+            ])])
+            invalidate_quiz_snapshot(quiz.id)
+
+            checks = {
+                "Quiz.get_questions": lambda: quiz.get_questions(),
+                "QuizManager.get_questions_by_subject": lambda: Quiz.objects.get_questions_by_subject(subject.id),
+                "get_quiz_snapshot (cold)": lambda: get_quiz_snapshot(quiz.id),
+                "get_quiz_snapshot (warm)": lambda: get_quiz_snapshot(quiz.id),
+            }
+            for label, check in checks.items():
+                with CaptureQueriesContext(connection) as queries:
+                    result = check()
+                questions = len(result) if result is not None else 0
+                self.stdout.write(f"{label}: {len(queries)} queries (budget {budgets[label]}), {questions} questions")
+                if len(queries) > budgets[label] or questions != options["questions"]:
+                    failures.append(label)
+
+            transaction.set_rollback(True)
+        invalidate_quiz_snapshot(quiz.id)
+
+        if failures:
+            raise CommandError(f"Quiz read path over its query budget: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("Quiz read path within its query budget."))
@@ -0,0 +1,50 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from classmatebot.subjects.models import Topic
+from classmatebot.quizzes.models import Quiz
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates quizzes for many topics concurrently and stores them in bulk. Topics that already have "
+        "questions are skipped, so rerunning after a failure resumes where the previous run stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subject", type=int, action="append", dest="subjects", help="Subject id (repeatable).")
+        parser.add_argument("--all", action="store_true", help="Every topic of every subject.")
+        parser.add_argument("--questions", type=int, default=5)
+        parser.add_argument("--options", type=int, default=4)
+        parser.add_argument("--concurrency", type=int, default=settings.QUIZ_GENERATION_CONCURRENCY)
+        parser.add_argument("--chunk-size", type=int, default=20, help="Topics stored per bulk insert.")
+
+    def handle(self, *args, **options):
+        if not options["subjects"] and not options["all"]:
+            raise CommandError("Pass --subject <id> (repeatable) or --all.")
+        topics = Topic.objects.order_by('id').only('id', 'subject_id', 'content')
+        if options["subjects"]:
+            topics = topics.filter(subject_id__in=options["subjects"])
+
+        started = time.perf_counter()
+        report = Quiz.objects.generate_for_topics(
+            topics,
+            number_of_questions=options["questions"],
+            number_of_options=options["options"],
+            max_concurrency=options["concurrency"],
+            chunk_size=options["chunk_size"],
+        )
+        elapsed = time.perf_counter() - started
+
+        attempted = report.generated + len(report.failed)
+        self.stdout.write(
+            f"Generated {report.generated} quizzes, skipped {report.skipped} topics that already had one, "
+            f"{len(report.failed)} failed in {elapsed:.1f}s "
+            f"({attempted / elapsed if elapsed else 0:.2f} topics/s at concurrency {options['concurrency']})"
+        )
+        for topic_id, error in report.failed:
+            self.stderr.write(f"Topic {topic_id}: {error}")
+        if report.failed:
+            raise CommandError(f"{len(report.failed)} topics failed; rerun the command to retry them.")
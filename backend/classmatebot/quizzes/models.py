@@ -1,21 +1,136 @@
-from django.db import models
+import asyncio
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import models, transaction, connection
 
 from classmatebot.subjects.models import Subject, Topic
-from classmatebot.quizzes.prompts import generate_quizzes
+from classmatebot.quizzes.prompts import generate_quizzes, agenerate_quizzes_batch, compile_quizzes_chain
+from classmatebot.quizzes.snapshots import QuizSnapshot, get_quiz_snapshot, invalidate_quiz_snapshot
 from classmatebot.accounts.models import Account
 
 # Create your models here.
 
+QuizGenerationReport = namedtuple("QuizGenerationReport", ["generated", "skipped", "failed"])
+
 
 class QuizManager(models.Manager):
     def get_questions_by_subject(self, subject_id):
-        """Fetches all quizzes related to a specific subject."""
-        quiz = self.filter(subject_id=subject_id)[0] if self.filter(subject_id=subject_id).exists() else None
+        """Fetches the questions and options of the subject's quiz."""
+        quiz = self.filter(subject_id=subject_id).first()
         if not quiz:
             return None
         questions = quiz.get_questions()
         return questions
-        
+
+    def get_snapshot_by_subject(self, subject_id):
+        """Returns the cached QuizSnapshot of the subject's quiz, or None if it has no quiz."""
+        quiz_id = self.filter(subject_id=subject_id).values_list('id', flat=True).first()
+        if quiz_id is None:
+            return None
+        return get_quiz_snapshot(quiz_id)
+
+    @staticmethod
+    def parse_generated_questions(questions):
+        """
+        Turns the generator's {question: [options]} mapping, where the correct option is in
+        UPPERCASE, into [(question, [(option, is_correct), ...]), ...].
+        """
+        return [(question, [(option, option.isupper()) for option in options]) for question, options in questions.items()]
+
+    def bulk_ingest(self, quiz_questions):
+        """
+        Persists many quizzes' questions and options in one transaction with one bulk INSERT per
+        table (plus one for any unsaved quizzes), instead of a create() per row.
+
+        `quiz_questions` is an iterable of (quiz, [(question, [(option, is_correct), ...]), ...]).
+        Returns {quiz_id: [{"question_id": id, "option_ids": [ids]}, ...]} in input order.
+        """
+        quiz_questions = list(quiz_questions)
+        with transaction.atomic():
+            new_quizzes = [quiz for quiz, _ in quiz_questions if quiz.pk is None]
+            if new_quizzes:
+                self.bulk_create(new_quizzes)
+
+            question_objs, option_rows = [], []
+            for quiz, questions in quiz_questions:
+                for question, options in questions:
+                    question_objs.append(Question(quiz=quiz, question=question))
+                    option_rows.append(options)
+            Question.objects.bulk_create(question_objs, batch_size=1000)
+
+            option_objs = [
+                Option(question=question_obj, option=option, is_correct=is_correct, explanation="", reason="")
+                for question_obj, options in zip(question_objs, option_rows)
+                for option, is_correct in options
+            ]
+            Option.objects.bulk_create(option_objs, batch_size=1000)
+
+            quiz_ids = {quiz.pk for quiz, _ in quiz_questions}
+            transaction.on_commit(lambda: [invalidate_quiz_snapshot(quiz_id) for quiz_id in quiz_ids])
+
+        result = {quiz.pk: [] for quiz, _ in quiz_questions}
+        options_iter = iter(option_objs)
+        for question_obj, options in zip(question_objs, option_rows):
+            result[question_obj.quiz_id].append({
+                "question_id": question_obj.pk,
+                "option_ids": [next(options_iter).pk for _ in options],
+            })
+        return result
+
+    def generate_for_topics(self, topics, number_of_questions=5, number_of_options=4, max_concurrency=None, chunk_size=20):
+        """
+        Generates a quiz for every topic that has no questions yet, with up to `max_concurrency`
+        LLM requests in flight. Each chunk of `chunk_size` topics is stored with one bulk_ingest,
+        so after a failure a rerun only generates the topics that are still missing.
+
+        Returns a QuizGenerationReport(generated, skipped, failed=[(topic_id, error), ...]).
+        """
+        max_concurrency = max_concurrency or settings.QUIZ_GENERATION_CONCURRENCY
+        topics = list(topics)
+        completed, empty_quizzes = set(), {}
+        for quiz in self.filter(topic_id__in=[topic.id for topic in topics]).annotate(
+                question_count=models.Count('quiz_questions')):
+            if quiz.question_count:
+                completed.add(quiz.topic_id)
+            else:
+                empty_quizzes.setdefault(quiz.topic_id, quiz)
+
+        pending = [topic for topic in topics if topic.id not in completed]
+        generated, failed = asyncio.run(self._agenerate_chunks(
+            pending, empty_quizzes, number_of_questions, number_of_options, max_concurrency, chunk_size))
+        return QuizGenerationReport(generated, len(topics) - len(pending), failed)
+
+    async def _agenerate_chunks(self, topics, empty_quizzes, number_of_questions, number_of_options, max_concurrency, chunk_size):
+        """
+        Runs every chunk in one event loop with one chain, since an LLM client cannot be reused
+        across `asyncio.run` calls. Returns (generated, failed).
+        """
+        if not topics:
+            return 0, []
+        chain = compile_quizzes_chain()
+        generated, failed = 0, []
+        for start in range(0, len(topics), chunk_size):
+            chunk = topics[start:start + chunk_size]
+            responses = await agenerate_quizzes_batch(
+                [(number_of_questions, number_of_options, topic.content) for topic in chunk], max_concurrency, chain=chain)
+
+            quiz_questions = []
+            for topic, response in zip(chunk, responses):
+                if isinstance(response, BaseException):
+                    failed.append((topic.id, f"{type(response).__name__}: {response}"))
+                    continue
+                quiz = empty_quizzes.get(topic.id) or Quiz(
+                    subject_id=topic.subject_id, topic=topic,
+                    number_of_questions=number_of_questions, number_of_options=number_of_options,
+                )
+                quiz_questions.append((quiz, self.parse_generated_questions(response.questions)))
+            if quiz_questions:
+                await sync_to_async(self.bulk_ingest)(quiz_questions)
+                generated += len(quiz_questions)
+        return generated, failed
+
 
 class Quiz(models.Model):
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='subject_quizzes')
@@ -34,32 +149,48 @@ class Quiz(models.Model):
 
     def generate_questions(self):
         response = generate_quizzes(self.number_of_questions, self.number_of_options, self.topic.content)
-        questions = response.questions
-        for question, options in questions.items():
-            question_obj = Question.objects.create(quiz=self, question=question)
-            for option in options:
-                if option.isupper():
-                    is_correct = True
-                else:
-                    is_correct = False
-                Option.objects.create(question=question_obj, option=option, is_correct=is_correct, explanation="", reason="")
-
+        questions = Quiz.objects.parse_generated_questions(response.questions)
+        Quiz.objects.bulk_ingest([(self, questions)])
         return len(questions)
     
     def get_questions(self):
-        """Fetches all questions related to this quiz and their options."""
-        list_of_dictionaries = []
-
-        questions = self.quiz_questions.all()
-        for question in questions:
-            options = question.question_options.all()
-            question_dict = {
-                "question": question.question,
-                "question_id": question.id,
-                "options": [{"option": option.option, "is_correct": option.is_correct, "option_id": option.id} for option in options]
-            }
-            list_of_dictionaries.append(question_dict)
-        return list_of_dictionaries    
+        """
+        Fetches all questions related to this quiz and their options: one JSON-aggregating
+        query on Postgres, otherwise one query for questions and one for all their options.
+        """
+        if connection.vendor == 'postgresql':
+            return self._get_questions_aggregated()
+
+        options_by_question = {}
+        for option in Option.objects.filter(question__quiz=self).order_by('id').values('question_id', 'option', 'is_correct', 'id'):
+            options_by_question.setdefault(option['question_id'], []).append(
+                {"option": option['option'], "is_correct": option['is_correct'], "option_id": option['id']}
+            )
+        return [
+            {"question": question, "question_id": question_id, "options": options_by_question.get(question_id, [])}
+            for question_id, question in self.quiz_questions.order_by('id').values_list('id', 'question')
+        ]
+
+    def _get_questions_aggregated(self):
+        from django.contrib.postgres.aggregates import JSONBAgg
+        from django.db.models.functions import JSONObject
+
+        rows = self.quiz_questions.order_by('id').annotate(
+            options=JSONBAgg(
+                JSONObject(option='question_options__option', is_correct='question_options__is_correct',
+                           option_id='question_options__id'),
+                filter=models.Q(question_options__isnull=False),
+                order_by='question_options__id',
+            )
+        ).values_list('id', 'question', 'options')
+        return [
+            {"question": question, "question_id": question_id, "options": options or []}
+            for question_id, question, options in rows
+        ]
+
+    def get_snapshot(self):
+        """Builds an uncached QuizSnapshot of this quiz."""
+        return QuizSnapshot.from_items(self.id, self.subject_id, self.get_questions())
 
 
 
@@ -1,13 +1,11 @@
 from langchain_core.prompts import PromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.output_parsers import PydanticOutputParser
-from decouple import config
-from langchain_google_genai import ChatGoogleGenerativeAI
 
+from wrappers.llm_chains import chains
 from classmatebot.quizzes.schemas import QuizSchema
 
 
-def generate_quizzes(number_of_questions, number_of_options, text):
+def build_quizzes_chain():
     generated_questions_output_parser = PydanticOutputParser(pydantic_object=QuizSchema)
     generated_questions_format_instructions = generated_questions_output_parser.get_format_instructions()
     generate_questions_template = """
@@ -26,12 +24,35 @@ def generate_quizzes(number_of_questions, number_of_options, text):
         input_variables=["number_of_questions", "number_of_options", 'text'],
         partial_variables={"format_instructions": generated_questions_format_instructions})
 
-    llm = ChatGoogleGenerativeAI(google_api_key=config("GEMINI_API_KEY"), temperature=0.0, model='gemini-2.5-pro')
+    return generate_questions_prompt, generated_questions_output_parser
 
-    generated_questions = generate_questions_prompt | llm | generated_questions_output_parser
 
-    response = generated_questions.invoke({"number_of_questions": number_of_questions,
-                                         "number_of_options": number_of_options,
-                                         'text': text})
+def generate_quizzes(number_of_questions, number_of_options, text):
+    response = chains.get("generate_quizzes").invoke({"number_of_questions": number_of_questions,
+                                                      "number_of_options": number_of_options,
+                                                      'text': text})
     
-    return response
\ No newline at end of file
+    return response
+
+
+def compile_quizzes_chain():
+    """A quiz chain with its own LLM client, for one event loop (see ChainRegistry.compile_for_loop)."""
+    return chains.compile_for_loop("generate_quizzes")
+
+
+async def agenerate_quizzes_batch(requests, max_concurrency=4, chain=None):
+    """
+    Generates quizzes for many (number_of_questions, number_of_options, text) requests concurrently.
+    Returns the responses in order, with an exception in place of each request that failed.
+    `chain` must belong to the running event loop; by default a new one is compiled.
+    """
+    chain = chain or compile_quizzes_chain()
+    return await chain.abatch(
+        [{"number_of_questions": number_of_questions, "number_of_options": number_of_options, 'text': text}
+         for number_of_questions, number_of_options, text in requests],
+        max_concurrency=max_concurrency,
+        return_exceptions=True,
+    )
+
+
+chains.register("generate_quizzes", build_quizzes_chain)
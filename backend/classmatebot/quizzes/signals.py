@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from classmatebot.quizzes.models import Question, Option
+from classmatebot.quizzes.snapshots import invalidate_quiz_snapshot
+
+
+@receiver([post_save, post_delete], sender=Question)
+def invalidate_snapshot_on_question_change(sender, instance, **kwargs):
+    invalidate_quiz_snapshot(instance.quiz_id)
+
+
+@receiver([post_save, post_delete], sender=Option)
+def invalidate_snapshot_on_option_change(sender, instance, **kwargs):
+    invalidate_quiz_snapshot(instance.question.quiz_id)
@@ -0,0 +1,96 @@
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import transaction
+
+from config.caching import LRUCache, SharedCache
+from classmatebot.subjects.content import content_cache
+
+
+SnapshotOption = namedtuple("SnapshotOption", ["option_id", "option", "is_correct"])
+SnapshotQuestion = namedtuple("SnapshotQuestion", ["question_id", "question", "options"])
+
+
+class QuizSnapshot:
+    """
+    Immutable, cacheable view of a quiz: its questions in order, each with its options.
+    Quiz sessions keep only question ids and a cursor and resolve everything else here.
+    """
+    __slots__ = ("quiz_id", "subject_id", "questions", "_positions")
+
+    def __init__(self, quiz_id, subject_id, questions):
+        self.quiz_id = quiz_id
+        self.subject_id = subject_id
+        self.questions = tuple(questions)
+        self._positions = {question.question_id: i for i, question in enumerate(self.questions)}
+
+    @classmethod
+    def from_items(cls, quiz_id, subject_id, items):
+        """Builds a snapshot from the dictionaries returned by Quiz.get_questions()."""
+        questions = [
+            SnapshotQuestion(
+                question_id=item["question_id"],
+                question=item["question"],
+                options=tuple(SnapshotOption(o["option_id"], o["option"], o["is_correct"]) for o in item["options"]),
+            )
+            for item in items
+        ]
+        return cls(quiz_id, subject_id, questions)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def __getstate__(self):
+        return (self.quiz_id, self.subject_id, self.questions)
+
+    def __setstate__(self, data):
+        self.__init__(*data)
+
+    @property
+    def question_ids(self):
+        return [question.question_id for question in self.questions]
+
+    def get_question(self, question_id):
+        position = self._positions.get(question_id)
+        return self.questions[position] if position is not None else None
+
+
+_local_snapshots = LRUCache(maxsize=512, ttl=settings.QUIZ_SNAPSHOT_LOCAL_TTL)
+_shared_snapshots = SharedCache()
+
+
+def quiz_scope(quiz_id):
+    return f"quiz:{quiz_id}"
+
+
+def _snapshot_key(quiz_id):
+    # Keyed on the quiz's content version, so a change made by any process retires every
+    # process's cached copy within CONTENT_VERSION_LOCAL_TTL seconds.
+    return f"quiz-snapshot:{quiz_id}@{content_cache.version(quiz_scope(quiz_id))}"
+
+
+def get_quiz_snapshot(quiz_id):
+    """Returns the QuizSnapshot for a quiz from the local or shared cache, loading it on a miss."""
+    from classmatebot.quizzes.models import Quiz
+
+    key = _snapshot_key(quiz_id)
+    snapshot = _local_snapshots.get(key)
+    if snapshot is not None:
+        return snapshot
+
+    snapshot = _shared_snapshots.get(key)
+    if snapshot is None:
+        quiz = Quiz.objects.filter(id=quiz_id).only('id', 'subject_id').first()
+        if quiz is None:
+            return None
+        snapshot = quiz.get_snapshot()
+        _shared_snapshots.set(key, snapshot, settings.QUIZ_SNAPSHOT_SHARED_TTL)
+    _local_snapshots.set(key, snapshot)
+    return snapshot
+
+
+def invalidate_quiz_snapshot(quiz_id):
+    # Bump now so this transaction reads its own writes, and again on commit so a reader that
+    # cached pre-commit rows under the new version is superseded.
+    content_cache.bump(quiz_scope(quiz_id))
+    transaction.on_commit(lambda: content_cache.bump(quiz_scope(quiz_id)))
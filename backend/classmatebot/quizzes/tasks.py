@@ -0,0 +1,16 @@
+from celery import shared_task
+
+from config.jobs import job_store, retryable_errors, TRANSIENT_ERRORS
+from classmatebot.quizzes.models import Quiz
+
+
+@shared_task(bind=True, ignore_result=True, autoretry_for=TRANSIENT_ERRORS,
+             retry_backoff=15, retry_backoff_max=10 * 60, retry_jitter=True, max_retries=5)
+def generate_quiz_questions_task(self, quiz_id, job_id=None):
+    with job_store.track(job_id, retryable=retryable_errors(self)) as outcome:
+        quiz = Quiz.objects.select_related('topic').filter(id=quiz_id).first()
+        if quiz is None:
+            raise Quiz.DoesNotExist(f"Quiz {quiz_id} no longer exists.")
+        if not quiz.quiz_questions.exists():
+            quiz.generate_questions()
+        outcome["result"] = {"quiz_id": quiz.id, "question_ids": list(quiz.quiz_questions.order_by('id').values_list('id', flat=True))}
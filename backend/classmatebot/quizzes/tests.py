@@ -0,0 +1,83 @@
+import asyncio
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from classmatebot.subjects.models import Subject, Topic
+from classmatebot.quizzes.models import Quiz, Question
+from classmatebot.quizzes.schemas import QuizSchema
+
+
+class LoopBoundChain:
+    """Stands in for a compiled chain whose LLM client, like the real one, only works on the first event loop it ran on."""
+    def __init__(self):
+        self.loop = None
+        self.calls = 0
+
+    async def abatch(self, inputs_list, max_concurrency=4, return_exceptions=False):
+        loop = asyncio.get_running_loop()
+        self.loop = self.loop or loop
+        if loop is not self.loop:
+            raise RuntimeError("Event loop is closed")
+        self.calls += 1
+        return [QuizSchema(questions={f"About {inputs['text']}?": ["YES", "no"]}) for inputs in inputs_list]
+
+
+@override_settings(COURSE_DEDUP_THRESHOLD=0)
+class GenerateForTopicsTests(TransactionTestCase):
+    def setUp(self):
+        subject = Subject.objects.create(name="Python", description="d")
+        self.topics = [
+            Topic.objects.create(subject=subject, name=f"Topic {i}", description="d", content=f"content {i}")
+            for i in range(5)
+        ]
+
+    def test_generates_every_chunk_on_one_event_loop(self):
+        chain = LoopBoundChain()
+        with mock.patch("classmatebot.quizzes.models.compile_quizzes_chain", return_value=chain):
+            report = Quiz.objects.generate_for_topics(self.topics, number_of_questions=1, number_of_options=2, chunk_size=2)
+
+        self.assertEqual(report.failed, [])
+        self.assertEqual(report.generated, 5)
+        self.assertEqual(chain.calls, 3)
+        self.assertEqual(Question.objects.count(), 5)
+
+    def test_rerun_skips_completed_topics(self):
+        with mock.patch("classmatebot.quizzes.models.compile_quizzes_chain", side_effect=LoopBoundChain):
+            Quiz.objects.generate_for_topics(self.topics[:3], number_of_questions=1, number_of_options=2, chunk_size=2)
+            report = Quiz.objects.generate_for_topics(self.topics, number_of_questions=1, number_of_options=2, chunk_size=2)
+
+        self.assertEqual((report.generated, report.skipped), (2, 3))
+        self.assertEqual(Quiz.objects.count(), 5)
+
+
+@override_settings(COURSE_DEDUP_THRESHOLD=0)
+class GetQuestionsQueryCountTests(TestCase):
+    # One JSON-aggregating query on Postgres, else one for questions and one for their options.
+    queries = 1 if connection.vendor == 'postgresql' else 2
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.subject = Subject.objects.create(name="Python", description="d")
+        topic = Topic.objects.create(subject=cls.subject, name="Basics", description="d", content="c")
+        cls.quiz = Quiz(subject=cls.subject, topic=topic, number_of_questions=3, number_of_options=3)
+        Quiz.objects.bulk_ingest([(cls.quiz, [
+            (f"Question {i}?", [(f"Option {i}.{j}", j == 0) for j in range(3)]) for i in range(3)
+        ])])
+
+    def assertQuestions(self, questions):
+        self.assertEqual([question["question"] for question in questions], ["Question 0?", "Question 1?", "Question 2?"])
+        for i, question in enumerate(questions):
+            self.assertEqual([(option["option"], option["is_correct"]) for option in question["options"]],
+                             [(f"Option {i}.{j}", j == 0) for j in range(3)])
+
+    def test_get_questions_loads_options_without_a_query_per_question(self):
+        with self.assertNumQueries(self.queries):
+            questions = self.quiz.get_questions()
+        self.assertQuestions(questions)
+
+    def test_get_questions_by_subject_adds_one_query_for_the_quiz(self):
+        with self.assertNumQueries(self.queries + 1):
+            questions = Quiz.objects.get_questions_by_subject(self.subject.id)
+        self.assertQuestions(questions)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from classmatebot.subjects.models import Subject, Topic, Bite
+from classmatebot.subjects.models import Subject, Topic, Bite, BackgroundJob
 # Register your models here.
 
 
@@ -32,6 +32,14 @@ class BiteAdmin(admin.ModelAdmin):
     list_display = ('name', 'topic', 'bite')
 
 
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'object_id', 'status', 'stage', 'attempts', 'date_created', 'date_finished')
+    list_filter = ('kind', 'status')
+    search_fields = ('object_id',)
+    readonly_fields = ('date_created', 'date_updated', 'date_finished')
+
+
 admin.site.register(Subject, SubjectAdmin)
 admin.site.register(Topic, TopicAdmin)
-admin.site.register(Bite, BiteAdmin)    
\ No newline at end of file
+admin.site.register(Bite, BiteAdmin)
+admin.site.register(BackgroundJob, BackgroundJobAdmin)    
\ No newline at end of file
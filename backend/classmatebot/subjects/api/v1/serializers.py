@@ -1,6 +1,14 @@
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
 
+from config.jobs import job_store
 from classmatebot.subjects.models import Subject, Topic, Bite
+from classmatebot.subjects.splitter import split_bites
+from classmatebot.subjects.tasks import generate_topic_bites_task
+from classmatebot.accounts.models import Account
 
 
 class SubjectSerializer(serializers.ModelSerializer):
@@ -30,16 +38,44 @@ class SubjectReadSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'description', 'subject_topics')
 
 
+class CallbackURLField(serializers.URLField):
+    """A URL that is POSTed the finished job; its host must be in JOB_CALLBACK_ALLOWED_HOSTS."""
+    def __init__(self, **kwargs):
+        kwargs.setdefault('required', False)
+        kwargs.setdefault('write_only', True)
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        url = super().to_internal_value(data)
+        if urlsplit(url).hostname not in settings.JOB_CALLBACK_ALLOWED_HOSTS:
+            raise serializers.ValidationError("Callbacks to this host are not allowed.")
+        return url
+
+
+def enqueue_job(task, kind, object_id, callback_url=None):
+    """Creates a queued job record and sends `task(object_id, job_id)` to Celery once the transaction commits."""
+    job = job_store.create(kind, object_id, callback_url=callback_url)
+    transaction.on_commit(lambda: task.delay(object_id, job_id=job["id"]))
+    return job
+
+
 class TopicSerializer(serializers.ModelSerializer):
     subject = serializers.PrimaryKeyRelatedField(queryset=Subject.objects.all())
+    callback_url = CallbackURLField()
 
     class Meta:
         model = Topic
-        fields = ('id', 'subject', 'name', 'description', 'content')    
+        fields = ('id', 'subject', 'name', 'description', 'content', 'callback_url')
 
     def create(self, validated_data):
+        callback_url = validated_data.pop('callback_url', None)
         topic = Topic.objects.create(**validated_data)
-        topic.generate_bites()
+        bites = split_bites(topic.content) if settings.BITE_LOCAL_SPLITTER else None
+        if bites is not None:
+            topic.add_bites(bites)
+            self.job = None
+        else:
+            self.job = enqueue_job(generate_topic_bites_task, "topic_bites", topic.id, callback_url)
         return topic
 
 
@@ -54,4 +90,27 @@ class TopicReadSerializer(serializers.ModelSerializer):
 
 class EnrollUserSerializer(serializers.Serializer):
     account_id = serializers.IntegerField()
-    subject_id = serializers.IntegerField()
\ No newline at end of file
+    subject_id = serializers.IntegerField()
+
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200, trim_whitespace=True)
+    limit = serializers.IntegerField(default=10, min_value=1, max_value=50)
+
+
+class PublishCourseSerializer(serializers.Serializer):
+    idempotency_key = serializers.CharField(max_length=100, required=False)
+    account_id = serializers.PrimaryKeyRelatedField(source='account', queryset=Account.objects.all(), required=False)
+    job_id = serializers.CharField(max_length=36, required=False)
+    preferences = serializers.CharField(required=False, allow_blank=True)
+    subject_name = serializers.CharField(max_length=100)
+    subject_description = serializers.CharField()
+    topic_name = serializers.CharField(max_length=100)
+    topic_description = serializers.CharField()
+    topic_content = serializers.CharField()
+    bites = serializers.ListField(child=serializers.CharField(), required=False, allow_empty=False)
+    questions = serializers.DictField(
+        child=serializers.ListField(child=serializers.CharField(), min_length=2),
+        required=False, allow_empty=False,
+    )
+    number_of_questions = serializers.IntegerField(default=5, min_value=1)
+    number_of_options = serializers.IntegerField(default=4, min_value=2)
@@ -10,9 +10,13 @@ app_name = 'subjects'
 urlpatterns = [
     path('subjects/', views.SubjectListCreateView.as_view()),
     path('subjects/<int:pk>/', views.SubjectRetrieveUpdateView.as_view()),
+    path('subjects/<int:pk>/progress/', views.SubjectProgressAPIView.as_view()),
     path('topics/', views.TopicListCreateView.as_view()),
     path('topics/<int:pk>/', views.TopicRetrieveUpdateView.as_view()),
+    path('search/', views.SearchAPIView.as_view()),
+    path('jobs/<str:job_id>/', views.JobStatusAPIView.as_view()),
 
     path('internal/enroll-user/', views.EnrollUserAPIView.as_view(), name='internal-enroll-user'),
+    path('internal/publish-course/', views.PublishCourseAPIView.as_view(), name='internal-publish-course'),
 
 ]
\ No newline at end of file
@@ -6,9 +6,34 @@ from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 
 from config.permissions import IsADKWorker
+from config.jobs import job_store, public_job
 from classmatebot.subjects.models import Subject, Topic, Enrollment
+from classmatebot.subjects.progress import ProgressEngine
+from classmatebot.subjects.content import get_subject_list, get_subject_detail, get_topic_list, get_topic_detail
+from classmatebot.subjects.search import search
+from classmatebot.subjects.publishing import publish_course
 from classmatebot.accounts.models import Account
-from classmatebot.subjects.api.v1.serializers import SubjectSerializer, SubjectReadSerializer, TopicSerializer, TopicReadSerializer, EnrollUserSerializer
+from classmatebot.subjects.api.v1.serializers import SubjectSerializer, SubjectReadSerializer, TopicSerializer, TopicReadSerializer, EnrollUserSerializer, SearchQuerySerializer, PublishCourseSerializer
+
+
+class JobCreateMixin:
+    """
+    Create views whose serializer may queue background generation: they answer 202 with the new
+    object and its job (also linked from the Location header), or 201 when nothing was queued.
+    """
+    @override
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        job = getattr(serializer, 'job', None)
+        if job is None:
+            return Response(serializer.data, status=status.HTTP_201_CREATED, headers=self.get_success_headers(serializer.data))
+        return Response(
+            {**serializer.data, "job": public_job(job)},
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": request.build_absolute_uri(f"/api/v1/jobs/{job['id']}/")},
+        )
 
 
 class SubjectListCreateView(generics.ListCreateAPIView):
@@ -20,14 +45,25 @@ class SubjectListCreateView(generics.ListCreateAPIView):
             return SubjectReadSerializer
         return SubjectSerializer
 
+    @override
+    def list(self, request, *args, **kwargs):
+        return Response(get_subject_list())
+
 
 class SubjectRetrieveUpdateView(generics.RetrieveUpdateAPIView):
     queryset = Subject.objects.all()
     serializer_class = SubjectReadSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
+    @override
+    def retrieve(self, request, *args, **kwargs):
+        data = get_subject_detail(kwargs['pk'])
+        if data is None:
+            return Response({"error": "subject_not_found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(data)
+
 
-class TopicListCreateView(generics.ListCreateAPIView):
+class TopicListCreateView(JobCreateMixin, generics.ListCreateAPIView):
     queryset = Topic.objects.all()
     permission_classes = (permissions.IsAuthenticated,)
 
@@ -36,12 +72,84 @@ class TopicListCreateView(generics.ListCreateAPIView):
             return TopicReadSerializer
         return TopicSerializer
 
+    @override
+    def list(self, request, *args, **kwargs):
+        return Response(get_topic_list())
+
 
 class TopicRetrieveUpdateView(generics.RetrieveUpdateAPIView):
     queryset = Topic.objects.all()
     serializer_class = TopicReadSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
+    @override
+    def retrieve(self, request, *args, **kwargs):
+        data = get_topic_detail(kwargs['pk'])
+        if data is None:
+            return Response({"error": "topic_not_found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(data)
+
+
+class JobStatusAPIView(generics.GenericAPIView):
+    """
+    Status of a background generation job (queued, running, done or failed) and, once done, its result.
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request, job_id, *args, **kwargs):
+        job = job_store.get(job_id)
+        if job is None:
+            return Response({"error": "job_not_found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(public_job(job), status=status.HTTP_200_OK)
+
+
+class SubjectProgressAPIView(generics.GenericAPIView):
+    """
+    The authenticated account's progress through a subject, read from the materialised progress rows.
+    """
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request, pk, *args, **kwargs):
+        if not Subject.objects.filter(pk=pk).exists():
+            return Response({"error": "subject_not_found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(ProgressEngine(request.user).summary(pk), status=status.HTTP_200_OK)
+
+
+class SearchAPIView(generics.GenericAPIView):
+    """
+    Ranked full-text search over subjects, topics and bites.
+    """
+    serializer_class = SearchQuerySerializer
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        results = search(data['q'], limit=data['limit'])
+        return Response({
+            "query": data['q'],
+            "results": [result._asdict() for result in results],
+        }, status=status.HTTP_200_OK)
+
+
+class PublishCourseAPIView(generics.GenericAPIView):
+    """
+    Internal endpoint for the ADK worker to save a whole generated course (subject, topic, bites,
+    quiz and enrollment) in one transaction. Returns every created id.
+    """
+    serializer_class = PublishCourseSerializer
+    permission_classes = [IsADKWorker]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        result, created = publish_course(data, idempotency_key=data.get('idempotency_key'))
+        return Response(result, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
 
 class EnrollUserAPIView(generics.GenericAPIView):
     """
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SubjectsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'classmatebot.subjects'
+
+    def ready(self):
+        from classmatebot.subjects import signals  # noqa: F401
@@ -0,0 +1,256 @@
+import hashlib
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import transaction
+
+from config.caching import LRUCache, SharedCache
+
+
+SubjectSummary = namedtuple("SubjectSummary", ["id", "name", "description"])
+SubjectPage = namedtuple("SubjectPage", ["subjects", "page", "total_pages"])
+
+CATALOG_SCOPE = "catalog"
+SUBJECT_INDEX_SCOPE = "subject-index"
+
+
+def subject_scope(subject_id):
+    return f"subject:{subject_id}"
+
+
+def topic_scope(topic_id):
+    return f"topic:{topic_id}"
+
+
+class ContentCache:
+    """
+    Cache for mostly-static learning content. Keys embed the current version of every scope
+    they depend on (the catalogue, a subject, a topic), so invalidating content is a counter
+    bump rather than a hunt for keys. Values live in an in-process LRU in front of the shared
+    Redis cache, and a miss is loaded by one caller at a time, per process and across processes,
+    so popular content expiring does not send every request to the database at once.
+    """
+    def __init__(self, local_size=4096, local_ttl=None, shared_ttl=None, version_ttl=5,
+                 lock_timeout=10, lock_wait=2.0, stripes=64):
+        self.local = LRUCache(maxsize=local_size, ttl=local_ttl)
+        self.versions = LRUCache(maxsize=local_size, ttl=version_ttl)
+        self.shared = SharedCache()
+        self.shared_ttl = shared_ttl
+        self.lock_timeout = lock_timeout
+        self.lock_wait = lock_wait
+        self._stripes = [threading.RLock() for _ in range(stripes)]
+
+    @staticmethod
+    def _version_key(scope):
+        return f"content-version:{scope}"
+
+    def version(self, scope):
+        """
+        Current version of a scope. Processes see another process's bump within `version_ttl`
+        seconds. A missing counter starts from the clock so it never repeats an evicted one.
+        """
+        version = self.versions.get(scope)
+        if version is None:
+            key = self._version_key(scope)
+            version = self.shared.get(key)
+            if version is None:
+                self.shared.add(key, time.time_ns() // 1000, None)
+                version = self.shared.get(key, time.time_ns() // 1000)
+            self.versions.set(scope, version)
+        return version
+
+    def bump(self, *scopes):
+        for scope in scopes:
+            key = self._version_key(scope)
+            version = self.shared.incr(key)
+            if version is None:
+                version = time.time_ns() // 1000
+                self.shared.set(key, version, None)
+            self.versions.set(scope, version)
+
+    def key(self, name, *scopes):
+        return ":".join([f"content:{name}"] + [f"{scope}@{self.version(scope)}" for scope in scopes])
+
+    def get_or_load(self, key, loader):
+        """Returns the cached value for `key`, calling `loader` on a miss. None results are not cached."""
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        value = self.shared.get(key)
+        if value is None:
+            with self._stripes[hash(key) % len(self._stripes)]:
+                value = self.local.get(key)
+                if value is not None:
+                    return value
+                value = self._load(key, loader)
+            if value is None:
+                return None
+        self.local.set(key, value)
+        return value
+
+    def _load(self, key, loader):
+        lock_key = f"{key}:loading"
+        if self.shared.add(lock_key, 1, self.lock_timeout):
+            try:
+                value = loader()
+                if value is not None:
+                    self.shared.set(key, value, self.shared_ttl)
+                return value
+            finally:
+                self.shared.delete(lock_key)
+
+        # Another process is loading it: wait briefly for its result before loading ourselves.
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            value = self.shared.get(key)
+            if value is not None:
+                return value
+        return loader()
+
+    def set(self, key, value):
+        self.local.set(key, value)
+        self.shared.set(key, value, self.shared_ttl)
+
+    def delete(self, key):
+        self.local.delete(key)
+        self.shared.delete(key)
+
+
+content_cache = ContentCache(
+    local_ttl=settings.CONTENT_CACHE_LOCAL_TTL,
+    shared_ttl=settings.CONTENT_CACHE_SHARED_TTL,
+    version_ttl=settings.CONTENT_VERSION_LOCAL_TTL,
+)
+
+
+def _bump(*scopes):
+    # Bump now so this transaction reads its own writes, and again on commit so a reader that
+    # cached pre-commit rows under the new version is superseded.
+    content_cache.bump(*scopes)
+    transaction.on_commit(lambda: content_cache.bump(*scopes))
+
+
+def invalidate_subject_content(subject_id, topic_ids=()):
+    _bump(CATALOG_SCOPE, SUBJECT_INDEX_SCOPE, subject_scope(subject_id), *[topic_scope(topic_id) for topic_id in topic_ids])
+
+
+def invalidate_topic_content(subject_id, topic_id):
+    _bump(CATALOG_SCOPE, subject_scope(subject_id), topic_scope(topic_id))
+
+
+def get_subject_count():
+    from classmatebot.subjects.models import Subject
+
+    return content_cache.get_or_load(content_cache.key("subject-count", SUBJECT_INDEX_SCOPE), Subject.objects.count)
+
+
+def get_subject_page_starts(pages):
+    """
+    First subject id of each of the first `pages` catalogue pages (fewer if the catalogue is
+    shorter), so any page is a single keyset query. Starts are found by seeking SUBJECT_PAGE_SIZE
+    rows past the previous start and cached as they are reached, so a version bump costs one
+    seek per page actually visited rather than a scan of every subject id.
+    """
+    from classmatebot.subjects.models import Subject
+
+    page_size = settings.SUBJECT_PAGE_SIZE
+    ids = Subject.objects.order_by('id').values_list('id', flat=True)
+    key = content_cache.key("subject-page-starts", SUBJECT_INDEX_SCOPE)
+    starts = content_cache.get_or_load(key, lambda: tuple(ids[:1]))
+    if len(starts) >= pages or not starts:
+        return starts[:pages]
+
+    starts = list(starts)
+    while len(starts) < pages:
+        start = next(iter(ids.filter(id__gte=starts[-1])[page_size:page_size + 1]), None)
+        if start is None:
+            break
+        starts.append(start)
+    starts = tuple(starts)
+    content_cache.set(key, starts)
+    return starts
+
+
+def get_subject_page(page):
+    """Returns a SubjectPage for a 1-based page number, clamped to the available pages."""
+    from classmatebot.subjects.models import Subject
+
+    total_pages = -(-get_subject_count() // settings.SUBJECT_PAGE_SIZE)
+    starts = get_subject_page_starts(min(max(page, 1), total_pages))
+    if not starts:
+        return SubjectPage((), 1, 0)
+    page = len(starts)
+
+    def load():
+        rows = Subject.objects.filter(id__gte=starts[page - 1]).order_by('id').values_list(
+            'id', 'name', 'description')[:settings.SUBJECT_PAGE_SIZE]
+        return SubjectPage(tuple(SubjectSummary(*row) for row in rows), page, total_pages)
+
+    return content_cache.get_or_load(content_cache.key(f"subject-page:{page}", SUBJECT_INDEX_SCOPE), load)
+
+
+def search_subjects(term):
+    """Subjects whose name contains `term` (case-insensitive), ordered by id, capped at SUBJECT_SEARCH_LIMIT."""
+    from classmatebot.subjects.models import Subject
+
+    term = " ".join(term.lower().split())
+    digest = hashlib.sha1(term.encode()).hexdigest()
+
+    def load():
+        rows = Subject.objects.filter(name__icontains=term).order_by('id').values_list(
+            'id', 'name', 'description')[:settings.SUBJECT_SEARCH_LIMIT]
+        return tuple(SubjectSummary(*row) for row in rows)
+
+    return content_cache.get_or_load(content_cache.key(f"subject-search:{digest}", SUBJECT_INDEX_SCOPE), load)
+
+
+def get_subject_list():
+    """SubjectReadSerializer data for every subject."""
+    from classmatebot.subjects.models import Subject
+    from classmatebot.subjects.api.v1.serializers import SubjectReadSerializer
+
+    def load():
+        subjects = Subject.objects.order_by('id').prefetch_related('subject_topics__topic_bites')
+        return list(SubjectReadSerializer(subjects, many=True).data)
+
+    return content_cache.get_or_load(content_cache.key("subject-list", CATALOG_SCOPE), load)
+
+
+def get_subject_detail(subject_id):
+    """SubjectReadSerializer data for one subject, or None if it does not exist."""
+    from classmatebot.subjects.models import Subject
+    from classmatebot.subjects.api.v1.serializers import SubjectReadSerializer
+
+    def load():
+        subject = Subject.objects.prefetch_related('subject_topics__topic_bites').filter(id=subject_id).first()
+        return dict(SubjectReadSerializer(subject).data) if subject else None
+
+    return content_cache.get_or_load(content_cache.key("subject", subject_scope(subject_id)), load)
+
+
+def get_topic_list():
+    """TopicReadSerializer data for every topic."""
+    from classmatebot.subjects.models import Topic
+    from classmatebot.subjects.api.v1.serializers import TopicReadSerializer
+
+    def load():
+        topics = Topic.objects.order_by('id').select_related('subject').prefetch_related('topic_bites')
+        return list(TopicReadSerializer(topics, many=True).data)
+
+    return content_cache.get_or_load(content_cache.key("topic-list", CATALOG_SCOPE), load)
+
+
+def get_topic_detail(topic_id):
+    """TopicReadSerializer data for one topic, or None if it does not exist."""
+    from classmatebot.subjects.models import Topic
+    from classmatebot.subjects.api.v1.serializers import TopicReadSerializer
+
+    def load():
+        topic = Topic.objects.select_related('subject').prefetch_related('topic_bites').filter(id=topic_id).first()
+        return dict(TopicReadSerializer(topic).data) if topic else None
+
+    return content_cache.get_or_load(content_cache.key("topic", topic_scope(topic_id)), load)
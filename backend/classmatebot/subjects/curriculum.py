@@ -0,0 +1,98 @@
+from bisect import bisect_right
+from collections import namedtuple
+
+from classmatebot.subjects.content import content_cache, subject_scope
+
+
+BiteContent = namedtuple("BiteContent", ["bite_id", "topic_id", "name", "bite"])
+
+
+class CurriculumIndex:
+    """
+    Precomputed, immutable lesson order for a subject: topic ids in order, every bite id
+    flattened in reading order, and the offset at which each topic's bites start.
+    A lesson session only needs a subject id and a position in `bite_ids`.
+    """
+    __slots__ = ("subject_id", "topic_ids", "bite_ids", "topic_offsets", "_positions")
+
+    def __init__(self, subject_id, topic_ids, bite_ids, topic_offsets):
+        self.subject_id = subject_id
+        self.topic_ids = tuple(topic_ids)
+        self.bite_ids = tuple(bite_ids)
+        self.topic_offsets = tuple(topic_offsets)
+        self._positions = {bite_id: i for i, bite_id in enumerate(self.bite_ids)}
+
+    @classmethod
+    def build(cls, subject_id, topic_ids, topic_bite_pairs):
+        """Builds the index from ordered topic ids and (bite_id, topic_id) pairs ordered by topic then bite."""
+        bites_by_topic = {topic_id: [] for topic_id in topic_ids}
+        for bite_id, topic_id in topic_bite_pairs:
+            bites_by_topic[topic_id].append(bite_id)
+
+        bite_ids, topic_offsets = [], []
+        for topic_id in topic_ids:
+            topic_offsets.append(len(bite_ids))
+            bite_ids.extend(bites_by_topic[topic_id])
+        return cls(subject_id, topic_ids, bite_ids, topic_offsets)
+
+    def __getstate__(self):
+        return (self.subject_id, self.topic_ids, self.bite_ids, self.topic_offsets)
+
+    def __setstate__(self, data):
+        self.__init__(*data)
+
+    def __len__(self):
+        return len(self.bite_ids)
+
+    def position_of(self, bite_id):
+        return self._positions.get(bite_id)
+
+    def topic_index_at(self, position):
+        return bisect_right(self.topic_offsets, position) - 1
+
+    def topic_at(self, position):
+        return self.topic_ids[self.topic_index_at(position)]
+
+    def topic_range(self, topic_id):
+        """Returns the [start, end) positions of a topic's bites."""
+        topic_index = self.topic_ids.index(topic_id)
+        start = self.topic_offsets[topic_index]
+        end = self.topic_offsets[topic_index + 1] if topic_index + 1 < len(self.topic_ids) else len(self.bite_ids)
+        return start, end
+
+    def topic_bite_ids(self, topic_id):
+        start, end = self.topic_range(topic_id)
+        return self.bite_ids[start:end]
+
+
+def get_curriculum_index(subject_id):
+    """Returns the subject's CurriculumIndex from the content cache; it is versioned with the subject's content."""
+    from classmatebot.subjects.models import Topic, Bite
+
+    def load():
+        topic_ids = list(Topic.objects.filter(subject_id=subject_id).order_by('id').values_list('id', flat=True))
+        pairs = Bite.objects.filter(topic__subject_id=subject_id).order_by('topic_id', 'id').values_list('id', 'topic_id')
+        return CurriculumIndex.build(int(subject_id), topic_ids, pairs)
+
+    return content_cache.get_or_load(content_cache.key("curriculum", subject_scope(subject_id)), load)
+
+
+def _bite_key(bite_id):
+    return f"content:bite:{bite_id}"
+
+
+def get_bite(bite_id):
+    """Returns a BiteContent from the content cache, or None if the bite does not exist."""
+    from classmatebot.subjects.models import Bite
+
+    def load():
+        bite = Bite.objects.filter(id=bite_id).values('id', 'topic_id', 'name', 'bite').first()
+        if bite is None:
+            return None
+        return BiteContent(bite['id'], bite['topic_id'], bite['name'], bite['bite'])
+
+    return content_cache.get_or_load(_bite_key(bite_id), load)
+
+
+def invalidate_bite(bite_id):
+    content_cache.delete(_bite_key(bite_id))
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from config.benchmarks import format_summary, summarize_latencies, timed
+from wrappers.llm_chains import chains
+import classmatebot.subjects.prompts  # noqa: F401  (registers generate_bites)
+from classmatebot.subjects.splitter import split_bites
+
+
+SECTION = (
+    "Photosynthesis turns light energy into chemical energy 🌱. Chlorophyll in the chloroplasts absorbs sunlight, "
+    "and the plant uses it to combine carbon dioxide and water into glucose, releasing oxygen as a by-product. "
+)
+
+
+def sample_content(sections):
+    """Content shaped like the ADK drafter's and generate_preference_content's output."""
+    return "\n[BITE_BREAK]\n".join(SECTION * (2 + i % 3) for i in range(sections))
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures splitting [BITE_BREAK] topic content into bites locally. With --with-llm it also times the "
+        "previous gemini-2.5-pro split of the same content, bypassing the LLM cache (needs GEMINI_API_KEY)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sections", type=int, default=5)
+        parser.add_argument("--iterations", type=int, default=1000)
+        parser.add_argument("--with-llm", action="store_true")
+        parser.add_argument("--llm-iterations", type=int, default=3)
+
+    def _measure(self, label, split, iterations):
+        samples = []
+        started = time.perf_counter()
+        for _ in range(iterations):
+            with timed(samples):
+                bites = split()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{format_summary(f'{label:>12}', summarize_latencies(samples, elapsed))} bites={len(bites)}")
+
+    def handle(self, *args, **options):
+        content = sample_content(options["sections"])
+        self.stdout.write(f"{len(content)} characters in {options['sections']} sections")
+        self._measure("local", lambda: split_bites(content), options["iterations"])
+        if options["with_llm"]:
+            runnable = chains.get("generate_bites").runnable
+            self._measure("llm", lambda: runnable.invoke({"topic": content}).bites, options["llm_iterations"])
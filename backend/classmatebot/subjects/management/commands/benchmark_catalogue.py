@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from config.benchmarks import format_summary, summarize_latencies, timed
+from classmatebot.subjects.content import get_subject_page, invalidate_subject_content
+from classmatebot.subjects.models import Subject
+
+
+def render_all():
+    """The previous /get-subjects: every subject rendered into one message."""
+    return "\n".join([f"|  *{subject.name}*  |  `00{subject.id}`  |" for subject in Subject.objects.all()])
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures /get-subjects page lookups (first, middle and last page, cold and warm) against rendering "
+        "the whole catalogue, for a synthetic catalogue created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subjects", type=int, default=10000)
+        parser.add_argument("--iterations", type=int, default=200)
+
+    def _measure(self, label, lookup, iterations):
+        samples = []
+        with CaptureQueriesContext(connection) as queries:
+            lookup()
+        started = time.perf_counter()
+        for _ in range(iterations):
+            with timed(samples):
+                lookup()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"{format_summary(f'{label:>14}', summarize_latencies(samples, elapsed))} first-call queries={len(queries)}")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            Subject.objects.bulk_create(
+                [Subject(name=f"Subject {i}", description="Synthetic catalogue") for i in range(options["subjects"])],
+                batch_size=2000,
+            )
+            invalidate_subject_content(0)
+            pages = get_subject_page(1).total_pages
+            self.stdout.write(f"{options['subjects']} subjects, {pages} pages")
+
+            self._measure("render all", render_all, max(1, options["iterations"] // 20))
+            for label, page in (("first page", 1), ("middle page", pages // 2), ("last page", pages)):
+                invalidate_subject_content(0)
+                self._measure(label, lambda: get_subject_page(page), options["iterations"])
+            transaction.set_rollback(True)
+        invalidate_subject_content(0)
@@ -0,0 +1,41 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from config.benchmarks import format_summary, summarize_latencies, timed
+from wrappers.llm_chains import build_llm, chains
+import classmatebot.quizzes.prompts  # noqa: F401  (registers generate_quizzes)
+import classmatebot.subjects.prompts  # noqa: F401  (registers generate_bites, generate_preference_content)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the per-call cost of building a chain (parser, prompt, Gemini client) from scratch against "
+        "fetching the compiled chain from the registry. No requests are sent to the model."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200)
+
+    def _measure(self, label, build, iterations):
+        samples = []
+        started = time.perf_counter()
+        for _ in range(iterations):
+            with timed(samples):
+                build()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(format_summary(f"{label:>44}", summarize_latencies(samples, elapsed)))
+
+    def handle(self, *args, **options):
+        # Building a client does not contact the API, so any key will do when none is configured.
+        os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+        for name in chains.names():
+            factory = chains.factory(name)
+
+            def rebuild():
+                prompt, parser = factory()
+                return prompt | build_llm() | parser
+
+            self._measure(f"{name} rebuilt per call", rebuild, options["iterations"])
+            self._measure(f"{name} from registry", lambda: chains.get(name), options["iterations"])
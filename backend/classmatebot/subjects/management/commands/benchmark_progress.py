@@ -0,0 +1,92 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from config.benchmarks import format_summary, summarize_latencies, timed
+from classmatebot.accounts.models import Account
+from classmatebot.subjects.content import invalidate_subject_content
+from classmatebot.subjects.curriculum import get_curriculum_index
+from classmatebot.subjects.models import Subject, Topic, Bite, Checkpoint, Milestone
+from classmatebot.subjects.progress import ProgressEngine
+
+
+def legacy_next_bite(account, index):
+    """The previous lookup: probe Milestone per topic, then Checkpoint per bite, then count the topic."""
+    newest_topic_id = None
+    newest_bite_id = None
+    for topic_id in index.topic_ids:
+        try:
+            Milestone.objects.get(topic_id=topic_id, account=account)
+        except Milestone.DoesNotExist:
+            newest_topic_id = topic_id
+            break
+    for bite_id in index.topic_bite_ids(newest_topic_id):
+        try:
+            Checkpoint.objects.get(bite_id=bite_id, account=account, status=Checkpoint.Status.COMPLETED)
+        except Checkpoint.DoesNotExist:
+            newest_bite_id = bite_id
+            break
+    topic = Topic.objects.get(id=newest_topic_id)
+    total_bites = topic.get_total_number_of_bites_by_topic()
+    completed_bites = Checkpoint.objects.get_completed_bites_by_topic(account=account, topic=topic)
+    return newest_topic_id, newest_bite_id, total_bites, completed_bites
+
+
+def engine_next_bite(account, index):
+    progress = ProgressEngine(account).for_subject(index.subject_id, index)
+    topic_id, bite_id = progress.next_bite()
+    total_bites, completed_bites = progress.topic_progress(topic_id)
+    return topic_id, bite_id, total_bites, completed_bites
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the per-row Milestone/Checkpoint probing with the ProgressEngine on a synthetic "
+        "subject. All benchmark data is created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--topics", type=int, default=20)
+        parser.add_argument("--bites-per-topic", type=int, default=25)
+        parser.add_argument("--completed", type=float, default=0.9, help="Fraction of bites already completed.")
+        parser.add_argument("--iterations", type=int, default=50)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            account = Account.objects.create(phone_number="+2348099999999")
+            subject = Subject.objects.create(name="Benchmark subject", description="Synthetic progress benchmark")
+            topics = Topic.objects.bulk_create([
+                Topic(subject=subject, name=f"Topic {t}", description="", content="") for t in range(options["topics"])
+            ])
+            Bite.objects.bulk_create([
+                Bite(topic=topic, name=f"Bite {b}", bite="") for topic in topics for b in range(options["bites_per_topic"])
+            ])
+
+            index = get_curriculum_index(subject.id)
+            completed = int(len(index) * options["completed"])
+            Checkpoint.objects.bulk_create([
+                Checkpoint(bite_id=bite_id, account=account, status=Checkpoint.Status.COMPLETED)
+                for bite_id in index.bite_ids[:completed]
+            ])
+            finished_topics = [topic_id for topic_id in index.topic_ids if index.topic_range(topic_id)[1] <= completed]
+            Milestone.objects.bulk_create([Milestone(topic_id=topic_id, account=account, completed=True) for topic_id in finished_topics])
+
+            self.stdout.write(f"{len(index.topic_ids)} topics, {len(index)} bites, {completed} completed")
+            results = {}
+            for label, lookup in (("legacy", legacy_next_bite), ("engine", engine_next_bite)):
+                samples = []
+                with CaptureQueriesContext(connection) as queries:
+                    results[label] = lookup(account, index)
+                started = time.perf_counter()
+                for _ in range(options["iterations"]):
+                    with timed(samples):
+                        lookup(account, index)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"{format_summary(f'{label:>6}', summarize_latencies(samples, elapsed))} queries/lookup={len(queries)}")
+
+            if results["legacy"] != results["engine"]:
+                self.stderr.write(f"Results differ: legacy={results['legacy']} engine={results['engine']}")
+            transaction.set_rollback(True)
+        invalidate_subject_content(subject.id)
@@ -0,0 +1,72 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from config.benchmarks import format_summary, summarize_latencies, timed
+from classmatebot.subjects.models import Subject, Topic, Bite
+from classmatebot.subjects.search import LocalSearchBackend, PostgresSearchBackend, index_objects
+
+
+WORDS = (
+    "cell energy light plant water carbon oxygen protein enzyme membrane nucleus gene mutation force motion "
+    "velocity friction gravity orbit planet atom electron molecule reaction acid base salt equation graph "
+    "function vector matrix theorem proof number fraction market price demand supply trade empire revolution"
+).split()
+QUERIES = ["photosynthesis light energy", "gravity orbit", "acid base reaction", "matrix vector", "market demand",
+           "photosyntesis", "membrane protien", "revolutoin empire"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures search latency over a synthetic corpus of bites (created inside a transaction that is rolled "
+        "back) against the previous substring scan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bites", type=int, default=100000)
+        parser.add_argument("--iterations", type=int, default=200)
+
+    def _measure(self, label, lookup, iterations):
+        samples = []
+        started = time.perf_counter()
+        for i in range(iterations):
+            with timed(samples):
+                lookup(QUERIES[i % len(QUERIES)])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(format_summary(f"{label:>16}", summarize_latencies(samples, elapsed)))
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        with transaction.atomic():
+            subject = Subject.objects.create(name="Photosynthesis and plant biology", description="Synthetic corpus")
+            topics = Topic.objects.bulk_create(
+                [Topic(subject=subject, name=f"Topic {i}", description="Synthetic", content="")
+                 for i in range(max(1, options["bites"] // 50))]
+            )
+            bites = Bite.objects.bulk_create(
+                [Bite(topic=topics[i % len(topics)], name=" ".join(rng.sample(WORDS, 3)),
+                      bite=" ".join(rng.choices(WORDS, k=60))) for i in range(options["bites"])],
+                batch_size=2000,
+            )
+            started = time.perf_counter()
+            index_objects([subject, *topics])
+            for start in range(0, len(bites), 5000):
+                index_objects(bites[start:start + 5000])
+            self.stdout.write(f"Indexed {len(bites)} bites in {time.perf_counter() - started:.1f}s")
+
+            if connection.vendor == 'postgresql':
+                backend = PostgresSearchBackend()
+            else:
+                backend = LocalSearchBackend(sync_interval=3600)
+                started = time.perf_counter()
+                backend.sync(force=True)
+                self.stdout.write(f"Built in-process index in {time.perf_counter() - started:.1f}s")
+
+            def substring_scan(query):
+                return list(Bite.objects.filter(bite__icontains=query.split()[0]).values_list('id', flat=True)[:10])
+
+            self._measure("substring scan", substring_scan, max(1, options["iterations"] // 10))
+            self._measure("search", lambda query: backend.search(query, 10), options["iterations"])
+            transaction.set_rollback(True)
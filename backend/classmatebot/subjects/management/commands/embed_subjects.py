@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from classmatebot.subjects.models import Subject
+from classmatebot.subjects.similarity import embed_subjects
+
+
+class Command(BaseCommand):
+    help = "Embeds subjects for /generate-course deduplication, skipping those whose text has not changed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Re-embed every subject.")
+        parser.add_argument("--batch-size", type=int, default=100)
+
+    def handle(self, *args, **options):
+        subject_ids = list(Subject.objects.order_by('id').values_list('id', flat=True))
+        batch_size = options["batch_size"]
+        embedded = 0
+        for start in range(0, len(subject_ids), batch_size):
+            embedded += embed_subjects(subject_ids[start:start + batch_size], force=options["force"])
+        self.stdout.write(self.style.SUCCESS(f"Embedded {embedded} of {len(subject_ids)} subjects."))
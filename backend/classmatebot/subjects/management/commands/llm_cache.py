@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from wrappers.llm_cache import llm_cache
+from wrappers.llm_chains import chains
+import classmatebot.quizzes.prompts  # noqa: F401  (registers generate_quizzes)
+import classmatebot.subjects.prompts  # noqa: F401  (registers generate_bites, generate_preference_content)
+
+
+class Command(BaseCommand):
+    help = "Shows hit/miss counts of the LLM response cache, or clears it."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clear", action="store_true", help="Delete every cached response and counter.")
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            llm_cache.clear()
+            self.stdout.write(self.style.SUCCESS("LLM response cache cleared."))
+            return
+        for name, stats in llm_cache.stats(chains.names()).items():
+            self.stdout.write(f"{name:>28}: hits={stats['hits']} misses={stats['misses']} hit_rate={stats['hit_rate']}")
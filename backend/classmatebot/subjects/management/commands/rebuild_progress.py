@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from classmatebot.subjects.models import Checkpoint, Milestone, AccountTopicProgress, AccountSubjectProgress
+
+
+def expected_progress(account_id=None):
+    """
+    Recomputes topic and subject progress rows from Checkpoint and Milestone with two grouped queries.
+    Every Milestone row counts as a completed topic: lessons used to create them with the default
+    completed=False, so the flag is not reliable for older rows.
+    """
+    checkpoints = Checkpoint.objects.filter(status=Checkpoint.Status.COMPLETED)
+    milestones = Milestone.objects.all()
+    if account_id:
+        checkpoints = checkpoints.filter(account_id=account_id)
+        milestones = milestones.filter(account_id=account_id)
+
+    topics, subjects = {}, {}
+    for row in checkpoints.values('account_id', 'bite__topic_id', 'bite__topic__subject_id').annotate(total=Count('id')):
+        topics[(row['account_id'], row['bite__topic_id'])] = [row['total'], False]
+        subject = subjects.setdefault((row['account_id'], row['bite__topic__subject_id']), [0, 0])
+        subject[0] += row['total']
+    for account, topic, subject_id in milestones.values_list('account_id', 'topic_id', 'topic__subject_id'):
+        topics.setdefault((account, topic), [0, False])[1] = True
+        subjects.setdefault((account, subject_id), [0, 0])[1] += 1
+    return topics, subjects
+
+
+def reconcile(model, key_field, fields, expected, account_id=None, dry_run=False):
+    """Upserts rows whose stored counters drifted from `expected` and deletes rows with nothing behind them."""
+    existing = model.objects.all()
+    if account_id:
+        existing = existing.filter(account_id=account_id)
+    stored = {(row[0], row[1]): list(row[2:]) for row in existing.values_list('account_id', key_field, *fields)}
+
+    drifted = [key for key, values in expected.items() if stored.get(key) != values]
+    stale = [stored_key for stored_key in stored if stored_key not in expected]
+    if dry_run:
+        return len(drifted), len(stale)
+
+    model.objects.bulk_create(
+        [model(account_id=key[0], **{key_field: key[1]}, **dict(zip(fields, expected[key]))) for key in drifted],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['account', key_field.removesuffix('_id')],
+        update_fields=[*fields, 'date_updated'],
+    )
+    for account, key in stale:
+        model.objects.filter(account_id=account, **{key_field: key}).delete()
+    return len(drifted), len(stale)
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the materialised AccountTopicProgress/AccountSubjectProgress rows from Checkpoint "
+        "and Milestone, rewriting only the rows that drifted. Safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--account", type=int, help="Only reconcile this account id.")
+        parser.add_argument("--dry-run", action="store_true", help="Report drift without writing.")
+
+    def handle(self, *args, **options):
+        account_id, dry_run = options["account"], options["dry_run"]
+        with transaction.atomic():
+            topics, subjects = expected_progress(account_id)
+            topic_drift = reconcile(AccountTopicProgress, 'topic_id', ('completed_bites', 'is_completed'),
+                                    topics, account_id, dry_run)
+            subject_drift = reconcile(AccountSubjectProgress, 'subject_id', ('completed_bites', 'completed_topics'),
+                                      subjects, account_id, dry_run)
+
+        verb = "Would fix" if dry_run else "Fixed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {topic_drift[0]} topic rows ({topic_drift[1]} stale) and "
+            f"{subject_drift[0]} subject rows ({subject_drift[1]} stale)."
+        ))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from classmatebot.subjects.models import Subject, Topic, Bite, SearchDocument
+from classmatebot.subjects.search import index_objects
+
+
+class Command(BaseCommand):
+    help = "Rebuilds SearchDocument rows (and their Postgres search vectors) for every subject, topic and bite."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clear", action="store_true", help="Delete all search documents first.")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        with transaction.atomic():
+            if options["clear"]:
+                SearchDocument.objects.all().delete()
+            for label, queryset in (
+                ("subjects", Subject.objects.order_by('id')),
+                ("topics", Topic.objects.order_by('id')),
+                ("bites", Bite.objects.select_related('topic').only('id', 'name', 'bite', 'topic__subject_id').order_by('id')),
+            ):
+                count, chunk = 0, []
+                for instance in queryset.iterator(chunk_size=chunk_size):
+                    chunk.append(instance)
+                    if len(chunk) == chunk_size:
+                        index_objects(chunk)
+                        count, chunk = count + len(chunk), []
+                index_objects(chunk)
+                self.stdout.write(f"Indexed {count + len(chunk)} {label}")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:14
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subjects', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountSubjectProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_bites', models.PositiveIntegerField(default=0)),
+                ('completed_topics', models.PositiveIntegerField(default=0)),
+                ('date_updated', models.DateTimeField(auto_now=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='account_subject_progress', to=settings.AUTH_USER_MODEL)),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subject_account_progress', to='subjects.subject')),
+            ],
+            options={
+                'verbose_name': 'account subject progress',
+                'verbose_name_plural': 'account subject progress',
+                'unique_together': {('account', 'subject')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AccountTopicProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_bites', models.PositiveIntegerField(default=0)),
+                ('is_completed', models.BooleanField(default=False)),
+                ('date_updated', models.DateTimeField(auto_now=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='account_topic_progress', to=settings.AUTH_USER_MODEL)),
+                ('topic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='topic_account_progress', to='subjects.topic')),
+            ],
+            options={
+                'verbose_name': 'account topic progress',
+                'verbose_name_plural': 'account topic progress',
+                'unique_together': {('account', 'topic')},
+            },
+        ),
+    ]
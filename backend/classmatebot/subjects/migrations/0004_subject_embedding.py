@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subjects', '0003_search_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubjectEmbedding',
+            fields=[
+                ('subject', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='embedding', serialize=False, to='subjects.subject')),
+                ('model', models.CharField(max_length=100)),
+                ('text_hash', models.CharField(max_length=40)),
+                ('vector', models.JSONField()),
+                ('date_updated', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'subject embedding',
+                'verbose_name_plural': 'subject embeddings',
+            },
+        ),
+    ]
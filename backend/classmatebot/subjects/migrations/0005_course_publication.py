@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 05:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subjects', '0004_subject_embedding'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoursePublication',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idempotency_key', models.CharField(max_length=100, unique=True)),
+                ('result', models.JSONField()),
+                ('date_created', models.DateTimeField(auto_now_add=True)),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='publications', to='subjects.subject')),
+            ],
+            options={
+                'verbose_name': 'course publication',
+                'verbose_name_plural': 'course publications',
+            },
+        ),
+    ]
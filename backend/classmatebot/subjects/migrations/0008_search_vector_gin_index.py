@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:39
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subjects', '0007_background_job_stages'),
+    ]
+
+    operations = [
+        # Databases migrated before the index was declared on the model have it under its old name.
+        migrations.RunSQL('DROP INDEX IF EXISTS subjects_searchdocument_vector_gin', migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='searchdocument',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='search_document_vector_gin'),
+        ),
+    ]
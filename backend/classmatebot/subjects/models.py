@@ -1,8 +1,17 @@
-from django.db import models
+import uuid
+
+from django.conf import settings
+from django.db import models, transaction, IntegrityError
 from django.contrib import admin
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.utils import timezone
 from django.utils.html import format_html
 
 from classmatebot.subjects.prompts import generate_bites
+from classmatebot.subjects.content import invalidate_topic_content
+from classmatebot.subjects.search import index_objects
+from classmatebot.subjects.splitter import split_bites
 from classmatebot.accounts.models import Account
 # Create your models here.
 
@@ -59,12 +68,20 @@ class Topic(models.Model):
         return self.name       
 
     def generate_bites(self):
-        response = generate_bites(self.content)
-        bites = response.bites
+        bites = split_bites(self.content) if settings.BITE_LOCAL_SPLITTER else None
+        if bites is None:
+            bites = generate_bites(self.content).bites
+        return len(self.add_bites(bites))
+
+    def add_bites(self, bites):
+        """Bulk-inserts bite texts in order and returns the created Bite objects."""
         objs = Bite.objects.bulk_create(
             [Bite(topic=self, bite=bite) for bite in bites]
         )
-        return len(bites) 
+        # bulk_create skips post_save, so invalidate the topic's cached content and index the bites here.
+        invalidate_topic_content(self.subject_id, self.id)
+        index_objects(objs)
+        return objs
 
     def get_total_number_of_bites_by_topic(self):
         return self.topic_bites.count()   
@@ -145,3 +162,216 @@ class Checkpoint(models.Model):
 
     # def __str__(self):
     #     return f"{self.account} - {self.bite} ({'done' if self.completed else 'in progress'})"
+
+
+class ProgressCounterManager(models.Manager):
+    def increment(self, lookup, **amounts):
+        """
+        Bumps the counters of the row matching `lookup` with F() expressions, creating the
+        row with the amounts as starting values when it does not exist yet.
+        """
+        updates = {field: models.F(field) + amount for field, amount in amounts.items()}
+        if self.filter(**lookup).update(**updates):
+            return
+        try:
+            with transaction.atomic():
+                self.create(**lookup, **amounts)
+        except IntegrityError:
+            self.filter(**lookup).update(**updates)
+
+
+class AccountTopicProgressManager(ProgressCounterManager):
+    def record_bite_completed(self, account_id, topic_id):
+        self.increment({'account_id': account_id, 'topic_id': topic_id}, completed_bites=1)
+
+    def record_topic_completed(self, account_id, topic_id):
+        lookup = {'account_id': account_id, 'topic_id': topic_id}
+        if not self.filter(**lookup).update(is_completed=True):
+            self.get_or_create(**lookup, defaults={'is_completed': True})
+
+
+class AccountTopicProgress(models.Model):
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='account_topic_progress')
+    topic = models.ForeignKey(Topic, on_delete=models.CASCADE, related_name='topic_account_progress')
+    completed_bites = models.PositiveIntegerField(default=0)
+    is_completed = models.BooleanField(default=False)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    objects = AccountTopicProgressManager()
+
+    class Meta:
+        verbose_name = 'account topic progress'
+        verbose_name_plural = 'account topic progress'
+        unique_together = ('account', 'topic')
+
+    def __str__(self):
+        return f"{self.account} - {self.topic}: {self.completed_bites} bites"
+
+
+class AccountSubjectProgressManager(ProgressCounterManager):
+    def record_bite_completed(self, account_id, subject_id):
+        self.increment({'account_id': account_id, 'subject_id': subject_id}, completed_bites=1)
+
+    def record_topic_completed(self, account_id, subject_id):
+        self.increment({'account_id': account_id, 'subject_id': subject_id}, completed_topics=1)
+
+
+class AccountSubjectProgress(models.Model):
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name='account_subject_progress')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='subject_account_progress')
+    completed_bites = models.PositiveIntegerField(default=0)
+    completed_topics = models.PositiveIntegerField(default=0)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    objects = AccountSubjectProgressManager()
+
+    class Meta:
+        verbose_name = 'account subject progress'
+        verbose_name_plural = 'account subject progress'
+        unique_together = ('account', 'subject')
+
+    def __str__(self):
+        return f"{self.account} - {self.subject}: {self.completed_bites} bites"
+
+
+class SearchDocument(models.Model):
+    """
+    Denormalised searchable text of a Subject, Topic or Bite. On Postgres `search_vector` is
+    filled on write and GIN-indexed; elsewhere the in-process inverted index reads title/body.
+    """
+    class Kind(models.TextChoices):
+        SUBJECT = 'subject', 'Subject'
+        TOPIC = 'topic', 'Topic'
+        BITE = 'bite', 'Bite'
+
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    object_id = models.PositiveBigIntegerField()
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='search_documents')
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True, default="")
+    search_vector = SearchVectorField(null=True, editable=False)
+    date_updated = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'search document'
+        verbose_name_plural = 'search documents'
+        unique_together = ('kind', 'object_id')
+        indexes = [GinIndex(fields=['search_vector'], name='search_document_vector_gin')]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.title}"
+
+
+class SubjectEmbedding(models.Model):
+    """
+    Embedding of a subject's name, description and topics, used to find an existing course
+    close to a /generate-course request. `text_hash` skips re-embedding unchanged subjects.
+    """
+    subject = models.OneToOneField(Subject, on_delete=models.CASCADE, primary_key=True, related_name='embedding')
+    model = models.CharField(max_length=100)
+    text_hash = models.CharField(max_length=40)
+    vector = models.JSONField()
+    date_updated = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        verbose_name = 'subject embedding'
+        verbose_name_plural = 'subject embeddings'
+
+    def __str__(self):
+        return f"Embedding of subject {self.subject_id} ({self.model})"
+
+
+class CoursePublication(models.Model):
+    """
+    A course saved through the internal publish-course endpoint. The stored response lets a
+    retried request with the same idempotency key return the original ids instead of
+    publishing the course twice.
+    """
+    idempotency_key = models.CharField(max_length=100, unique=True)
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='publications')
+    result = models.JSONField()
+    date_created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'course publication'
+        verbose_name_plural = 'course publications'
+
+    def __str__(self):
+        return f"{self.idempotency_key} -> subject {self.subject_id}"
+
+
+class BackgroundJobManager(models.Manager):
+    def latest_for(self, kind, object_id):
+        return self.filter(kind=kind, object_id=object_id).order_by('-date_created').first()
+
+    def stale(self, kind, older_than):
+        """Unfinished jobs of `kind` whose last update is older than `older_than` seconds."""
+        cutoff = timezone.now() - timezone.timedelta(seconds=older_than)
+        return self.filter(kind=kind, status__in=BackgroundJob.UNFINISHED, date_updated__lt=cutoff)
+
+    def claim(self, job_id, attempt):
+        """
+        Atomically takes a queued job for start attempt number `attempt` (0 for the first) by
+        bumping `attempts` only while it still equals `attempt`. Returns the job, or None when it
+        is not queued or the attempt was already claimed, e.g. by a redelivered task message.
+        """
+        claimed = self.filter(id=job_id, status=BackgroundJob.Status.QUEUED, attempts=attempt).update(
+            attempts=models.F('attempts') + 1, date_updated=timezone.now())
+        return self.get(id=job_id) if claimed else None
+
+
+class BackgroundJob(models.Model):
+    """
+    Status record of a background job, polled at /jobs/<id>/: queued -> running (with `stage`
+    naming the current step, if the job reports steps) -> done (with `result`) or failed (with
+    `error`). Kinds are topic bites and quiz questions started by POST /topics/ and /quizzes/,
+    and "course", a /generate-course run of the ADK pipeline for the learner in `object_id`.
+    See config.jobs.JobStore.
+    """
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'Queued'
+        RUNNING = 'running', 'Running'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+
+    UNFINISHED = (Status.QUEUED, Status.RUNNING)
+    FINISHED = (Status.DONE, Status.FAILED)
+    # Moves allowed for reported progress; running -> running records a new stage.
+    TRANSITIONS = {
+        Status.QUEUED: (Status.RUNNING, Status.DONE, Status.FAILED),
+        Status.RUNNING: (Status.RUNNING, Status.DONE, Status.FAILED),
+        Status.DONE: (),
+        Status.FAILED: (),
+    }
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=50)
+    object_id = models.PositiveBigIntegerField()
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED, db_index=True)
+    stage = models.CharField(max_length=100, blank=True)
+    stages_started = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    callback_url = models.URLField(max_length=500, blank=True)
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True, db_index=True)
+    date_finished = models.DateTimeField(null=True, blank=True)
+
+    objects = BackgroundJobManager()
+
+    class Meta:
+        verbose_name = 'background job'
+        verbose_name_plural = 'background jobs'
+        indexes = [models.Index(fields=['kind', 'object_id', '-date_created'])]
+
+    def __str__(self):
+        return f"{self.kind} job {self.id.hex} for {self.object_id}: {self.status}"
+
+    @property
+    def is_finished(self):
+        return self.status in self.FINISHED
+
+    def can_move_to(self, status):
+        return status in self.TRANSITIONS[self.status]
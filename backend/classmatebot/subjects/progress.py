@@ -0,0 +1,96 @@
+from classmatebot.subjects.curriculum import get_curriculum_index
+from classmatebot.subjects.models import Checkpoint, AccountTopicProgress, AccountSubjectProgress
+
+
+class SubjectProgress:
+    """
+    An account's progress through one subject, held as a bitmap over the positions of the
+    subject's CurriculumIndex (bit i set = bite at position i completed). Next-bite, topic
+    and subject progress questions are then answered with integer bit operations.
+    """
+    def __init__(self, index, bitmap):
+        self.index = index
+        self.bitmap = bitmap
+
+    @classmethod
+    def from_completed_bites(cls, index, completed_bite_ids):
+        bitmap = 0
+        for bite_id in completed_bite_ids:
+            position = index.position_of(bite_id)
+            if position is not None:
+                bitmap |= 1 << position
+        return cls(index, bitmap)
+
+    def _count(self, start, end):
+        return ((self.bitmap >> start) & ((1 << (end - start)) - 1)).bit_count()
+
+    def is_completed(self, position):
+        return bool(self.bitmap >> position & 1)
+
+    def next_position(self):
+        """Position of the first unfinished bite in reading order, or None when everything is done."""
+        position = (~self.bitmap & (self.bitmap + 1)).bit_length() - 1
+        return position if position < len(self.index) else None
+
+    def next_bite(self):
+        """Returns (topic_id, bite_id) of the next unfinished bite, or (None, None)."""
+        position = self.next_position()
+        if position is None:
+            return None, None
+        return self.index.topic_at(position), self.index.bite_ids[position]
+
+    def topic_progress(self, topic_id):
+        """Returns (total_bites, completed_bites) for a topic."""
+        start, end = self.index.topic_range(topic_id)
+        return end - start, self._count(start, end)
+
+    def subject_progress(self):
+        """Returns (total_bites, completed_bites) for the whole subject."""
+        return len(self.index), self._count(0, len(self.index))
+
+    def mark_completed(self, position):
+        self.bitmap |= 1 << position
+
+
+class ProgressEngine:
+    """
+    Answers "next unfinished bite, topic progress, subject progress" for an account with a
+    single set-based query per subject (the account's completed bites), instead of probing
+    Milestone and Checkpoint row by row. Progress summaries are read from the materialised
+    AccountTopicProgress/AccountSubjectProgress rows instead of being counted.
+    """
+    def __init__(self, account):
+        self.account = account
+
+    def for_subject(self, subject_id, index=None):
+        index = index or get_curriculum_index(subject_id)
+        completed_bite_ids = Checkpoint.objects.filter(
+            account=self.account,
+            bite__topic__subject_id=subject_id,
+            status=Checkpoint.Status.COMPLETED,
+        ).values_list('bite_id', flat=True)
+        return SubjectProgress.from_completed_bites(index, completed_bite_ids)
+
+    def summary(self, subject_id, index=None):
+        """Subject and per-topic progress from the materialised rows, with totals from the CurriculumIndex."""
+        index = index or get_curriculum_index(subject_id)
+        completed_bites, completed_topics = AccountSubjectProgress.objects.filter(
+            account=self.account, subject_id=subject_id).values_list('completed_bites', 'completed_topics').first() or (0, 0)
+        topic_rows = dict(
+            (topic_id, (bites, done)) for topic_id, bites, done in AccountTopicProgress.objects.filter(
+                account=self.account, topic__subject_id=subject_id).values_list('topic_id', 'completed_bites', 'is_completed')
+        )
+
+        topics = []
+        for topic_id in index.topic_ids:
+            start, end = index.topic_range(topic_id)
+            bites, done = topic_rows.get(topic_id, (0, False))
+            topics.append({"topic_id": topic_id, "total_bites": end - start, "completed_bites": bites, "completed": done})
+        return {
+            "subject_id": int(subject_id),
+            "total_bites": len(index),
+            "completed_bites": completed_bites,
+            "total_topics": len(index.topic_ids),
+            "completed_topics": completed_topics,
+            "topics": topics,
+        }
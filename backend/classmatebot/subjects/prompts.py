@@ -1,13 +1,12 @@
 from langchain_core.prompts import PromptTemplate
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.output_parsers import PydanticOutputParser
 from langchain_core.exceptions import OutputParserException
-from decouple import config
 
+from wrappers.llm_chains import chains
 from classmatebot.subjects.schemas import TopicSchema, PreferencesSchema
 
 
-def generate_bites(topic: str):
+def build_bites_chain():
     bites_output_parser = PydanticOutputParser(pydantic_object=TopicSchema)
     bites_format_instructions = bites_output_parser.get_format_instructions()
     bites_template = """
@@ -49,16 +48,14 @@ def generate_bites(topic: str):
         input_variables=['topic'],
         partial_variables={'format_instructions': bites_format_instructions},
     )
-    llm = ChatGoogleGenerativeAI(google_api_key=config("GEMINI_API_KEY"), temperature=0.0, model='gemini-2.5-pro')
+    return bites_prompt, bites_output_parser
 
-    bites_response = bites_prompt | llm | bites_output_parser
-    
-    response = bites_response.invoke({"topic": topic})
-    
-    return response
 
+def generate_bites(topic: str):
+    return chains.get("generate_bites").invoke({"topic": topic})
 
-def generate_preference_content(preferences: str):
+
+def build_preference_content_chain():
     output_parser = PydanticOutputParser(pydantic_object=PreferencesSchema)
     format_instructions = output_parser.get_format_instructions()
     prompt_template = """
@@ -94,8 +91,12 @@ def generate_preference_content(preferences: str):
     
     prompt = PromptTemplate(template=prompt_template, input_variables=['preferences'], partial_variables={'format_instructions': format_instructions},)
 
-    llm = ChatGoogleGenerativeAI(google_api_key=config("GEMINI_API_KEY"), temperature=0.0, model='gemini-2.5-pro')
+    return prompt, output_parser
+
+
+def generate_preference_content(preferences: str):
+    return chains.get("generate_preference_content").invoke({"preferences": preferences})
+
 
-    chain = prompt | llm | output_parser
-    response = chain.invoke({"preferences": preferences})
-    return response
\ No newline at end of file
+chains.register("generate_bites", build_bites_chain)
+chains.register("generate_preference_content", build_preference_content_chain)
@@ -0,0 +1,82 @@
+from django.db import transaction, IntegrityError
+
+from classmatebot.subjects.models import Subject, Topic, Enrollment, CoursePublication, BackgroundJob
+from classmatebot.subjects.splitter import split_bites
+from classmatebot.subjects.tasks import generate_topic_bites_task
+from classmatebot.quizzes.models import Quiz
+from classmatebot.quizzes.tasks import generate_quiz_questions_task
+from classmatebot.chats.generation import update_job
+
+
+def _finish_job(job_id, result):
+    if job_id:
+        update_job(job_id, BackgroundJob.Status.DONE, subject_id=result["subject_id"])
+
+
+def publish_course(course, idempotency_key=None):
+    """
+    Saves a generated course (subject, topic, bites, quiz and the learner's enrollment) in one
+    transaction and returns (result, created), where result holds every new id.
+
+    `course` is the validated PublishCourseSerializer data. Bites not supplied are split locally,
+    and questions not supplied are generated by a Celery task after commit, as is an LLM bite
+    split for content the local splitter cannot handle, so the request never waits on the LLM.
+    A repeated `idempotency_key` returns the first publication's result with created=False.
+    The generation job named by `job_id`, if any, is marked done with the new subject.
+    """
+    job_id = course.get('job_id')
+    if idempotency_key:
+        existing = CoursePublication.objects.filter(idempotency_key=idempotency_key).values_list('result', flat=True).first()
+        if existing is not None:
+            _finish_job(job_id, existing)
+            return existing, False
+
+    bites = course.get('bites') or split_bites(course['topic_content'])
+    questions = course.get('questions')
+    try:
+        with transaction.atomic():
+            subject = Subject.objects.create_subject_by_user(name=course['subject_name'], description=course['subject_description'])
+            topic = Topic.objects.create(subject=subject, name=course['topic_name'], description=course['topic_description'],
+                                         content=course['topic_content'])
+            bite_objs = topic.add_bites(bites) if bites else []
+
+            quiz = Quiz(subject=subject, topic=topic, number_of_options=course['number_of_options'],
+                        number_of_questions=len(questions) if questions else course['number_of_questions'])
+            if questions:
+                ingested = Quiz.objects.bulk_ingest([(quiz, Quiz.objects.parse_generated_questions(questions))])
+                question_ids = [question['question_id'] for question in ingested[quiz.id]]
+            else:
+                quiz.save()
+                question_ids = []
+
+            enrollment = None
+            if course.get('account'):
+                enrollment = Enrollment.objects.create(subject=subject, account=course['account'])
+
+            result = {
+                "subject_id": subject.id,
+                "topic_id": topic.id,
+                "bite_ids": [bite.id for bite in bite_objs],
+                "quiz_id": quiz.id,
+                "question_ids": question_ids,
+                "enrollment_id": enrollment.id if enrollment else None,
+                "pending": [name for name, done in (("bites", bites), ("questions", questions)) if not done],
+            }
+            if idempotency_key:
+                CoursePublication.objects.create(idempotency_key=idempotency_key, subject=subject, result=result)
+            _finish_job(job_id, result)
+
+            if not bites:
+                transaction.on_commit(lambda: generate_topic_bites_task.delay(topic.id))
+            if not questions:
+                transaction.on_commit(lambda: generate_quiz_questions_task.delay(quiz.id))
+    except IntegrityError:
+        # A concurrent request with the same key won the race; its transaction has committed.
+        if not idempotency_key:
+            raise
+        existing = CoursePublication.objects.filter(idempotency_key=idempotency_key).values_list('result', flat=True).first()
+        if existing is None:
+            raise
+        _finish_job(job_id, existing)
+        return existing, False
+    return result, True
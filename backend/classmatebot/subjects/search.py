@@ -0,0 +1,291 @@
+import heapq
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter, namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+
+
+logger = logging.getLogger(__name__)
+
+SearchResult = namedtuple("SearchResult", ["kind", "object_id", "subject_id", "title", "snippet", "score"])
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in is it its of on or that the this to was what when where "
+    "which who why will with".split()
+)
+TITLE_WEIGHT = 3
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall(text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+
+def document_fields(instance):
+    """Returns the SearchDocument fields for a Subject, Topic or Bite instance."""
+    from classmatebot.subjects.models import Subject, Topic, SearchDocument
+
+    if isinstance(instance, Subject):
+        return dict(kind=SearchDocument.Kind.SUBJECT, object_id=instance.id, subject_id=instance.id,
+                    title=instance.name, body=instance.description)
+    if isinstance(instance, Topic):
+        return dict(kind=SearchDocument.Kind.TOPIC, object_id=instance.id, subject_id=instance.subject_id,
+                    title=instance.name, body=f"{instance.description}\n{instance.content}")
+    return dict(kind=SearchDocument.Kind.BITE, object_id=instance.id, subject_id=instance.topic.subject_id,
+                title=(instance.name or f"Bite {instance.id}")[:200], body=instance.bite)
+
+
+def index_objects(instances):
+    """Upserts the SearchDocuments of saved Subject/Topic/Bite instances (one bulk statement per call)."""
+    from classmatebot.subjects.models import SearchDocument
+
+    documents = [SearchDocument(**document_fields(instance)) for instance in instances]
+    if not documents:
+        return
+    SearchDocument.objects.bulk_create(
+        documents,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['subject', 'title', 'body', 'date_updated'],
+    )
+    if connection.vendor == 'postgresql':
+        object_ids = {}
+        for document in documents:
+            object_ids.setdefault(document.kind, []).append(document.object_id)
+        for kind, ids in object_ids.items():
+            SearchDocument.objects.filter(kind=kind, object_id__in=ids).update(search_vector=_search_vector())
+
+
+def remove_objects(kind, object_ids):
+    from classmatebot.subjects.models import SearchDocument
+
+    SearchDocument.objects.filter(kind=kind, object_id__in=object_ids).delete()
+
+
+def _search_vector():
+    config = settings.SEARCH_CONFIG
+    return SearchVector('title', weight='A', config=config) + SearchVector('body', weight='B', config=config)
+
+
+def make_snippet(text, terms, width=160):
+    """A window of `text` around the first occurrence of any of `terms`."""
+    lowered = text.lower()
+    positions = [position for position in (lowered.find(term) for term in terms) if position >= 0]
+    start = max(min(positions) - width // 4, 0) if positions else 0
+    snippet = " ".join(text[start:start + width].split())
+    return f"{'…' if start else ''}{snippet}{'…' if start + width < len(text) else ''}"
+
+
+def within_edits(a, b, max_edits):
+    """True if the Levenshtein distance between `a` and `b` is at most `max_edits`."""
+    if abs(len(a) - len(b)) > max_edits:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > max_edits:
+            return False
+        previous = current
+    return previous[-1] <= max_edits
+
+
+def _deletions(term):
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+class InvertedIndex:
+    """
+    In-process inverted index with BM25 ranking. Query terms missing from the vocabulary are
+    matched through a single-deletion neighbourhood map to vocabulary terms one edit away (up to
+    two for long words), so typos still find results.
+    """
+    k1 = 1.2
+    b = 0.75
+    fuzzy_penalty = 0.5
+
+    def __init__(self):
+        self.postings = {}
+        self.doc_terms = {}
+        self.doc_lengths = {}
+        self.total_length = 0
+        self.deletes = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.doc_terms)
+
+    def add(self, doc_id, title, body):
+        counts = Counter(tokenize(body))
+        for token in tokenize(title):
+            counts[token] += TITLE_WEIGHT
+        with self._lock:
+            self.remove(doc_id)
+            self.doc_terms[doc_id] = counts
+            length = sum(counts.values())
+            self.doc_lengths[doc_id] = length
+            self.total_length += length
+            for term, frequency in counts.items():
+                postings = self.postings.get(term)
+                if postings is None:
+                    postings = self.postings[term] = {}
+                    for deletion in _deletions(term):
+                        self.deletes.setdefault(deletion, set()).add(term)
+                postings[doc_id] = frequency
+
+    def remove(self, doc_id):
+        with self._lock:
+            counts = self.doc_terms.pop(doc_id, None)
+            if counts is None:
+                return
+            self.total_length -= self.doc_lengths.pop(doc_id)
+            for term in counts:
+                postings = self.postings[term]
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[term]
+                    for deletion in _deletions(term):
+                        neighbours = self.deletes.get(deletion)
+                        if neighbours is not None:
+                            neighbours.discard(term)
+                            if not neighbours:
+                                del self.deletes[deletion]
+
+    def expand(self, term):
+        """Returns [(vocabulary_term, weight)] for a query term: the term itself, or its close misspellings."""
+        if term in self.postings:
+            return [(term, 1.0)]
+        if len(term) < 4:
+            return []
+        max_edits = 2 if len(term) >= 8 else 1
+        candidates = set(self.deletes.get(term, ()))
+        for deletion in _deletions(term):
+            if deletion in self.postings:
+                candidates.add(deletion)
+            candidates.update(self.deletes.get(deletion, ()))
+        return [(candidate, self.fuzzy_penalty) for candidate in candidates if within_edits(term, candidate, max_edits)]
+
+    def search(self, query, limit=10):
+        """Returns up to `limit` (doc_id, score) pairs, best first."""
+        with self._lock:
+            documents = len(self.doc_terms)
+            if not documents:
+                return []
+            average_length = self.total_length / documents
+            scores = {}
+            for term in dict.fromkeys(tokenize(query)):
+                for vocabulary_term, weight in self.expand(term):
+                    postings = self.postings[vocabulary_term]
+                    idf = math.log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for doc_id, frequency in postings.items():
+                        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / average_length)
+                        scores[doc_id] = scores.get(doc_id, 0.0) + weight * idf * frequency * (self.k1 + 1) / (frequency + norm)
+            return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+class LocalSearchBackend:
+    """
+    Serves search from an InvertedIndex built from SearchDocument rows. Each process catches up
+    with rows written elsewhere at most every SEARCH_INDEX_SYNC_INTERVAL seconds; deleted rows
+    are dropped when results are loaded. Every process holds the whole table in memory, so this
+    backend is only used on development databases (see get_search_backend).
+    """
+    def __init__(self, sync_interval=None):
+        self.index = InvertedIndex()
+        self.sync_interval = settings.SEARCH_INDEX_SYNC_INTERVAL if sync_interval is None else sync_interval
+        self.synced_to = None
+        self.last_sync = 0.0
+        self._sync_lock = threading.Lock()
+
+    def sync(self, force=False):
+        from classmatebot.subjects.models import SearchDocument
+
+        if not force and time.monotonic() - self.last_sync < self.sync_interval:
+            return
+        with self._sync_lock:
+            documents = SearchDocument.objects.order_by('date_updated')
+            if self.synced_to is not None:
+                # Re-read a margin before the last row seen: rows committed late or stamped by a
+                # server with a lagging clock would otherwise be skipped. Re-adding is idempotent.
+                documents = documents.filter(date_updated__gte=self.synced_to - timedelta(seconds=30))
+            for doc_id, title, body, date_updated in documents.values_list('id', 'title', 'body', 'date_updated').iterator(chunk_size=5000):
+                self.index.add(doc_id, title, body)
+                self.synced_to = date_updated
+            self.last_sync = time.monotonic()
+
+    def search(self, query, limit=10):
+        from classmatebot.subjects.models import SearchDocument
+
+        self.sync()
+        hits = self.index.search(query, limit * 2)
+        documents = SearchDocument.objects.only('kind', 'object_id', 'subject_id', 'title', 'body').in_bulk([doc_id for doc_id, _ in hits])
+        terms = tokenize(query)
+        results = []
+        for doc_id, score in hits:
+            document = documents.get(doc_id)
+            if document is None:
+                self.index.remove(doc_id)
+                continue
+            results.append(SearchResult(document.kind, document.object_id, document.subject_id, document.title,
+                                        make_snippet(document.body, terms), round(score, 4)))
+        return results[:limit]
+
+
+class PostgresSearchBackend:
+    """Full-text search over the GIN-indexed SearchDocument.search_vector column."""
+
+    def search(self, query, limit=10):
+        from classmatebot.subjects.models import SearchDocument
+
+        config = settings.SEARCH_CONFIG
+        search_query = SearchQuery(query, search_type='websearch', config=config)
+        documents = SearchDocument.objects.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F('search_vector'), search_query),
+            snippet=SearchHeadline('body', search_query, config=config, max_words=25, min_words=10),
+        ).order_by('-rank')[:limit]
+        return [
+            SearchResult(document.kind, document.object_id, document.subject_id, document.title,
+                         " ".join(document.snippet.split()), round(document.rank, 4))
+            for document in documents
+        ]
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_search_backend():
+    """
+    Postgres full-text search on Postgres; the in-process index only on other (development)
+    databases, since it loads every SearchDocument into each process.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend = settings.SEARCH_BACKEND
+                if connection.vendor == 'postgresql':
+                    if backend == 'local':
+                        logger.warning("SEARCH_BACKEND=local is for development databases; using Postgres full-text search.")
+                    backend = 'postgres'
+                elif backend == 'auto':
+                    backend = 'local'
+                _backend = PostgresSearchBackend() if backend == 'postgres' else LocalSearchBackend()
+    return _backend
+
+
+def search(query, limit=10):
+    """Searches subjects, topics and bites; returns SearchResult tuples, best match first."""
+    if not tokenize(query):
+        return []
+    return get_search_backend().search(query, limit)
@@ -0,0 +1,74 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from classmatebot.subjects.models import (Subject, Topic, Bite, Milestone, Checkpoint, SearchDocument,
+                                          AccountTopicProgress, AccountSubjectProgress)
+from classmatebot.subjects.search import index_objects, remove_objects
+from classmatebot.subjects.content import invalidate_subject_content, invalidate_topic_content
+from classmatebot.subjects.curriculum import invalidate_bite
+from classmatebot.subjects.tasks import embed_subjects_task
+
+
+@receiver([post_save, post_delete], sender=Subject)
+def invalidate_content_on_subject_change(sender, instance, **kwargs):
+    topic_ids = list(Topic.objects.filter(subject_id=instance.id).values_list('id', flat=True))
+    invalidate_subject_content(instance.id, topic_ids)
+
+
+@receiver([post_save, post_delete], sender=Topic)
+def invalidate_content_on_topic_change(sender, instance, **kwargs):
+    invalidate_topic_content(instance.subject_id, instance.id)
+
+
+@receiver([post_save, post_delete], sender=Bite)
+def invalidate_content_on_bite_change(sender, instance, **kwargs):
+    invalidate_bite(instance.id)
+    subject_id = Topic.objects.filter(id=instance.topic_id).values_list('subject_id', flat=True).first()
+    if subject_id is not None:
+        invalidate_topic_content(subject_id, instance.topic_id)
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_save, sender=Topic)
+@receiver(post_save, sender=Bite)
+def index_content_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_objects([instance])
+
+
+@receiver(post_delete, sender=Topic)
+@receiver(post_delete, sender=Bite)
+def unindex_content_on_delete(sender, instance, **kwargs):
+    kind = SearchDocument.Kind.TOPIC if sender is Topic else SearchDocument.Kind.BITE
+    remove_objects(kind, [instance.id])
+
+
+@receiver(post_save, sender=Subject)
+@receiver(post_save, sender=Topic)
+def embed_subject_on_save(sender, instance, raw=False, **kwargs):
+    if raw or settings.COURSE_DEDUP_THRESHOLD <= 0:
+        return
+    subject_id = instance.id if sender is Subject else instance.subject_id
+    transaction.on_commit(
+        lambda: embed_subjects_task.apply_async(([subject_id],), countdown=settings.SUBJECT_EMBEDDING_DELAY)
+    )
+
+
+@receiver(post_save, sender=Checkpoint)
+def update_progress_on_checkpoint(sender, instance, created, raw=False, **kwargs):
+    if raw or not created or instance.status != Checkpoint.Status.COMPLETED:
+        return
+    topic_id, subject_id = Bite.objects.filter(id=instance.bite_id).values_list('topic_id', 'topic__subject_id').get()
+    AccountTopicProgress.objects.record_bite_completed(instance.account_id, topic_id)
+    AccountSubjectProgress.objects.record_bite_completed(instance.account_id, subject_id)
+
+
+@receiver(post_save, sender=Milestone)
+def update_progress_on_milestone(sender, instance, created, raw=False, **kwargs):
+    if raw or not created or not instance.completed:
+        return
+    subject_id = Topic.objects.filter(id=instance.topic_id).values_list('subject_id', flat=True).get()
+    AccountTopicProgress.objects.record_topic_completed(instance.account_id, instance.topic_id)
+    AccountSubjectProgress.objects.record_topic_completed(instance.account_id, subject_id)
@@ -0,0 +1,201 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import timedelta
+
+import numpy as np
+from decouple import config
+from django.conf import settings
+
+from config.caching import LRUCache
+
+
+logger = logging.getLogger(__name__)
+
+_embeddings = None
+_query_vectors = LRUCache(maxsize=1024, ttl=24 * 60 * 60)
+
+
+def get_embeddings():
+    global _embeddings
+    if _embeddings is None:
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+        _embeddings = GoogleGenerativeAIEmbeddings(
+            model=settings.EMBEDDING_MODEL,
+            google_api_key=config("GEMINI_API_KEY"),
+            task_type="SEMANTIC_SIMILARITY",
+        )
+    return _embeddings
+
+
+def normalize(vector):
+    norm = math.sqrt(sum(value * value for value in vector))
+    return [value / norm for value in vector] if norm else list(vector)
+
+
+def text_hash(text):
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+class VectorIndex:
+    """
+    Exact cosine-similarity index over unit vectors. Queries are a single NumPy matrix-vector
+    product, fast enough for catalogues in the tens of thousands.
+    """
+    def __init__(self):
+        self.ids = []
+        self.vectors = []
+        self.positions = {}
+        self._matrix = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, item_id, vector):
+        vector = normalize(vector)
+        with self._lock:
+            position = self.positions.get(item_id)
+            if position is None:
+                self.positions[item_id] = len(self.ids)
+                self.ids.append(item_id)
+                self.vectors.append(vector)
+            else:
+                self.vectors[position] = vector
+            self._matrix = None
+
+    def remove(self, item_id):
+        with self._lock:
+            position = self.positions.pop(item_id, None)
+            if position is None:
+                return
+            last_id, last_vector = self.ids.pop(), self.vectors.pop()
+            if position < len(self.ids):
+                self.ids[position], self.vectors[position] = last_id, last_vector
+                self.positions[last_id] = position
+            self._matrix = None
+
+    def search(self, vector, k=5):
+        """Returns up to `k` (item_id, cosine_similarity) pairs, most similar first."""
+        query = normalize(vector)
+        with self._lock:
+            if not self.ids:
+                return []
+            if self._matrix is None:
+                self._matrix = np.asarray(self.vectors, dtype=np.float32)
+            scores = self._matrix @ np.asarray(query, dtype=np.float32)
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(self.ids[i], float(scores[i])) for i in top]
+
+
+class SubjectSimilarityIndex:
+    """
+    VectorIndex of SubjectEmbedding rows for the configured EMBEDDING_MODEL. Like the local search
+    index, each process catches up with rows written elsewhere at most every `sync_interval` seconds.
+    """
+    def __init__(self, sync_interval=None):
+        self.index = VectorIndex()
+        self.sync_interval = settings.SEARCH_INDEX_SYNC_INTERVAL if sync_interval is None else sync_interval
+        self.synced_to = None
+        self.last_sync = 0.0
+        self._sync_lock = threading.Lock()
+
+    def sync(self, force=False):
+        from classmatebot.subjects.models import SubjectEmbedding
+
+        if not force and time.monotonic() - self.last_sync < self.sync_interval:
+            return
+        with self._sync_lock:
+            rows = SubjectEmbedding.objects.filter(model=settings.EMBEDDING_MODEL).order_by('date_updated')
+            if self.synced_to is not None:
+                rows = rows.filter(date_updated__gte=self.synced_to - timedelta(seconds=30))
+            for subject_id, vector, date_updated in rows.values_list('subject_id', 'vector', 'date_updated').iterator(chunk_size=1000):
+                self.index.add(subject_id, vector)
+                self.synced_to = date_updated
+            self.last_sync = time.monotonic()
+
+    def nearest(self, vector, k=5):
+        self.sync()
+        return self.index.search(vector, k)
+
+
+subject_index = SubjectSimilarityIndex()
+
+
+def subject_texts(subject_ids):
+    """Returns {subject_id: text} describing each subject by its name, description and topics."""
+    from classmatebot.subjects.models import Subject, Topic
+
+    texts = {
+        subject_id: [name, description]
+        for subject_id, name, description in Subject.objects.filter(id__in=subject_ids).values_list('id', 'name', 'description')
+    }
+    for subject_id, name, description in Topic.objects.filter(subject_id__in=texts).order_by('id').values_list(
+            'subject_id', 'name', 'description'):
+        texts[subject_id].append(f"{name}: {description}")
+    return {subject_id: "\n".join(parts) for subject_id, parts in texts.items()}
+
+
+def embed_subjects(subject_ids, force=False):
+    """(Re-)embeds subjects whose text changed since they were last embedded. Returns how many were embedded."""
+    from classmatebot.subjects.models import SubjectEmbedding
+
+    texts = subject_texts(subject_ids)
+    hashes = dict(SubjectEmbedding.objects.filter(subject_id__in=texts, model=settings.EMBEDDING_MODEL).values_list(
+        'subject_id', 'text_hash'))
+    pending = [subject_id for subject_id, text in texts.items() if force or hashes.get(subject_id) != text_hash(text)]
+    if not pending:
+        return 0
+
+    vectors = get_embeddings().embed_documents([texts[subject_id] for subject_id in pending])
+    SubjectEmbedding.objects.bulk_create(
+        [SubjectEmbedding(subject_id=subject_id, model=settings.EMBEDDING_MODEL, text_hash=text_hash(texts[subject_id]),
+                          vector=vector) for subject_id, vector in zip(pending, vectors)],
+        update_conflicts=True,
+        unique_fields=['subject'],
+        update_fields=['model', 'text_hash', 'vector', 'date_updated'],
+    )
+    return len(pending)
+
+
+def embed_query(text):
+    key = " ".join(text.lower().split())
+    vector = _query_vectors.get(key)
+    if vector is None:
+        vector = get_embeddings().embed_query(key)
+        _query_vectors.set(key, vector)
+    return vector
+
+
+def find_similar_subject(preferences, threshold=None):
+    """
+    Returns (subject_id, similarity) of the existing subject closest to a course request, or None
+    when nothing reaches `threshold` (COURSE_DEDUP_THRESHOLD by default) or embedding fails.
+    """
+    from classmatebot.subjects.models import Subject
+
+    threshold = settings.COURSE_DEDUP_THRESHOLD if threshold is None else threshold
+    if threshold <= 0:
+        return None
+    subject_index.sync()
+    if not len(subject_index.index):
+        return None
+
+    try:
+        vector = embed_query(preferences)
+    except Exception as e:
+        logger.warning(f"Could not embed course request, generating a new course: {e}")
+        return None
+
+    candidates = [(subject_id, score) for subject_id, score in subject_index.nearest(vector) if score >= threshold]
+    existing = set(Subject.objects.filter(id__in=[subject_id for subject_id, _ in candidates]).values_list('id', flat=True))
+    for subject_id, score in candidates:
+        if subject_id in existing:
+            return subject_id, score
+        subject_index.index.remove(subject_id)
+    return None
@@ -0,0 +1,111 @@
+import re
+
+from django.conf import settings
+
+
+BITE_BREAK_RE = re.compile(r"\s*\[\s*BITE[\s_-]*BREAK\s*\]\s*", re.IGNORECASE)
+PARAGRAPH_RE = re.compile(r"\n\s*\n")
+SENTENCE_RE = re.compile(r"(?<=[.!?…])\s+")
+HEADING_RE = re.compile(r"^\s*(#{1,6}\s+\S.*|\*{1,2}[^*\n]{2,80}\*{1,2}:?|[^\n.!?]{2,80}:)\s*$")
+
+
+def _fit(text, max_chars):
+    """Splits `text` into pieces of at most `max_chars`, at paragraph, then sentence, then word boundaries."""
+    if len(text) <= max_chars:
+        return [text]
+    for separator_re, joiner in ((PARAGRAPH_RE, "\n\n"), (SENTENCE_RE, " ")):
+        parts = [part.strip() for part in separator_re.split(text) if part.strip()]
+        if len(parts) > 1:
+            return _pack(parts, max_chars, joiner)
+
+    pieces, current = [], ""
+    for word in text.split():
+        while len(word) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(word[:max_chars])
+            word = word[max_chars:]
+        if current and len(current) + 1 + len(word) > max_chars:
+            pieces.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _pack(parts, max_chars, joiner):
+    """Greedily joins consecutive parts while they fit in `max_chars`; oversized parts are split further."""
+    pieces, current = [], ""
+    for part in parts:
+        for piece in _fit(part, max_chars):
+            if current and len(current) + len(joiner) + len(piece) <= max_chars:
+                current = f"{current}{joiner}{piece}"
+            else:
+                if current:
+                    pieces.append(current)
+                current = piece
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _sections_by_heading(text):
+    sections, current = [], []
+    for line in text.splitlines():
+        if HEADING_RE.match(line) and any(existing.strip() for existing in current):
+            sections.append("\n".join(current).strip())
+            current = []
+        current.append(line)
+    if current:
+        sections.append("\n".join(current).strip())
+    return [section for section in sections if section]
+
+
+def _merge_short(sections, min_chars, max_chars):
+    """Appends sections shorter than `min_chars` to the following one (or the previous one, at the end)."""
+    merged, carry = [], ""
+    for section in sections:
+        section = f"{carry}\n\n{section}" if carry else section
+        if len(section) < min_chars:
+            carry = section
+            continue
+        merged.append(section)
+        carry = ""
+    if carry:
+        if merged and len(merged[-1]) + 2 + len(carry) <= max_chars:
+            merged[-1] = f"{merged[-1]}\n\n{carry}"
+        else:
+            merged.append(carry)
+    return merged
+
+
+def split_bites(content, max_chars=None, min_chars=None):
+    """
+    Splits topic content into bites without calling the LLM, or returns None when the content has
+    no structure to split on and should be sent to the LLM splitter.
+
+    Sections come from `[BITE_BREAK]` markers if present, otherwise from headings, otherwise from
+    paragraphs. Sections longer than `max_chars` (BITE_MAX_CHARS, sized to fit one WhatsApp message
+    with the lesson framing) are split at paragraph, sentence and word boundaries; heading and
+    paragraph sections shorter than `min_chars` are merged into their neighbour.
+    """
+    max_chars = max_chars or settings.BITE_MAX_CHARS
+    min_chars = settings.BITE_MIN_CHARS if min_chars is None else min_chars
+    content = (content or "").replace("\r\n", "\n").strip()
+    if not content:
+        return []
+
+    if BITE_BREAK_RE.search(content):
+        sections = [section.strip() for section in BITE_BREAK_RE.split(content) if section.strip()]
+    else:
+        sections = _sections_by_heading(content)
+        if len(sections) < 2:
+            sections = [part.strip() for part in PARAGRAPH_RE.split(content) if part.strip()]
+        if len(sections) < 2:
+            return [content] if len(content) <= max_chars else None
+        sections = _merge_short(sections, min_chars, max_chars)
+
+    return [piece for section in sections for piece in _fit(section, max_chars)]
@@ -0,0 +1,30 @@
+import logging
+
+from celery import shared_task
+
+from config.jobs import job_store, retryable_errors, TRANSIENT_ERRORS
+from classmatebot.subjects.models import Topic
+from classmatebot.subjects.similarity import embed_subjects
+
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(ignore_result=True)
+def embed_subjects_task(subject_ids):
+    try:
+        embed_subjects(subject_ids)
+    except Exception as e:
+        logger.warning(f"Embedding subjects {subject_ids} failed: {e}")
+
+
+@shared_task(bind=True, ignore_result=True, autoretry_for=TRANSIENT_ERRORS,
+             retry_backoff=15, retry_backoff_max=10 * 60, retry_jitter=True, max_retries=5)
+def generate_topic_bites_task(self, topic_id, job_id=None):
+    with job_store.track(job_id, retryable=retryable_errors(self)) as outcome:
+        topic = Topic.objects.filter(id=topic_id).first()
+        if topic is None:
+            raise Topic.DoesNotExist(f"Topic {topic_id} no longer exists.")
+        if not topic.topic_bites.exists():
+            topic.generate_bites()
+        outcome["result"] = {"topic_id": topic.id, "bite_ids": list(topic.topic_bites.order_by('id').values_list('id', flat=True))}
@@ -0,0 +1,48 @@
+import statistics
+import time
+from contextlib import contextmanager
+
+
+def percentile(samples, pct):
+    """Returns the pct-th percentile (0-100) of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize_latencies(samples, elapsed):
+    """
+    Summarises per-operation latencies (seconds) measured over a run that took
+    `elapsed` seconds of wall-clock time.
+    """
+    count = len(samples)
+    return {
+        "count": count,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(count / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(samples) * 1000, 2) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+    }
+
+
+def format_summary(label, summary):
+    return (
+        f"{label}: {summary['count']} ops in {summary['elapsed_s']}s "
+        f"({summary['throughput_per_s']}/s) "
+        f"mean={summary['mean_ms']}ms p50={summary['p50_ms']}ms "
+        f"p95={summary['p95_ms']}ms p99={summary['p99_ms']}ms"
+    )
+
+
+@contextmanager
+def timed(samples):
+    """Appends the duration of the wrapped block (seconds) to `samples`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        samples.append(time.perf_counter() - started)
@@ -0,0 +1,151 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# KEYS: value key, version key. ARGV: serialized value, version, timeout in seconds (0 = none).
+SET_IF_NEWER_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[2]) or '-1')
+if tonumber(ARGV[2]) < current then
+    return 0
+end
+if tonumber(ARGV[3]) > 0 then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[3])
+    redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+else
+    redis.call('SET', KEYS[1], ARGV[1])
+    redis.call('SET', KEYS[2], ARGV[2])
+end
+return 1
+"""
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache with an optional per-entry TTL (seconds).
+    """
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                value, expires_at = item
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SharedCache:
+    """
+    Thin wrapper around a Django cache alias (Redis in production) that logs and
+    swallows backend errors, so an unavailable Redis degrades to a cache miss
+    instead of failing the request.
+    """
+    def __init__(self, alias="default"):
+        self.alias = alias
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def get(self, key, default=None):
+        try:
+            return self.backend.get(key, default)
+        except Exception as e:
+            logger.warning(f"Shared cache get failed for {key}: {e}")
+            return default
+
+    def set(self, key, value, timeout=None):
+        try:
+            self.backend.set(key, value, timeout)
+        except Exception as e:
+            logger.warning(f"Shared cache set failed for {key}: {e}")
+
+    def delete(self, key):
+        try:
+            self.backend.delete(key)
+        except Exception as e:
+            logger.warning(f"Shared cache delete failed for {key}: {e}")
+
+    def add(self, key, value, timeout=None):
+        """Sets `key` only if it is absent. Returns True when set, and also when the backend is unreachable."""
+        try:
+            return self.backend.add(key, value, timeout)
+        except Exception as e:
+            logger.warning(f"Shared cache add failed for {key}: {e}")
+            return True
+
+    def incr(self, key, delta=1):
+        """Atomically increments an integer value; returns None if the key is missing or the backend failed."""
+        try:
+            return self.backend.incr(key, delta)
+        except ValueError:
+            return None
+        except Exception as e:
+            logger.warning(f"Shared cache incr failed for {key}: {e}")
+            return None
+
+    def set_if_newer(self, key, value, version, timeout=None):
+        """
+        Sets `key` unless a value with a higher `version` was already set through here, so a
+        delayed write cannot replace a newer one. The version is kept in `<key>:version`, which
+        `delete(key)` leaves in place. Atomic on Redis; a get-then-set elsewhere. Returns True when set.
+        """
+        version_key = f"{key}:version"
+        try:
+            backend = self.backend
+            if isinstance(backend, RedisCache):
+                ttl = backend.get_backend_timeout(timeout) or 0
+                client = backend._cache.get_client(key, write=True)
+                return bool(client.eval(
+                    SET_IF_NEWER_SCRIPT, 2,
+                    backend.make_and_validate_key(key), backend.make_and_validate_key(version_key),
+                    backend._cache._serializer.dumps(value), version, int(ttl),
+                ))
+            current = backend.get(version_key)
+            if current is not None and current > version:
+                return False
+            backend.set_many({key: value, version_key: version}, timeout)
+            return True
+        except Exception as e:
+            logger.warning(f"Shared cache set_if_newer failed for {key}: {e}")
+            return False
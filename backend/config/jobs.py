@@ -0,0 +1,183 @@
+import logging
+import uuid
+from contextlib import contextmanager
+
+import httpx
+from celery import shared_task
+from django.apps import apps
+from django.conf import settings
+from django.db import OperationalError, transaction
+from django.utils import timezone
+
+from wrappers.llm_chains import TRANSIENT_LLM_ERRORS
+
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying a generation task for: LLM outages and rate limits, dropped connections
+# and database hiccups. Anything else (bad content, a deleted object) fails the job at once.
+TRANSIENT_ERRORS = TRANSIENT_LLM_ERRORS + (httpx.TransportError, OperationalError)
+
+
+class JobStore:
+    """
+    Status records for background jobs, stored as subjects.BackgroundJob rows so clients can
+    poll them by id across restarts and cache evictions; finished records are purged after
+    GENERATION_JOB_TTL seconds. A record holds the job's kind, the object it works on, its
+    parameters, its status (and current stage, for jobs that report one), its result or error
+    and an optional callback URL that receives the finished record. Records are handed out as
+    dicts keyed like the API response.
+    """
+    @property
+    def model(self):
+        # Looked up lazily: the subjects app imports this module while its models load.
+        return apps.get_model('subjects', 'BackgroundJob')
+
+    def as_dict(self, job):
+        return {
+            "id": job.id.hex,
+            "kind": job.kind,
+            "object_id": job.object_id,
+            "params": job.params,
+            "status": job.status,
+            "stage": job.stage,
+            "stages_started": job.stages_started,
+            "result": job.result,
+            "error": job.error or None,
+            "callback_url": job.callback_url or None,
+            "date_created": job.date_created.isoformat(),
+            "date_updated": job.date_updated.isoformat(),
+        }
+
+    @staticmethod
+    def _uuid(job_id):
+        try:
+            return uuid.UUID(str(job_id))
+        except ValueError:
+            return None
+
+    def create(self, kind, object_id, callback_url=None, params=None):
+        """Saves a queued record; a failed write raises, so no job is queued that could not be polled."""
+        job = self.model.objects.create(kind=kind, object_id=object_id, params=params or {}, callback_url=callback_url or "")
+        return self.as_dict(job)
+
+    def get(self, job_id):
+        job_id = self._uuid(job_id)
+        job = self.model.objects.filter(id=job_id).first() if job_id else None
+        return self.as_dict(job) if job else None
+
+    def latest(self, kind, object_id):
+        job = self.model.objects.latest_for(kind, object_id)
+        return self.as_dict(job) if job else None
+
+    def stale(self, kind, older_than):
+        """Ids of unfinished `kind` jobs with no update for `older_than` seconds."""
+        return [job_id.hex for job_id in self.model.objects.stale(kind, older_than).values_list('id', flat=True)]
+
+    def claim(self, job_id, attempt):
+        """See BackgroundJobManager.claim; returns the claimed record or None."""
+        job_id = self._uuid(job_id)
+        job = self.model.objects.claim(job_id, attempt) if job_id else None
+        return self.as_dict(job) if job else None
+
+    def update(self, job_id, **fields):
+        fields["error"] = fields.get("error") or ""
+        if fields.get("status") in self.model.FINISHED:
+            fields["date_finished"] = timezone.now()
+        if not self.model.objects.filter(id=job_id).update(**fields, date_updated=timezone.now()):
+            return None
+        return self.get(job_id)
+
+    def transition(self, job_id, status, stage="", error="", result=None):
+        """
+        Moves a job to `status` if BackgroundJob.TRANSITIONS allows it, counting a new `stage`
+        when it changes and keeping the earlier error and result unless new ones are given.
+        Returns (job, moved), with job None when it does not exist.
+        """
+        job_id = self._uuid(job_id)
+        if job_id is None:
+            return None, False
+        with transaction.atomic():
+            job = self.model.objects.select_for_update().filter(id=job_id).first()
+            if job is None or not job.can_move_to(status):
+                return (self.as_dict(job) if job else None), False
+
+            if stage and stage != job.stage:
+                job.stage = stage
+                job.stages_started += 1
+            job.status = status
+            job.error = error or job.error
+            job.result = result or job.result
+            if job.is_finished:
+                job.date_finished = timezone.now()
+            job.save()
+        return self.as_dict(job), True
+
+    def purge(self, older_than):
+        """Deletes finished records last updated more than `older_than` seconds ago; returns how many."""
+        cutoff = timezone.now() - timezone.timedelta(seconds=older_than)
+        deleted, _ = self.model.objects.filter(status__in=self.model.FINISHED, date_updated__lt=cutoff).delete()
+        return deleted
+
+    @contextmanager
+    def track(self, job_id, retryable=()):
+        """
+        Marks the job running for the duration of the block, then done with the value the block
+        assigns to `outcome["result"]`, or failed with the exception it raised (which is re-raised).
+        Either way the callback, if any, is queued. An exception of a `retryable` type instead puts
+        the job back to queued for the task's next attempt. A missing `job_id` tracks nothing.
+        """
+        outcome = {"result": None}
+        if not job_id:
+            yield outcome
+            return
+
+        Status = self.model.Status
+        self.update(job_id, status=Status.RUNNING)
+        try:
+            yield outcome
+        except retryable as e:
+            self.update(job_id, status=Status.QUEUED, error=str(e))
+            raise
+        except Exception as e:
+            job = self.update(job_id, status=Status.FAILED, error=str(e))
+            self._notify(job)
+            raise
+        job = self.update(job_id, status=Status.DONE, result=outcome["result"])
+        self._notify(job)
+
+    def _notify(self, job):
+        if job and job["callback_url"]:
+            deliver_job_callback_task.delay(job["id"])
+
+
+job_store = JobStore()
+
+
+def public_job(job):
+    """The job record as returned to API clients."""
+    return {key: value for key, value in job.items() if key != "callback_url"}
+
+
+def retryable_errors(task):
+    """The errors `task` will still autoretry on, for JobStore.track: none once its retries are spent."""
+    return task.autoretry_for if task.request.retries < task.max_retries else ()
+
+
+@shared_task(bind=True, ignore_result=True, max_retries=5)
+def deliver_job_callback_task(self, job_id):
+    """POSTs the finished job record to its callback URL, retrying with backoff on errors."""
+    job = job_store.get(job_id)
+    if job is None or not job["callback_url"]:
+        return
+    try:
+        response = httpx.post(job["callback_url"], json=public_job(job), timeout=settings.JOB_CALLBACK_TIMEOUT)
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        logger.warning(f"Callback for job {job_id} to {job['callback_url']} failed: {e}")
+        raise self.retry(exc=e, countdown=2 ** self.request.retries * 10)
+
+
+@shared_task(ignore_result=True)
+def purge_finished_jobs_task():
+    job_store.purge(settings.GENERATION_JOB_TTL)
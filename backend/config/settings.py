@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import sys
 from pathlib import Path
 
-from decouple import config
+from decouple import config, Csv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -40,6 +40,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'rest_framework',
     'rest_framework.authtoken',
@@ -169,13 +170,118 @@ CELERY_RESULT_BACKEND = config('CELERY_RESULT_BACKEND')
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 
+# "inline" runs commands/handlers inside the Twilio webhook request; "async" only
+# queues the inbound message and lets a Celery worker process it and reply.
+WHATSAPP_WEBHOOK_MODE = config('WHATSAPP_WEBHOOK_MODE', default='inline')
+
+# Inbound messages are hashed by sender onto this many queues. Run exactly one solo
+# worker per queue so each user's messages are processed in order.
+WHATSAPP_INBOUND_PARTITIONS = config('WHATSAPP_INBOUND_PARTITIONS', default=4, cast=int)
+WHATSAPP_INBOUND_QUEUE_PREFIX = 'whatsapp-inbound'
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
 REDIS_PASSWORD = config('REDIS_PASSWORD')
 REDIS_PORT = config('REDIS_PORT')
 REDIS_HOST = config('REDIS_HOST')
 REDIS_USERNAME = config('REDIS_USERNAME')
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f'redis://{REDIS_USERNAME}:{REDIS_PASSWORD}@{REDIS_HOST}:{REDIS_PORT}',
+    },
+    # Persistent LLM response cache. Use django.core.cache.backends.db.DatabaseCache with a table
+    # name as LLM_CACHE_LOCATION (and run `manage.py createcachetable`) on hosts without a durable disk.
+    # The default directory must be on a persistent volume (the Dockerfile declares one) to outlive restarts.
+    'llm': {
+        'BACKEND': config('LLM_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': config('LLM_CACHE_LOCATION', default=str(BASE_DIR / 'var' / 'llm-cache')),
+        'TIMEOUT': config('LLM_CACHE_TTL', default=30 * 24 * 60 * 60, cast=int),
+        'OPTIONS': {'MAX_ENTRIES': config('LLM_CACHE_MAX_ENTRIES', default=20000, cast=int)},
+    },
+}
+
+# Deterministic (temperature 0) LLM calls are served from the 'llm' cache when enabled; the
+# in-process LRU keeps the most recently used responses in memory.
+LLM_CACHE_ENABLED = config('LLM_CACHE_ENABLED', default=True, cast=bool)
+LLM_CACHE_LOCAL_SIZE = config('LLM_CACHE_LOCAL_SIZE', default=256, cast=int)
+# Bites are split locally from [BITE_BREAK] markers, headings or paragraphs; only unstructured content
+# goes to the LLM. BITE_MAX_CHARS leaves room for the lesson framing within WhatsApp's 1600 characters.
+BITE_LOCAL_SPLITTER = config('BITE_LOCAL_SPLITTER', default=True, cast=bool)
+BITE_MAX_CHARS = config('BITE_MAX_CHARS', default=1300, cast=int)
+BITE_MIN_CHARS = config('BITE_MIN_CHARS', default=120, cast=int)
+# Concurrent LLM requests when generating quizzes for many topics.
+QUIZ_GENERATION_CONCURRENCY = config('QUIZ_GENERATION_CONCURRENCY', default=4, cast=int)
+
+# Conversation state cache in the shared Redis cache (no per-process tier, so every worker sees each write).
+STATE_CACHE_SHARED_TTL = config('STATE_CACHE_SHARED_TTL', default=60 * 60, cast=int)
+
+# Immutable quiz snapshots shared by every quiz session, keyed on the quiz's content version.
+QUIZ_SNAPSHOT_LOCAL_TTL = config('QUIZ_SNAPSHOT_LOCAL_TTL', default=5 * 60, cast=int)
+QUIZ_SNAPSHOT_SHARED_TTL = config('QUIZ_SNAPSHOT_SHARED_TTL', default=24 * 60 * 60, cast=int)
+
+# Versioned content cache (subject catalogue, subject/topic payloads, curriculum indexes, bite text).
+CONTENT_CACHE_LOCAL_TTL = config('CONTENT_CACHE_LOCAL_TTL', default=5 * 60, cast=int)
+CONTENT_CACHE_SHARED_TTL = config('CONTENT_CACHE_SHARED_TTL', default=24 * 60 * 60, cast=int)
+# How long a process trusts its copy of a content version before re-reading it from Redis.
+CONTENT_VERSION_LOCAL_TTL = config('CONTENT_VERSION_LOCAL_TTL', default=5, cast=int)
+
+# /get-subjects catalogue pages.
+SUBJECT_PAGE_SIZE = config('SUBJECT_PAGE_SIZE', default=10, cast=int)
+SUBJECT_SEARCH_LIMIT = config('SUBJECT_SEARCH_LIMIT', default=50, cast=int)
+
+# Search over subjects, topics and bites: "postgres" full-text search, "local" in-process
+# inverted index, or "auto" to pick by database vendor. "local" loads every document into each
+# process and is ignored on Postgres.
+SEARCH_BACKEND = config('SEARCH_BACKEND', default='auto')
+SEARCH_CONFIG = config('SEARCH_CONFIG', default='english')
+SEARCH_INDEX_SYNC_INTERVAL = config('SEARCH_INDEX_SYNC_INTERVAL', default=5, cast=int)
+
+# /generate-course enrolls the learner in an existing subject whose embedding has at least this
+# cosine similarity to the request instead of generating a new course. 0 disables the check.
+COURSE_DEDUP_THRESHOLD = config('COURSE_DEDUP_THRESHOLD', default=0.88, cast=float)
+EMBEDDING_MODEL = config('EMBEDDING_MODEL', default='models/text-embedding-004')
+# Subjects are (re-)embedded this many seconds after they change, so a course being generated is embedded once.
+SUBJECT_EMBEDDING_DELAY = config('SUBJECT_EMBEDDING_DELAY', default=60, cast=int)
+
+# Points: 0-value ledger rows (e.g. incorrect answers) are only written when enabled.
+POINTS_RECORD_ZERO_EVENTS = config('POINTS_RECORD_ZERO_EVENTS', default=False, cast=bool)
+POINTS_RECONCILE_INTERVAL = config('POINTS_RECONCILE_INTERVAL', default=60 * 60, cast=int)
+
+# Leaderboards: "redis" sorted sets shared by every process, or "local" in-process skip lists.
+LEADERBOARD_BACKEND = config('LEADERBOARD_BACKEND', default='redis')
+
+# /generate-course jobs are started from this queue; the concurrency of its worker bounds how many
+# pipelines are started at once. Jobs with no progress report for GENERATION_JOB_TIMEOUT seconds fail.
+GENERATION_QUEUE = config('GENERATION_QUEUE', default='course-generation')
+GENERATION_JOB_TIMEOUT = config('GENERATION_JOB_TIMEOUT', default=15 * 60, cast=int)
+ADK_DISPATCH_TIMEOUT = config('ADK_DISPATCH_TIMEOUT', default=5.0, cast=float)
+
+# Periodic jobs, run with `celery -A config.celery beat`.
+CELERY_BEAT_SCHEDULE = {
+    'reconcile-point-balances': {
+        'task': 'classmatebot.accounts.tasks.reconcile_point_balances_task',
+        'schedule': POINTS_RECONCILE_INTERVAL,
+    },
+    'fail-stale-generation-jobs': {
+        'task': 'classmatebot.chats.tasks.fail_stale_generation_jobs_task',
+        'schedule': 5 * 60,
+    },
+    'purge-finished-jobs': {
+        'task': 'config.jobs.purge_finished_jobs_task',
+        'schedule': 60 * 60,
+    },
+}
+
 ADK_WORKER_SECRET = config('ADK_WORKER_SECRET', default=None)
 
+# Background jobs started by POST /topics/ and /quizzes/: finished status records are kept this many
+# seconds, and finished jobs are POSTed to the request's callback_url, whose host must be listed here
+# (empty allows none).
+GENERATION_JOB_TTL = config('GENERATION_JOB_TTL', default=24 * 60 * 60, cast=int)
+JOB_CALLBACK_ALLOWED_HOSTS = config('JOB_CALLBACK_ALLOWED_HOSTS', default='', cast=Csv())
+JOB_CALLBACK_TIMEOUT = config('JOB_CALLBACK_TIMEOUT', default=10.0, cast=float)
+
 ##############################
 # DRF SPECTACULAR
 #################################
@@ -0,0 +1,52 @@
+import asyncio
+import random
+import uuid
+
+import httpx
+
+
+class FakeTwilio:
+    """
+    In-process stand-in for Twilio's Messages API, used to benchmark the outbound sender
+    without the real service. Each request waits `latency` (+/- `jitter`) seconds and then
+    answers 201, or 429/500 with the configured probabilities.
+
+    Pass `FakeTwilio().transport()` as the sender's `transport`.
+    """
+    def __init__(self, latency=0.08, jitter=0.02, throttle_rate=0.0, error_rate=0.0, retry_after=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.delivered = 0
+        self.throttled = 0
+        self.failed = 0
+
+    async def handle(self, request):
+        self.requests += 1
+        await asyncio.sleep(max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+
+        roll = self.random.random()
+        if roll < self.throttle_rate:
+            self.throttled += 1
+            headers = {"Retry-After": str(self.retry_after)} if self.retry_after is not None else {}
+            return httpx.Response(429, json={"code": 20429, "message": "Too Many Requests"}, headers=headers)
+        if roll < self.throttle_rate + self.error_rate:
+            self.failed += 1
+            return httpx.Response(500, json={"code": 20500, "message": "Internal Server Error"})
+
+        self.delivered += 1
+        form = dict(httpx.QueryParams(request.content.decode()))
+        return httpx.Response(201, json={
+            "sid": f"SM{uuid.uuid4().hex}",
+            "status": "queued",
+            "from": form.get("From"),
+            "to": form.get("To"),
+            "body": form.get("Body"),
+        })
+
+    def transport(self):
+        return httpx.MockTransport(self.handle)
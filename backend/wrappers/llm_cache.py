@@ -0,0 +1,124 @@
+import hashlib
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from config.caching import LRUCache, SharedCache
+
+
+logger = logging.getLogger(__name__)
+
+LLM_PARAMETERS = ("model", "temperature", "top_p", "top_k", "max_output_tokens")
+
+
+class LLMResponseCache:
+    """
+    Content-addressed cache of parsed LLM responses. The key is a hash of the prompt template
+    (including its format instructions), the model and sampling parameters and the input values,
+    so any change to one of them is a miss rather than a stale hit. Responses are stored as JSON
+    in the persistent 'llm' cache alias, behind an in-process LRU.
+    """
+    stats_prefix = "llm-cache-stats"
+
+    def __init__(self, alias="llm", local_size=256):
+        self.local = LRUCache(maxsize=local_size)
+        self.shared = SharedCache(alias)
+
+    @staticmethod
+    def fingerprint(prompt, llm):
+        """Hash of everything but the inputs that determines a response; constant for a compiled chain."""
+        fingerprint = {
+            "template": prompt.template,
+            "partials": {key: str(value) for key, value in prompt.partial_variables.items()},
+            "llm": {parameter: getattr(llm, parameter, None) for parameter in LLM_PARAMETERS},
+        }
+        return hashlib.sha256(json.dumps(fingerprint, sort_keys=True, default=str).encode()).hexdigest()
+
+    @staticmethod
+    def key(name, fingerprint, inputs):
+        digest = hashlib.sha256(f"{fingerprint}:{json.dumps(inputs, sort_keys=True, default=str)}".encode()).hexdigest()
+        return f"llm:{name}:{digest}"
+
+    def _record(self, name, outcome):
+        key = f"{self.stats_prefix}:{name}:{outcome}"
+        if self.shared.incr(key) is None:
+            self.shared.add(key, 0, None)
+            self.shared.incr(key)
+
+    def get(self, name, key):
+        value = self.local.get(key)
+        if value is None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+        self._record(name, "hits" if value is not None else "misses")
+        return value
+
+    def set(self, key, value):
+        self.local.set(key, value)
+        self.shared.set(key, value, DEFAULT_TIMEOUT)
+
+    def _lookup(self, name, key, parser):
+        data = self.get(name, key)
+        if data is not None:
+            try:
+                return parser.pydantic_object.model_validate(data)
+            except ValueError as e:
+                logger.warning(f"Discarding unreadable cached LLM response {key}: {e}")
+        return None
+
+    def invoke(self, name, prompt, llm, parser, inputs, chain=None, fingerprint=None):
+        """
+        Runs `prompt | llm | parser` on `inputs`, or returns the cached result of an identical call.
+        `parser` must be a PydanticOutputParser; results are cached as `model_dump(mode="json")`.
+        Compiled chains pass their runnable and fingerprint so neither is rebuilt per call.
+        """
+        chain = chain or prompt | llm | parser
+        if not settings.LLM_CACHE_ENABLED:
+            return chain.invoke(inputs)
+
+        key = self.key(name, fingerprint or self.fingerprint(prompt, llm), inputs)
+        response = self._lookup(name, key, parser)
+        if response is None:
+            response = chain.invoke(inputs)
+            self.set(key, response.model_dump(mode="json"))
+        return response
+
+    async def ainvoke(self, name, prompt, llm, parser, inputs, chain=None, fingerprint=None):
+        """
+        Async variant of `invoke`. Django cache backends are synchronous (the database one refuses
+        to run in an event loop, the file one blocks it), so lookups and writes run in a thread.
+        """
+        chain = chain or prompt | llm | parser
+        if not settings.LLM_CACHE_ENABLED:
+            return await chain.ainvoke(inputs)
+
+        key = self.key(name, fingerprint or self.fingerprint(prompt, llm), inputs)
+        response = await sync_to_async(self._lookup)(name, key, parser)
+        if response is None:
+            response = await chain.ainvoke(inputs)
+            await sync_to_async(self.set)(key, response.model_dump(mode="json"))
+        return response
+
+    def stats(self, names):
+        """Returns {name: {"hits", "misses", "hit_rate"}} summed over every process sharing the cache."""
+        stats = {}
+        for name in names:
+            hits = self.shared.get(f"{self.stats_prefix}:{name}:hits", 0)
+            misses = self.shared.get(f"{self.stats_prefix}:{name}:misses", 0)
+            stats[name] = {"hits": hits, "misses": misses,
+                           "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0}
+        return stats
+
+    def clear(self):
+        self.local.clear()
+        try:
+            self.shared.backend.clear()
+        except Exception as e:
+            logger.warning(f"Clearing the LLM cache failed: {e}")
+
+
+llm_cache = LLMResponseCache(local_size=settings.LLM_CACHE_LOCAL_SIZE)
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+from decouple import config
+from google.api_core import exceptions as google_exceptions
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from wrappers.llm_cache import llm_cache
+
+
+DEFAULT_MODEL = 'gemini-2.5-pro'
+
+# Gemini errors that clear up on their own: 5xx, rate limiting and timeouts.
+TRANSIENT_LLM_ERRORS = (google_exceptions.ServerError, google_exceptions.ResourceExhausted, google_exceptions.DeadlineExceeded)
+
+_llms = {}
+_llms_lock = threading.Lock()
+
+
+def build_llm(model=DEFAULT_MODEL, temperature=0.0):
+    return ChatGoogleGenerativeAI(google_api_key=config("GEMINI_API_KEY"), temperature=temperature, model=model)
+
+
+def get_llm(model=DEFAULT_MODEL, temperature=0.0):
+    """One client per (model, temperature) per process, so its API transport and connections are reused."""
+    llm = _llms.get((model, temperature))
+    if llm is None:
+        with _llms_lock:
+            llm = _llms.get((model, temperature))
+            if llm is None:
+                llm = _llms[(model, temperature)] = build_llm(model, temperature)
+    return llm
+
+
+class CompiledChain:
+    """
+    A `prompt | llm | parser` runnable built once, with its cache fingerprint precomputed.
+    Calls go through the LLM response cache.
+    """
+    def __init__(self, name, prompt, parser, llm):
+        self.name = name
+        self.prompt = prompt
+        self.parser = parser
+        self.llm = llm
+        self.runnable = prompt | llm | parser
+        self.fingerprint = llm_cache.fingerprint(prompt, llm)
+
+    def _cache_args(self):
+        return dict(chain=self.runnable, fingerprint=self.fingerprint)
+
+    def invoke(self, inputs):
+        return llm_cache.invoke(self.name, self.prompt, self.llm, self.parser, inputs, **self._cache_args())
+
+    async def ainvoke(self, inputs):
+        return await llm_cache.ainvoke(self.name, self.prompt, self.llm, self.parser, inputs, **self._cache_args())
+
+    async def abatch(self, inputs_list, max_concurrency=4, return_exceptions=False):
+        """
+        Runs `ainvoke` over `inputs_list` with at most `max_concurrency` requests in flight, keeping
+        order. With `return_exceptions`, a failed call yields its exception instead of failing the batch.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run(inputs):
+            async with semaphore:
+                return await self.ainvoke(inputs)
+
+        return await asyncio.gather(*(run(inputs) for inputs in inputs_list), return_exceptions=return_exceptions)
+
+
+class ChainRegistry:
+    """
+    Named chain factories, each compiled on first use and then shared by every caller and thread
+    of the process. A factory returns `(prompt, parser)` and may name the model and temperature.
+    """
+    def __init__(self):
+        self._factories = {}
+        self._chains = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, factory, model=DEFAULT_MODEL, temperature=0.0):
+        self._factories[name] = (factory, model, temperature)
+        self._chains.pop(name, None)
+
+    def factory(self, name):
+        return self._factories[name][0]
+
+    def compile(self, name, llm=None):
+        """Builds a fresh CompiledChain for `name`, bypassing the registry."""
+        factory, model, temperature = self._factories[name]
+        prompt, parser = factory()
+        return CompiledChain(name, prompt, parser, llm or get_llm(model, temperature))
+
+    def compile_for_loop(self, name):
+        """
+        Builds a CompiledChain for `name` on its own LLM client. The shared clients keep their async
+        transport bound to the first event loop that used them, so code that runs its own
+        `asyncio.run` must not call them through `ainvoke`; use one of these per loop instead.
+        """
+        _, model, temperature = self._factories[name]
+        return self.compile(name, llm=build_llm(model, temperature))
+
+    def get(self, name):
+        chain = self._chains.get(name)
+        if chain is None:
+            with self._lock:
+                chain = self._chains.get(name)
+                if chain is None:
+                    chain = self._chains[name] = self.compile(name)
+        return chain
+
+    def names(self):
+        return list(self._factories)
+
+    def reset(self):
+        with self._lock:
+            self._chains.clear()
+
+
+chains = ChainRegistry()
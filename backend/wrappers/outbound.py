@@ -0,0 +1,249 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import httpx
+import redis
+from decouple import config
+
+
+TWILIO_API_URL = "https://api.twilio.com/2010-04-01"
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryError(Exception):
+    def __init__(self, message, status_code=None, retryable=False, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value):
+    """
+    Seconds to wait from a Retry-After header, which is either a number of seconds or an
+    HTTP-date; None when it is missing or unparseable, so the caller falls back to its backoff.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """
+    Token bucket allowing `rate` sends per second with bursts of up to `capacity`.
+    Callers reserve a token up front (the balance may go negative) and sleep off the debt,
+    so no asyncio lock is needed and one bucket can be shared by every event loop in the process.
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Takes a token and returns how many seconds the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    async def acquire(self):
+        wait = self.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+
+
+class InMemoryDeadLetterStore:
+    """Keeps failed messages for the life of the process; for benchmarks and tests."""
+    def __init__(self, maxlen=10000):
+        self.messages = deque(maxlen=maxlen)
+
+    def add(self, to_number, body_text, error):
+        self.messages.append({"to": to_number, "body": body_text, "error": error, "failed_at": time.time()})
+
+    def all(self):
+        return list(self.messages)
+
+    def __len__(self):
+        return len(self.messages)
+
+
+class RedisDeadLetterStore:
+    """Keeps failed messages in a Redis list shared by every process; the sender's default."""
+    key = "whatsapp:outbound:dead-letters"
+
+    def __init__(self, client=None):
+        self.client = client or redis.Redis(
+            host=config("REDIS_HOST"),
+            port=config("REDIS_PORT", cast=int),
+            username=config("REDIS_USERNAME", default=None),
+            password=config("REDIS_PASSWORD", default=None),
+        )
+
+    def add(self, to_number, body_text, error):
+        entry = {"to": to_number, "body": body_text, "error": error, "failed_at": time.time()}
+        self.client.rpush(self.key, json.dumps(entry))
+
+    def all(self):
+        return [json.loads(entry) for entry in self.client.lrange(self.key, 0, -1)]
+
+    def __len__(self):
+        return self.client.llen(self.key)
+
+
+class AsyncWhatsAppSender:
+    """
+    Sends WhatsApp messages through Twilio's Messages API over a bounded httpx connection pool.
+    Senders with the same Twilio account and rate share one token bucket per process, retryable
+    failures (429/5xx and transport errors) are retried with full-jitter exponential backoff (or
+    after the server's Retry-After) and messages that still fail are written to the dead-letter
+    store, Redis unless another is passed.
+
+    Use as `async with AsyncWhatsAppSender() as sender: await sender.send_batch(messages)`, or
+    from sync code through the process-wide `outbound_sender`.
+    """
+    buckets = {}
+
+    def __init__(self, account_sid=None, auth_token=None, from_number=None, max_connections=20,
+                 rate_per_second=80, burst=None, max_retries=4, backoff_base=0.25, backoff_max=8.0,
+                 timeout=10.0, dead_letter_store=None, transport=None, base_url=TWILIO_API_URL):
+        self.account_sid = account_sid or config("TWILIO_ACCOUNT_SID")
+        self.auth_token = auth_token or config("TWILIO_AUTH_TOKEN")
+        self.from_number = from_number or config("TWILIO_PHONE_NUMBER")
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.transport = transport
+        self.base_url = base_url
+        self.dead_letter_store = dead_letter_store if dead_letter_store is not None else RedisDeadLetterStore()
+        self.bucket = self.buckets.setdefault((self.account_sid, rate_per_second, burst), TokenBucket(rate_per_second, burst))
+        self.client = None
+        self._slots = None
+
+    async def __aenter__(self):
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            auth=(self.account_sid, self.auth_token),
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            timeout=self.timeout,
+            transport=self.transport,
+        )
+        self._slots = asyncio.Semaphore(self.max_connections)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+        self.client = None
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(self.backoff_max, retry_after)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _post(self, to_number, body_text):
+        try:
+            response = await self.client.post(
+                f"/Accounts/{self.account_sid}/Messages.json",
+                data={"From": f"whatsapp:{self.from_number}", "To": f"whatsapp:{to_number}", "Body": body_text},
+            )
+        except httpx.TransportError as e:
+            raise DeliveryError(str(e), retryable=True)
+
+        if response.status_code >= 400:
+            raise DeliveryError(
+                f"Twilio responded {response.status_code}: {response.text}",
+                status_code=response.status_code,
+                retryable=response.status_code in RETRYABLE_STATUS_CODES,
+                retry_after=parse_retry_after(response.headers.get("Retry-After")),
+            )
+        return response.json()
+
+    async def attempt(self, to_number, body_text):
+        """One rate-limited delivery attempt; returns Twilio's message resource or raises DeliveryError."""
+        # Rate limiting happens outside the pool slot so waiting sends don't hold connections.
+        await self.bucket.acquire()
+        async with self._slots:
+            return await self._post(to_number, body_text)
+
+    async def send(self, to_number, body_text):
+        """Returns Twilio's message resource, or None if the message was dead-lettered."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self.attempt(to_number, body_text)
+            except DeliveryError as e:
+                if not e.retryable or attempt == self.max_retries:
+                    logger.error(f"Giving up on message to {to_number} after {attempt + 1} attempts: {e}")
+                    self.dead_letter_store.add(to_number, body_text, str(e))
+                    return None
+                await asyncio.sleep(self._backoff(attempt, e.retry_after))
+
+    async def send_batch(self, messages):
+        """Sends (to_number, body_text) pairs concurrently, bounded by the connection pool."""
+        return await asyncio.gather(*(self.send(to_number, body_text) for to_number, body_text in messages))
+
+
+class OutboundSender:
+    """
+    The process's AsyncWhatsAppSender, running on its own event-loop thread so sync callers
+    (views, Celery tasks, code already inside another loop) share one connection pool, token
+    bucket and dead-letter store. Started on first use, and again in a forked child
+    (gunicorn and Celery prefork workers), which does not inherit the thread.
+    """
+    def __init__(self, **sender_options):
+        self.sender_options = sender_options
+        self._lock = threading.Lock()
+        self._pid = None
+        self._loop = None
+        self.sender = None
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="whatsapp-outbound", daemon=True).start()
+            sender = AsyncWhatsAppSender(**self.sender_options)
+            asyncio.run_coroutine_threadsafe(sender.__aenter__(), loop).result()
+            self._loop, self.sender, self._pid = loop, sender, os.getpid()
+
+    def run(self, method, *args):
+        """Runs `method(sender, *args)` on the sender's loop and blocks the caller until it returns."""
+        self._start()
+        return asyncio.run_coroutine_threadsafe(method(self.sender, *args), self._loop).result()
+
+    def attempt(self, to_number, body_text):
+        return self.run(AsyncWhatsAppSender.attempt, to_number, body_text)
+
+    def dead_letter(self, to_number, body_text, error):
+        self._start()
+        self.sender.dead_letter_store.add(to_number, body_text, error)
+
+
+outbound_sender = OutboundSender()
+
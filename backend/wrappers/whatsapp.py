@@ -1,14 +1,8 @@
 import logging
 
-from twilio.rest import Client
-from decouple import config
+from celery import shared_task
 
-
-account_sid = config("TWILIO_ACCOUNT_SID")
-auth_token = config("TWILIO_AUTH_TOKEN")
-client = Client(account_sid, auth_token)
-twilio_number = config('TWILIO_PHONE_NUMBER')
-# to_number = config('TO_NUMBER')
+from wrappers.outbound import DeliveryError, outbound_sender
 
 
 logging.basicConfig(level=logging.INFO)
@@ -16,9 +10,34 @@ logger = logging.getLogger(__name__)
 
 
 def send_whatsapp_message(to_number, body_text):
+    """
+    Makes one rate-limited delivery attempt on the process's shared sender. A retryable failure
+    (429/5xx or a transport error) is handed to deliver_whatsapp_message_task, so the calling
+    request or handler never sleeps through backoff; any other failure is dead-lettered.
+    """
     try:
-        message = client.messages.create(from_=f"whatsapp:{twilio_number}", body=body_text, to=f"whatsapp:{to_number}")
-        logger.info(f"Message sent to {to_number}: {message.body}")
+        message = outbound_sender.attempt(to_number, body_text)
+    except DeliveryError as e:
+        if e.retryable:
+            logger.warning(f"Sending message to {to_number} failed, retrying in the background: {e}")
+            deliver_whatsapp_message_task.apply_async((to_number, body_text), countdown=e.retry_after or 5)
+        else:
+            logger.error(f"Error sending message to {to_number}: {e}")
+            outbound_sender.dead_letter(to_number, body_text, str(e))
+        return
     except Exception as e:
-        logger.error(f"Error sending message to {to_number}: {e}")
+        logger.exception(f"Error sending message to {to_number}: {e}")
+        return
+    logger.info(f"Message sent to {to_number}: {message.get('body')}")
+
 
+@shared_task(bind=True, ignore_result=True, max_retries=4)
+def deliver_whatsapp_message_task(self, to_number, body_text):
+    """Retries a message whose first attempt failed, with backoff; dead-letters it once retries are spent."""
+    try:
+        outbound_sender.attempt(to_number, body_text)
+    except DeliveryError as e:
+        if e.retryable and self.request.retries < self.max_retries:
+            raise self.retry(exc=e, countdown=e.retry_after or 2 ** self.request.retries * 5)
+        logger.error(f"Giving up on message to {to_number}: {e}")
+        outbound_sender.dead_letter(to_number, body_text, str(e))